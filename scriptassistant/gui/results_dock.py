@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+from PyQt4.QtCore import (pyqtSlot, Qt, QAbstractItemModel, QModelIndex,
+                          QTimer)
+from PyQt4.QtGui import (QBrush, QColor, QDockWidget, QHeaderView, QLabel,
+                         QTreeView, QVBoxLayout, QWidget)
+
+STATUS_COLOURS = {
+    "passed": QColor(0, 128, 0),
+    "failed": QColor(192, 0, 0),
+    "error": QColor(192, 0, 0),
+    "unexpected success": QColor(192, 96, 0),
+}
+
+# Records are added to the model at most this often (milliseconds).
+BATCH_INTERVAL = 250
+
+
+class TestResultModel(QAbstractItemModel):
+    """The records of the tests run, one row per test, each showing the
+    status, the test and how long it took.
+
+    A test with a traceback or skip reason has a single child row holding
+    it, which is only added when the test row is first expanded.
+    """
+
+    COLUMNS = ("Status", "Test", "Duration")
+
+    def __init__(self, parent=None):
+        """Constructor."""
+        super(TestResultModel, self).__init__(parent)
+        self.records = []
+        # The rows whose detail row has been added.
+        self.fetched = set()
+
+    def clear(self):
+        self.beginResetModel()
+        self.records = []
+        self.fetched = set()
+        self.endResetModel()
+
+    def add_records(self, records):
+        """Append a batch of records, as a single insertion."""
+        if records:
+            first = len(self.records)
+            self.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+            self.records.extend(records)
+            self.endInsertRows()
+
+    # Test rows have an internal id of 0, and the detail row of test row n
+    # has an internal id of n + 1.
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if parent.isValid():
+            return self.createIndex(row, column, parent.row() + 1)
+        return self.createIndex(row, column, 0)
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() == 0:
+            return QModelIndex()
+        return self.createIndex(index.internalId() - 1, 0, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.records)
+        if parent.internalId() == 0 and parent.column() == 0 and parent.row() in self.fetched:
+            return 1
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.records)
+        if parent.internalId() == 0 and parent.column() == 0:
+            return bool(self.records[parent.row()]["detail"])
+        return False
+
+    def canFetchMore(self, parent):
+        return (parent.isValid() and parent.internalId() == 0 and parent.column() == 0 and
+                parent.row() not in self.fetched and
+                bool(self.records[parent.row()]["detail"]))
+
+    def fetchMore(self, parent):
+        self.beginInsertRows(parent, 0, 0)
+        self.fetched.add(parent.row())
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if index.internalId() != 0:
+            # The detail row: the traceback or skip reason, in the test column.
+            if role == Qt.DisplayRole and index.column() == 1:
+                return self.records[index.internalId() - 1]["detail"]
+            return None
+        record = self.records[index.row()]
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return record["status"]
+            if index.column() == 1:
+                return record["description"]
+            if record["duration"] is not None:
+                return "{:.3f}s".format(record["duration"])
+        elif role == Qt.ForegroundRole and index.column() == 0:
+            colour = STATUS_COLOURS.get(record["status"])
+            if colour is not None:
+                return QBrush(colour)
+        elif role == Qt.ToolTipRole and index.column() == 1:
+            return record["id"]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+
+class ResultsDock(QDockWidget):
+    """The Test Results panel, listing each test as it finishes.
+
+    Records are buffered and added to the model in batches, so a large
+    suite doesn't redraw the panel after every test.
+    """
+
+    def __init__(self, parent=None):
+        """Constructor."""
+        super(ResultsDock, self).__init__(parent)
+        self.setObjectName("ScriptAssistantTestResults")
+        self.setWindowTitle(self.tr("Test Results"))
+
+        self.model = TestResultModel(self)
+        self.view = QTreeView()
+        self.view.setModel(self.model)
+        self.view.setAlternatingRowColors(True)
+        self.view.header().setResizeMode(1, QHeaderView.Stretch)
+        self.view.header().setStretchLastSection(False)
+        self.lbl_summary = QLabel()
+        self.summary = ""
+        self.notes = []
+
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.lbl_summary)
+        layout.addWidget(self.view)
+        self.setWidget(widget)
+
+        self.pending = []
+        self.batch_timer = QTimer(self)
+        self.batch_timer.setInterval(BATCH_INTERVAL)
+        self.batch_timer.timeout.connect(self.flush)
+
+    def clear(self):
+        """Clear the results of the last run."""
+        self.batch_timer.stop()
+        self.pending = []
+        self.model.clear()
+        self.summary = self.tr("Running tests...")
+        self.notes = []
+        self.show_text()
+
+    def add_record(self, record):
+        """Queue the record of a test to be added with the next batch."""
+        self.pending.append(record)
+        if not self.batch_timer.isActive():
+            self.batch_timer.start()
+
+    def add_records(self, records):
+        for record in records:
+            self.add_record(record)
+
+    @pyqtSlot()
+    def flush(self):
+        """Add the queued records to the model."""
+        self.batch_timer.stop()
+        records, self.pending = self.pending, []
+        self.model.add_records(records)
+
+    def show_summary(self, text):
+        """Add any queued records, and show a summary of the run."""
+        self.flush()
+        self.summary = text
+        self.show_text()
+
+    def add_note(self, text):
+        """Show a note about the run below its summary, e.g. which tests
+        it selected.
+        """
+        self.notes.append(text)
+        self.show_text()
+
+    def show_text(self):
+        self.lbl_summary.setText("\n".join([self.summary] + self.notes))
@@ -30,8 +30,7 @@ class SettingsDialog(QDialog, FORM_CLASS):
         self.btn_delete.clicked.connect(self.delete_configuration)
         self.cmb_config.currentIndexChanged.connect(self.show_configuration)
 
-        self.btn_script.clicked.connect(partial(
-            self.load_existing_directory_dialog, self.lne_script))
+        self.btn_script.clicked.connect(self.add_script_folder_dialog)
         self.btn_test_data.clicked.connect(partial(
             self.load_existing_directory_dialog, self.lne_test_data))
         self.btn_test.clicked.connect(partial(
@@ -41,20 +40,86 @@ class SettingsDialog(QDialog, FORM_CLASS):
         self.lne_test.textChanged.connect(self.check_valid_config)
         self.lne_test_data.textChanged.connect(self.check_valid_config)
 
+        # Configuration settings stored as "Y" or "N", and their checkboxes.
+        self.flag_settings = [
+            ("no_reload", self.chk_reload),
+            ("auto_reload", self.chk_auto_reload),
+            ("link_scripts", self.chk_link_scripts),
+        ]
+        # Configuration settings stored as the data of the item chosen in a
+        # combo box, and their combo boxes. The first item is the default.
+        self.choice_settings = [
+            ("test_runner", self.cmb_test_runner),
+        ]
+        self.cmb_test_runner.addItem(self.tr("In QGIS"), "in_process")
+        self.cmb_test_runner.addItem(self.tr("In parallel worker processes"), "parallel")
+        self.cmb_test_runner.addItem(self.tr("In a supervised process with timeouts"), "supervised")
+        # Configuration settings stored as the number in a spin box, their
+        # spin boxes and their defaults.
+        self.number_settings = [
+            ("regression_ratio", self.spn_regression_ratio, "2.0"),
+            ("test_timeout", self.spn_test_timeout, "60.0"),
+            ("module_timeout", self.spn_module_timeout, "600.0"),
+        ]
+
         self.cmb_config.lineEdit().textChanged.connect(self.check_changes)
         self.cmb_config.currentIndexChanged.connect(self.check_changes)
-        self.chk_reload.stateChanged.connect(self.check_changes)
+        for _, checkbox in self.flag_settings:
+            checkbox.stateChanged.connect(self.check_changes)
+        for _, combo_box in self.choice_settings:
+            combo_box.currentIndexChanged.connect(self.check_changes)
+        for _, spin_box, _ in self.number_settings:
+            spin_box.valueChanged.connect(self.check_changes)
+
+    def option_defaults(self):
+        """Return the default value of each flag, choice and number setting."""
+        defaults = {}
+        for setting_name, _ in self.flag_settings:
+            defaults[setting_name] = "N"
+        for setting_name, combo_box in self.choice_settings:
+            defaults[setting_name] = combo_box.itemData(0)
+        for setting_name, _, default in self.number_settings:
+            defaults[setting_name] = default
+        return defaults
+
+    def option_values(self):
+        """Return the "Y" / "N" value of each flag setting checkbox, the
+        chosen value of each choice setting combo box, and the value of each
+        number setting spin box.
+        """
+        values = {}
+        for setting_name, checkbox in self.flag_settings:
+            values[setting_name] = "Y" if checkbox.isChecked() else "N"
+        for setting_name, combo_box in self.choice_settings:
+            values[setting_name] = combo_box.itemData(combo_box.currentIndex())
+        for setting_name, spin_box, _ in self.number_settings:
+            values[setting_name] = str(spin_box.value())
+        return values
+
+    def show_option_values(self, load_value):
+        """Show the value of each flag, choice and number setting using
+        load_value.
+        """
+        for setting_name, checkbox in self.flag_settings:
+            value = load_value(setting_name)
+            if value == "Y":
+                checkbox.setChecked(True)
+            elif value == "N":
+                checkbox.setChecked(False)
+        for setting_name, combo_box in self.choice_settings:
+            index = combo_box.findData(load_value(setting_name))
+            combo_box.setCurrentIndex(max(index, 0))
+        for setting_name, spin_box, default in self.number_settings:
+            try:
+                spin_box.setValue(float(load_value(setting_name)))
+            except (TypeError, ValueError):
+                spin_box.setValue(float(default))
 
     @pyqtSlot()
     def save_configuration(self):
         """Save configuration (overwrite if config name already exists)."""
         new_config = self.cmb_config.lineEdit().text()
 
-        if self.chk_reload.isChecked():
-            no_reload_value = "Y"
-        else:
-            no_reload_value = "N"
-
         # Save to system
         settings = QSettings(
             os.path.join(QgsApplication.qgisSettingsDirPath(), "scriptassistant", "config.ini"),
@@ -80,7 +145,8 @@ class SettingsDialog(QDialog, FORM_CLASS):
         settings.setValue("script_folder", self.lne_script.text())
         settings.setValue("test_data_folder", self.lne_test_data.text())
         settings.setValue("test_folder", self.lne_test.text())
-        settings.setValue("no_reload", no_reload_value)
+        for setting_name, value in self.option_values().items():
+            settings.setValue(setting_name, value)
         settings.endArray()
 
         config_names = [self.cmb_config.itemText(i) for i in range(self.cmb_config.count())]
@@ -121,7 +187,8 @@ class SettingsDialog(QDialog, FORM_CLASS):
             settings.setValue("script_folder", config[item]["script_folder"])
             settings.setValue("test_data_folder", config[item]["test_data_folder"])
             settings.setValue("test_folder", config[item]["test_folder"])
-            settings.setValue("no_reload", config[item]["no_reload"])
+            for setting_name in self.option_defaults():
+                settings.setValue(setting_name, config[item][setting_name])
         settings.endArray()
 
         if self.cmb_config.count() == 0:
@@ -129,12 +196,11 @@ class SettingsDialog(QDialog, FORM_CLASS):
             self.lne_script.setText("")
             self.lne_test.setText("")
             self.lne_test_data.setText("")
-            self.chk_reload.setChecked(False)
+            self.show_option_values(self.option_defaults().get)
         else:
             self.show_configuration()
 
-    @staticmethod
-    def load_configuration():
+    def load_configuration(self):
         """Load configuration."""
         settings = QSettings(
             os.path.join(QgsApplication.qgisSettingsDirPath(), "scriptassistant", "config.ini"),
@@ -149,8 +215,9 @@ class SettingsDialog(QDialog, FORM_CLASS):
                 "script_folder": settings.value("script_folder"),
                 "test_data_folder": settings.value("test_data_folder"),
                 "test_folder": settings.value("test_folder"),
-                "no_reload": settings.value("no_reload"),
             }
+            for setting_name, default in self.option_defaults().items():
+                config[i][setting_name] = settings.value(setting_name, default)
         settings.endArray()
         return config
 
@@ -166,10 +233,8 @@ class SettingsDialog(QDialog, FORM_CLASS):
         self.lne_script.setText(settings.value("script_folder"))
         self.lne_test.setText(settings.value("test_folder"))
         self.lne_test_data.setText(settings.value("test_data_folder"))
-        if settings.value("no_reload") == "Y":
-            self.chk_reload.setChecked(True)
-        elif settings.value("no_reload") == "N":
-            self.chk_reload.setChecked(False)
+        defaults = self.option_defaults()
+        self.show_option_values(lambda name: settings.value(name, defaults[name]))
         settings.endArray()
 
     @pyqtSlot()
@@ -183,10 +248,26 @@ class SettingsDialog(QDialog, FORM_CLASS):
         if directory:
             line_edit.setText(directory)
 
+    @pyqtSlot()
+    def add_script_folder_dialog(self):
+        """Opens a file browser dialog to add a script folder. Script folders
+        added later override scripts of the same name in earlier folders.
+        """
+        script_folders = settings_manager.split_folders(self.lne_script.text())
+        directory = QFileDialog.getExistingDirectory(
+            QFileDialog(),
+            self.tr("Select directory..."),
+            script_folders[-1] if script_folders else ""
+        )
+        if directory and directory not in script_folders:
+            script_folders.append(directory)
+            self.lne_script.setText(settings_manager.join_folders(script_folders))
+
     @pyqtSlot()
     def check_valid_config(self):
         all_paths_are_valid = True
-        if self.lne_script.text() and not os.path.isdir(self.lne_script.text()):
+        script_folders = settings_manager.split_folders(self.lne_script.text())
+        if not all(os.path.isdir(folder) for folder in script_folders):
             self.lne_script.setStyleSheet("color: #FF6666")
             all_paths_are_valid = False
         else:
@@ -210,10 +291,8 @@ class SettingsDialog(QDialog, FORM_CLASS):
     @pyqtSlot()
     def check_changes(self):
         """Check if the user has changed any settings which are not saved."""
-        if self.chk_reload.isChecked():
-            no_reload_value = "Y"
-        else:
-            no_reload_value = "N"
+        option_values = self.option_values()
+        defaults = self.option_defaults()
 
         # Retrieve from system
         settings = QSettings(
@@ -228,7 +307,8 @@ class SettingsDialog(QDialog, FORM_CLASS):
                 self.lne_script.text() == settings.value("script_folder") and \
                 self.lne_test.text() == settings.value("test_folder") and \
                 self.lne_test_data.text() == settings.value("test_data_folder") and \
-                no_reload_value == settings.value("no_reload"):
+                all(option_values[name] == settings.value(name, defaults[name])
+                    for name in option_values):
             self.btn_save.setEnabled(False)
             self.setWindowTitle("Script Assistant Configuration")
         else:
@@ -271,10 +351,7 @@ class SettingsDialog(QDialog, FORM_CLASS):
         self.lne_test.setText(
             settings_manager.load_setting("test_folder")
         )
-        if settings_manager.load_setting("no_reload") == "Y":
-            self.chk_reload.setChecked(True)
-        elif settings_manager.load_setting("no_reload") == "N":
-            self.chk_reload.setChecked(False)
+        self.show_option_values(settings_manager.load_setting)
 
     def closeEvent(self, event):
         self.closingDialog.emit()
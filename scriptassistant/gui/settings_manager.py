@@ -31,3 +31,24 @@ def load_setting(setting_name):
         setting = settings.value("last_script_assistant/{}".format(setting_name))
 
     return setting
+
+
+def cache_path(filename):
+    """Return the path of a plugin cache file, alongside the config file."""
+    return os.path.join(
+        QgsApplication.qgisSettingsDirPath(), "scriptassistant", filename
+    )
+
+
+def split_folders(setting):
+    """Split a setting holding an ordered list of folders separated by
+    os.pathsep (as in PATH).
+    """
+    if not setting:
+        return []
+    return [folder.strip() for folder in setting.split(os.pathsep) if folder.strip()]
+
+
+def join_folders(folders):
+    """Join a list of folders into a single setting value."""
+    return os.pathsep.join(folders)
@@ -4,22 +4,51 @@ import os
 import sys
 import re
 import unittest
+import threading
+import traceback
 from importlib import import_module
-from shutil import copy
 from functools import partial
 
-from PyQt4.QtCore import (pyqtSlot, QSize, QSettings, QTranslator, qVersion,
+from PyQt4.QtCore import (pyqtSlot, Qt, QSize, QSettings, QTranslator, qVersion,
                           QCoreApplication)
 from PyQt4.QtGui import (QAction, QIcon, QMenu, QToolButton, QDockWidget,
-                         QMessageBox, QPushButton)
+                         QMessageBox, QPushButton, QProgressBar)
 
 from qgis.core import QgsApplication
 from qgis.gui import QgsMessageBar
-from qgis.utils import plugins, QGis
+from qgis.utils import QGis
 from processing.script.ScriptUtils import ScriptUtils
 
 import gui.settings_manager
+from gui.results_dock import ResultsDock
 from gui.settings_dialog import SettingsDialog
+from sync.compiler import CompileCache
+from sync.engine import sync_scripts, COPY, LINK
+from sync.manifest import ScriptManifest
+from sync.provider import refresh_script_algorithms
+from sync.scanner import DirectoryIndex
+from sync.script_index import ScriptMetadataIndex
+from sync.watcher import ScriptFolderWatcher
+from sync.worker import SyncWorker
+from testing.discovery import DiscoveryCache
+from testing.export import exporter_from_environment
+from testing.inspection import discover_tests, ModuleCache
+from testing.impact import FileAccessRecorder, ImpactMap, DependencyFinder
+from testing.outcomes import (OutcomeStore, order_failed_first,
+                              RERUN_FAILURES, FAILED_FIRST)
+from testing.reloader import ModuleReloader
+from testing.runner import CooperativeRunner
+from testing.results import CollectingResult
+from testing.steps import suite_steps
+from testing.timing import (TimingHistory, Stopwatch, import_timing_id,
+                            regression_ratio, timing_report)
+from testing.parallel import (ParallelRunner, RemoteTest, needs_gui, result_from_json,
+                              crashed_result, IN_PROCESS, PARALLEL)
+from testing.supervisor import (SupervisedRunner, timeout_setting, SUPERVISED,
+                                DEFAULT_TEST_TIMEOUT, DEFAULT_MODULE_TIMEOUT)
+from testing.targets import (split_target, module_targets, count_tests,
+                             AFFECTED_TESTS, SUITE_TARGETS)
+from testing.worker import DiscoveryWorker
 
 # Get the path for the parent directory of this file.
 __location__ = os.path.realpath(
@@ -62,10 +91,54 @@ class ScriptAssistant:
 
         # Initialise plugin dialog
         self.dlg_settings = SettingsDialog()
+        self.results_dock = None
 
-        self.test_cases = []
+        self.test_index = {}
+        self.test_index_folder = None
         self.test_modules = []
+        self.test_module_menus = []
         self.aggregated_test_result = None
+        self.test_discovery_cache = DiscoveryCache(
+            gui.settings_manager.cache_path("test_discovery.json"))
+        self.test_directory_index = DirectoryIndex(
+            gui.settings_manager.cache_path("test_directories.json"))
+        self.test_module_cache = ModuleCache(
+            gui.settings_manager.cache_path("test_modules.json"))
+        self.discovery_lock = threading.Lock()
+        self.test_impact_map = ImpactMap(
+            gui.settings_manager.cache_path("test_impact.json"))
+        # Made for each test run when a test module first passes.
+        self.dependency_finder = None
+        self.test_outcomes = OutcomeStore(
+            gui.settings_manager.cache_path("test_outcomes.json"))
+        self.test_timings = TimingHistory(
+            gui.settings_manager.cache_path("test_timings.json"))
+        self.run_timings = []
+        self.module_reloader = ModuleReloader()
+        self.result_exporter = None
+        self.test_run = None
+        self.test_progress_message = None
+        self.test_progress_bar = None
+        self.discovery_worker = None
+        self.discovery_running = False
+        self.discovery_pending = False
+        # Set when a test module may have changed since the last discovery.
+        self.tests_stale = True
+        self.test_watcher = ScriptFolderWatcher()
+        self.test_watcher.scriptsChanged.connect(self.mark_tests_stale)
+
+        self.script_manifest = ScriptManifest(
+            gui.settings_manager.cache_path("script_manifest.json"))
+        self.script_index = ScriptMetadataIndex(
+            gui.settings_manager.cache_path("script_index.json"))
+        self.script_directory_index = DirectoryIndex(
+            gui.settings_manager.cache_path("script_directories.json"))
+        self.script_compile_cache = CompileCache(
+            gui.settings_manager.cache_path("script_compile_cache.json"))
+        self.sync_worker = None
+        self.sync_pending = False
+        self.script_watcher = ScriptFolderWatcher()
+        self.script_watcher.scriptsChanged.connect(self.reload_scripts)
 
     def tr(self, message):
         """Get the translation for a string using Qt translation API.
@@ -90,6 +163,12 @@ class ScriptAssistant:
                 gui.settings_manager.save_setting("test_folder", os.path.join(__location__, "tests"))
                 gui.settings_manager.save_setting("test_data_folder", "")
                 gui.settings_manager.save_setting("no_reload", "N")
+                gui.settings_manager.save_setting("auto_reload", "N")
+                gui.settings_manager.save_setting("link_scripts", "N")
+                gui.settings_manager.save_setting("test_runner", IN_PROCESS)
+                gui.settings_manager.save_setting("regression_ratio", "2.0")
+                gui.settings_manager.save_setting("test_timeout", "60.0")
+                gui.settings_manager.save_setting("module_timeout", "600.0")
                 gui.settings_manager.save_setting("current_test", "$ALL")
 
                 settings.beginWriteArray("script_assistant")
@@ -99,28 +178,38 @@ class ScriptAssistant:
                 settings.setValue("test_data_folder", "")
                 settings.setValue("test_folder", os.path.join(__location__, "tests"))
                 settings.setValue("no_reload", "N")
+                settings.setValue("auto_reload", "N")
+                settings.setValue("link_scripts", "N")
+                settings.setValue("test_runner", IN_PROCESS)
+                settings.setValue("regression_ratio", "2.0")
+                settings.setValue("test_timeout", "60.0")
+                settings.setValue("module_timeout", "600.0")
                 settings.endArray()
 
         self.create_reload_action()
+        self.update_test_watcher()
         self.create_test_tool_button()
         self.create_add_test_data_action()
         self.create_settings_action()
+        self.create_results_dock()
+        self.update_script_watcher()
 
     def create_reload_action(self):
         """
         Creates the actions and tool button required for reloading scripts
-        from a folder.
+        from one or more folders.
         """
-        script_folder = gui.settings_manager.load_setting("script_folder")
+        script_folders = gui.settings_manager.split_folders(
+            gui.settings_manager.load_setting("script_folder"))
 
         # Reload
         self.reload_scripts_action = self.add_action(
-            "reload_scripts.png", "Reload: {}".format(script_folder), self.reload_scripts)
+            "reload_scripts.png", self.reload_action_text(script_folders), self.reload_scripts)
         self.toolbar.addAction(self.reload_scripts_action)
 
-        if not script_folder:
+        if not script_folders:
             self.reload_scripts_action.setEnabled(False)
-        elif not os.path.isdir(script_folder):
+        elif not all(os.path.isdir(folder) for folder in script_folders):
             self.reload_scripts_action.setEnabled(False)
             self.iface.messageBar().pushMessage(
                 self.tr("Invalid Script Folder"),
@@ -128,11 +217,21 @@ class ScriptAssistant:
                 level=QgsMessageBar.CRITICAL,
             )
 
+    def reload_action_text(self, script_folders):
+        """Label the reload action with the script folders and the number of
+        scripts last found in them.
+        """
+        count = sum(len(self.script_index.scripts_in(folder)) for folder in script_folders)
+        if count:
+            return "Reload: {} ({} scripts)".format("; ".join(script_folders), count)
+        return "Reload: {}".format("; ".join(script_folders))
+
     def create_test_tool_button(self):
         """
         Creates the actions and tool button required for running tests
         within QGIS.
         """
+        self.refresh_test_modules()
         self.create_test_script_menu()
         self.test_tool_button = self.create_tool_button(self.test_script_menu)
         self.test_tool_button.setDefaultAction(self.test_script_action)
@@ -161,6 +260,14 @@ class ScriptAssistant:
                 level=QgsMessageBar.CRITICAL,
             )
 
+    def create_results_dock(self):
+        """
+        Creates the Test Results panel, which is shown when tests are run.
+        """
+        self.results_dock = ResultsDock(self.iface.mainWindow())
+        self.iface.addDockWidget(Qt.BottomDockWidgetArea, self.results_dock)
+        self.results_dock.hide()
+
     def create_settings_action(self):
         """
         Creates the actions and tool button required for running tests
@@ -202,19 +309,31 @@ class ScriptAssistant:
     @pyqtSlot()
     def reload_scripts(self):
         """
-        Copies and overwrites scripts from the configured folder to the
-        QGIS scripts folder.
+        Copies new and changed scripts from the configured folders to the
+        QGIS scripts folder, and removes scripts that have been deleted from
+        the configured folders since the last reload. Where scripts in
+        different folders have the same name, the later folder wins.
+
+        The copying is done on a worker thread. A reload requested while
+        another is running is queued, and several requests are coalesced
+        into a single reload.
         """
-        folder_dir = gui.settings_manager.load_setting("script_folder")
-        user_script_dir = os.path.join(
-            QgsApplication.qgisSettingsDirPath(), "processing", "scripts"
-        )
-        if folder_dir:
-            for filename in os.listdir(folder_dir):
-                if filename.endswith(".py") and not filename.startswith("_"):
-                    if self.is_processing_script(os.path.join(folder_dir, filename)):
-                        copy(os.path.join(folder_dir, filename), user_script_dir)
-            plugins["processing"].toolbox.updateProvider("script")
+        script_folders = gui.settings_manager.split_folders(
+            gui.settings_manager.load_setting("script_folder"))
+        if script_folders:
+            if self.sync_worker is not None and self.sync_worker.isRunning():
+                self.sync_pending = True
+                return
+            self.sync_pending = False
+            self.reload_scripts_action.setEnabled(False)
+            if gui.settings_manager.load_setting("link_scripts") == "Y":
+                mode = LINK
+            else:
+                mode = COPY
+            self.sync_worker = SyncWorker(
+                partial(self.sync_script_folders, script_folders, mode))
+            self.sync_worker.syncFinished.connect(self.finish_reload_scripts)
+            self.sync_worker.start()
         else:
             self.iface.messageBar().pushMessage(
                 self.tr("No Script Folder Configured"),
@@ -223,29 +342,240 @@ class ScriptAssistant:
             )
 
     @staticmethod
-    def is_processing_script(filename):
+    def user_script_dir():
+        """The QGIS processing user scripts folder."""
+        return os.path.join(
+            QgsApplication.qgisSettingsDirPath(), "processing", "scripts"
+        )
+
+    def sync_script_folders(self, script_folders, mode):
+        """Sync the merged script folders to the QGIS scripts folder. Runs on
+        the sync worker thread, so must not touch the GUI or settings.
         """
-        Find the first non-blank line of the python file and ensure that it
-        contains ##formatting that looks like a processing script.
+        result = sync_scripts(
+            script_folders, self.user_script_dir(), self.script_manifest,
+            self.is_processing_script, self.script_directory_index, mode=mode,
+            compile_cache=self.script_compile_cache
+        )
+        self.script_manifest.save()
+        self.script_directory_index.save()
+        self.script_compile_cache.save()
+        for folder in script_folders:
+            self.script_index.prune(folder, result.sources)
+        self.script_index.save()
+        return result
+
+    @pyqtSlot(object, object)
+    def finish_reload_scripts(self, result, error):
+        """Refresh the processing toolbox after a sync. Runs on the GUI
+        thread.
         """
-        with open(filename) as lines:
-            line = lines.readline()
-            while line != "":
-                if line.startswith("##"):
-                    if line.startswith("## ") or line.startswith("###"):
-                        return False
-                    else:
-                        return True
-                else:
-                    return False
+        self.reload_scripts_action.setEnabled(True)
+        self.reload_scripts_action.setText(self.reload_action_text(
+            gui.settings_manager.split_folders(
+                gui.settings_manager.load_setting("script_folder"))))
+        if error is not None:
+            self.iface.messageBar().pushMessage(
+                self.tr("Script Reload Failed"),
+                str(error),
+                level=QgsMessageBar.CRITICAL,
+            )
+        else:
+            # Only the algorithms for changed scripts are re-registered,
+            # and nothing at all when no script has changed.
+            if result.changed:
+                refresh_script_algorithms(
+                    self.user_script_dir(), result.added, result.updated, result.removed
+                )
+            self.iface.messageBar().pushMessage(
+                self.tr("Scripts Reloaded"),
+                self.tr("{} added, {} updated, {} removed, {} unchanged.").format(
+                    len(result.added), len(result.updated),
+                    len(result.removed), len(result.unchanged)
+                ),
+                level=QgsMessageBar.INFO,
+                duration=3,
+            )
+            if result.copied_instead_of_linked:
+                self.iface.messageBar().pushMessage(
+                    self.tr("Scripts Copied"),
+                    self.tr("Links are not supported here, so {} scripts were copied instead.").format(
+                        len(result.copied_instead_of_linked)),
+                    level=QgsMessageBar.WARNING,
+                )
+            for path, line_number, message in result.invalid:
+                self.iface.messageBar().pushMessage(
+                    self.tr("Script Not Loaded"),
+                    "{}:{}: {}".format(path, line_number, message),
+                    level=QgsMessageBar.CRITICAL,
+                )
+            for kept_path, ignored_path in result.collisions:
+                self.iface.messageBar().pushMessage(
+                    self.tr("Duplicate Script Name"),
+                    self.tr("{} was not loaded as it has the same name as {}.").format(
+                        ignored_path, kept_path),
+                    level=QgsMessageBar.WARNING,
+                )
+        if self.sync_pending:
+            self.reload_scripts()
+
+    def update_script_watcher(self):
+        """Start or stop watching the script folders for changes, depending
+        on the auto reload setting.
+        """
+        script_folders = [
+            folder for folder in gui.settings_manager.split_folders(
+                gui.settings_manager.load_setting("script_folder"))
+            if os.path.isdir(folder)
+        ]
+        if gui.settings_manager.load_setting("auto_reload") == "Y" and script_folders:
+            self.script_watcher.watch(script_folders)
+        else:
+            self.script_watcher.stop()
 
+    def update_test_watcher(self):
+        """Watch the test folder for test modules being added, removed or
+        changed, so that the tests are only discovered again when needed.
+        """
+        test_folder = gui.settings_manager.load_setting("test_folder")
+        if test_folder and os.path.isdir(test_folder):
+            self.test_watcher.watch([test_folder])
+        else:
+            self.test_watcher.stop()
+        self.tests_stale = True
+
+    @pyqtSlot()
+    def mark_tests_stale(self):
+        self.tests_stale = True
+
+    def is_processing_script(self, filename):
+        """
+        Check that the header of the python file contains ##formatting that
+        looks like a processing script. Headers are parsed once and cached
+        until the file changes.
+        """
+        return self.script_index.is_processing_script(filename)
+
+    @pyqtSlot()
     def update_test_script_menu(self):
         """
+        Shows the last known tests in the test menu straight away and
+        refreshes them in the background if a test module has changed.
         """
+        if self.tests_stale:
+            self.refresh_test_modules()
+        self.rebuild_test_script_menu()
+
+    def rebuild_test_script_menu(self):
+        """Rebuilds the test menu from the last known tests."""
+        for module_menu in self.test_module_menus:
+            module_menu.deleteLater()
+        self.test_module_menus = []
         self.test_script_menu.clear()
         self.create_test_script_menu()
         self.test_tool_button.setDefaultAction(self.test_script_action)
 
+    def create_test_package_menu(self, package_menus, package):
+        """
+        Returns the sub-menu grouping the test modules in a test package,
+        creating it and the sub-menus of any parent packages if required.
+        """
+        if package not in package_menus:
+            parent, _, name = package.rpartition(".")
+            parent_menu = self.create_test_package_menu(package_menus, parent)
+            package_menu = QMenu(name, parent_menu)
+            parent_menu.addMenu(package_menu)
+            package_menus[package] = package_menu
+            if parent_menu is self.test_script_menu:
+                self.test_module_menus.append(package_menu)
+        return package_menus[package]
+
+    def create_test_module_menu(self, test_module_name, parent_menu):
+        """
+        Creates a sub-menu to run a test module, one of its test case
+        classes or a single test method.
+        """
+        module_menu = QMenu(test_module_name.rpartition(".")[2], parent_menu)
+        if parent_menu is self.test_script_menu:
+            self.test_module_menus.append(module_menu)
+        module_menu.addAction(self.add_action(
+            "test_scripts.png", "all in: {}".format(test_module_name),
+            partial(self.prepare_test, test_module_name), True
+        ))
+        for class_target, method_targets in module_targets(self.test_index, test_module_name):
+            class_name = class_target.rpartition(".")[2]
+            class_menu = module_menu.addMenu(class_name)
+            class_menu.addAction(self.add_action(
+                "test_scripts.png", "all in: {}".format(class_name),
+                partial(self.prepare_test, class_target), True
+            ))
+            class_menu.addSeparator()
+            for method_target in method_targets:
+                class_menu.addAction(self.add_action(
+                    "test_scripts.png", method_target.rpartition(".")[2],
+                    partial(self.prepare_test, method_target), True
+                ))
+        return module_menu
+
+    def refresh_test_modules(self):
+        """
+        Discovers the tests in the test folder on a worker thread. A refresh
+        requested while another is running is queued, and several requests
+        are coalesced into a single refresh.
+        """
+        test_folder = gui.settings_manager.load_setting("test_folder")
+        if not test_folder or not os.path.isdir(test_folder):
+            return
+        self.tests_stale = False
+        if self.discovery_running:
+            self.discovery_pending = True
+            return
+        self.discovery_pending = False
+        self.discovery_running = True
+        self.discovery_worker = DiscoveryWorker(test_folder, self.discover_test_folder)
+        self.discovery_worker.discoveryFinished.connect(self.finish_test_discovery)
+        self.discovery_worker.start()
+
+    def discover_test_folder(self, test_folder):
+        """Find the tests in a test folder. Runs on the discovery worker
+        thread, so must not touch the GUI or settings.
+        """
+        with self.discovery_lock:
+            return self.test_discovery_cache.tests(
+                test_folder, self.index_test_folder, self.test_directory_index)
+
+    def index_test_folder(self, test_folder):
+        """Parse the test modules in a test folder, reusing the listings of
+        unchanged directories and the parses of unchanged modules.
+        """
+        tests = discover_tests(test_folder, self.test_directory_index, self.test_module_cache)
+        self.test_directory_index.save()
+        self.test_module_cache.save()
+        return tests
+
+    @pyqtSlot(object, object, object)
+    def finish_test_discovery(self, test_folder, tests, error):
+        """Swap the newly discovered tests into the test menu."""
+        self.discovery_running = False
+        if error is not None:
+            # Try again the next time the menu is opened.
+            self.tests_stale = True
+            self.iface.messageBar().pushMessage(
+                self.tr("Test Discovery Failed"),
+                str(error),
+                level=QgsMessageBar.WARNING,
+            )
+        elif test_folder == gui.settings_manager.load_setting("test_folder"):
+            self.set_test_index(test_folder, tests)
+        if self.discovery_pending:
+            self.refresh_test_modules()
+        self.rebuild_test_script_menu()
+
+    def set_test_index(self, test_folder, tests):
+        self.test_index = tests or {}
+        self.test_index_folder = test_folder
+        self.test_modules = sorted(self.test_index)
+
     def create_test_script_menu(self):
         """
         """
@@ -259,9 +589,15 @@ class ScriptAssistant:
                     level=QgsMessageBar.CRITICAL,
                 )
 
+        # The menu is rebuilt each time it is opened, so delete the actions
+        # of the last menu rather than leaving them parented to the toolbar.
+        for action in self.test_actions:
+            action.deleteLater()
         self.test_actions = []
         if self.test_script_action:
             self.iface.removePluginMenu(self.tr(u"&Script Assistant"), self.test_script_action)
+            self.actions.remove(self.test_script_action)
+            self.test_script_action.deleteLater()
 
         self.test_script_action = self.add_action(
             "test_scripts.png", "Test: {}".format(gui.settings_manager.load_setting("current_test")),
@@ -273,80 +609,100 @@ class ScriptAssistant:
             partial(self.prepare_test, "$ALL"), True
         )
         self.test_script_menu.addAction(self.test_all_action)
+        self.test_affected_action = self.add_action(
+            "test_scripts.png", "affected in: {}".format(test_folder),
+            partial(self.prepare_test, AFFECTED_TESTS), True
+        )
+        self.test_script_menu.addAction(self.test_affected_action)
+        current_test = gui.settings_manager.load_setting("current_test")
+        self.test_failures_action = self.add_action(
+            "test_scripts.png", "rerun failures: {}".format(current_test),
+            partial(self.prepare_test, current_test, RERUN_FAILURES), True
+        )
+        self.test_script_menu.addAction(self.test_failures_action)
+        self.test_failed_first_action = self.add_action(
+            "test_scripts.png", "failed first: {}".format(current_test),
+            partial(self.prepare_test, current_test, FAILED_FIRST), True
+        )
+        self.test_script_menu.addAction(self.test_failed_first_action)
+        if not current_test or not self.test_outcomes.failed(current_test):
+            self.test_failures_action.setEnabled(False)
 
         if os.path.isdir(test_folder):
-            self.test_cases = []
-            self.test_modules = []
-            self.update_unique_test_modules(test_folder)
+            if self.test_index_folder != test_folder:
+                self.set_test_index(test_folder, self.test_discovery_cache.cached(test_folder))
 
+            package_menus = {"": self.test_script_menu}
             for test_module_name in self.test_modules:
-                action = self.add_action(
-                    "test_scripts.png", test_module_name,
-                    partial(self.prepare_test, test_module_name), True
-                )
-                self.test_script_menu.addAction(action)
-
-            if not gui.settings_manager.load_setting("current_test") in self.test_modules:
+                package_menu = self.create_test_package_menu(
+                    package_menus, test_module_name.rpartition(".")[0])
+                package_menu.addMenu(self.create_test_module_menu(test_module_name, package_menu))
+
+            if self.discovery_running:
+                refreshing_action = self.test_script_menu.addAction(self.tr("Refreshing tests..."))
+                refreshing_action.setEnabled(False)
+            elif current_test not in SUITE_TARGETS and split_target(self.test_index, current_test) is None:
                 gui.settings_manager.save_setting("current_test", "$ALL")
                 self.test_script_action.setText("Test: all")
 
         if not test_folder or not os.path.isdir(test_folder):
             self.test_script_action.setEnabled(False)
             self.test_all_action.setEnabled(False)
+            self.test_affected_action.setEnabled(False)
+            self.test_failures_action.setEnabled(False)
+            self.test_failed_first_action.setEnabled(False)
 
     def update_unique_test_modules(self, test_folder):
         """
-        Loops through all TestCase instances in a test folder to find
-        unique test modules
+        Finds the unique test modules in a test folder by parsing them, so
+        that no test module is imported until it is run. The modules are
+        only parsed again if a file in the test folder has changed.
         """
-        tests = unittest.TestLoader().discover(test_folder, pattern="test_*.py")
-        self.update_all_test_cases(tests)
+        self.set_test_index(test_folder, self.discover_test_folder(test_folder))
 
-        all_test_modules = []
-        for t in self.test_cases:
-            all_test_modules.append(type(t).__module__)
-        unique_test_modules = list(set(all_test_modules))
-        self.test_modules = unique_test_modules
-        self.test_modules.sort()
+    @pyqtSlot()
+    def prepare_test(self, test_name, run_mode=None):
+        """Open the QGIS Python Console. Handle testing all tests, and
+        rerunning failures or running failures first.
 
-    def update_all_test_cases(self, test_suite):
+        The tests are run one at a time from the Qt event loop, so QGIS
+        stays usable and the run can be cancelled from the message bar.
         """
-        Loops through the test suites discovered using unittest.TestLoader().discover()
-        to find all individual TestCase instances and return them in a list
-        """
-        for test_or_suite in test_suite:
-            if unittest.suite._isnotsuite(test_or_suite):
-                # confirmed test
-                self.test_cases.append(test_or_suite)
-            else:
-                # confirmed suite
-                self.update_all_test_cases(test_or_suite)
-
-    @pyqtSlot()
-    def prepare_test(self, test_name):
-        """Open the QGIS Python Console. Handle testing all tests."""
+        if self.test_run is not None and self.test_run.is_running():
+            self.iface.messageBar().pushMessage(
+                self.tr("Tests Already Running"),
+                self.tr("Please wait for the running tests to finish, or cancel them."),
+                level=QgsMessageBar.WARNING,
+            )
+            return
         self.open_python_console()
+        self.results_dock.clear()
+        self.results_dock.show()
         gui.settings_manager.save_setting("current_test", test_name)
         self.update_test_script_menu()
 
         if test_name:
             self.aggregated_test_result = unittest.TestResult()
-            if test_name == "$ALL":
+            self.run_timings = []
+            self.dependency_finder = None
+            self.result_exporter = exporter_from_environment()
+            if test_name in SUITE_TARGETS:
                 self.add_test_data_action.setEnabled(False)
-                test_folder = gui.settings_manager.load_setting("test_folder")
-                self.update_unique_test_modules(test_folder)
-
-                for test_module_name in self.test_modules:
-                    result = self.run_test(test_module_name)
-                    self.prepare_result(result)
             else:
                 if not self.add_test_data_action.isEnabled():
                     test_data_folder = gui.settings_manager.load_setting("test_data_folder")
                     if os.path.isdir(test_data_folder):
                         self.add_test_data_action.setEnabled(True)
-                result = self.run_test(test_name)
-                self.prepare_result(result)
-            self.print_aggregated_result()
+            plan = self.plan_test_run(test_name, run_mode)
+            test_runner = gui.settings_manager.load_setting("test_runner")
+            if test_runner == PARALLEL:
+                steps = self.run_tests_in_parallel(plan, run_mode == FAILED_FIRST)
+            elif test_runner == SUPERVISED:
+                steps = self.run_tests_supervised(plan, run_mode == FAILED_FIRST)
+            else:
+                steps = self.run_plan(plan, run_mode == FAILED_FIRST)
+            self.start_test_run(
+                steps, sum(count_tests(self.test_index, target, tests) for target, tests in plan))
         else:
             # Ideally the button would be disabled, but that isn't possible
             # with QToolButton without odd workarounds
@@ -356,6 +712,255 @@ class ScriptAssistant:
                 level=QgsMessageBar.CRITICAL,
             )
 
+    def plan_test_run(self, test_name, run_mode=None):
+        """
+        Returns a list of (target, test names) to run for a test name and
+        run mode, where test names are the classes or methods to run within
+        a test module target, or None to run the whole target.
+        """
+        if test_name in SUITE_TARGETS:
+            test_folder = gui.settings_manager.load_setting("test_folder")
+            self.update_unique_test_modules(test_folder)
+            targets = self.test_modules
+            if test_name == AFFECTED_TESTS:
+                targets = self.test_impact_map.affected(targets)
+                self.results_dock.add_note(
+                    "{} of {} test modules affected by changes since they last passed.".format(
+                        len(targets), len(self.test_modules)))
+        else:
+            targets = [test_name]
+
+        failed = []
+        for test_id in self.test_outcomes.failed(test_name):
+            split = split_target(self.test_index, test_id)
+            if split is not None and (test_name not in SUITE_TARGETS or split[0] in targets):
+                failed.append(split)
+
+        if run_mode == RERUN_FAILURES:
+            self.results_dock.add_note("{} tests failed last time they were run.".format(len(failed)))
+            tests = {}
+            for module_name, name in failed:
+                if name is None:
+                    # The module itself failed, so all of it is run again.
+                    tests[module_name] = None
+                elif tests.get(module_name, []) is not None:
+                    tests.setdefault(module_name, []).append(name)
+            return sorted(tests.items())
+        if run_mode == FAILED_FIRST:
+            failed_modules = set(module_name for module_name, _ in failed)
+            targets = sorted(targets, key=lambda target: target not in failed_modules)
+        return [(target, None) for target in targets]
+
+    def start_test_run(self, steps, total):
+        """
+        Starts running the steps of a test run from the Qt event loop, with
+        a progress bar and a cancel button in the message bar.
+        """
+        self.test_progress_message = self.iface.messageBar().createMessage(
+            self.tr("Running Tests"), self.tr("Starting..."))
+        self.test_progress_bar = QProgressBar()
+        self.test_progress_bar.setMaximum(max(total, 1))
+        self.test_progress_message.layout().addWidget(self.test_progress_bar)
+        cancel_button = QPushButton(self.tr("Cancel"))
+        cancel_button.clicked.connect(self.cancel_test_run)
+        self.test_progress_message.layout().addWidget(cancel_button)
+        self.iface.messageBar().pushWidget(self.test_progress_message, QgsMessageBar.INFO)
+
+        self.test_run = CooperativeRunner(steps)
+        self.test_run.testFinished.connect(self.show_test_progress)
+        self.test_run.runFinished.connect(self.finish_test_run)
+        self.test_run.start()
+
+    @pyqtSlot(int, object)
+    def show_test_progress(self, count, test):
+        """Show the number of tests run and the test just run."""
+        # The total is counted from the test list, so it can be exceeded.
+        if count > self.test_progress_bar.maximum():
+            self.test_progress_bar.setMaximum(count)
+        self.test_progress_bar.setValue(count)
+        self.test_progress_message.setText("{} of {}: {}".format(
+            count, self.test_progress_bar.maximum(), test))
+
+    @pyqtSlot()
+    def cancel_test_run(self):
+        """Cancel the test run once the running test has finished."""
+        if self.test_run is not None:
+            self.test_run.cancel()
+
+    @pyqtSlot(bool)
+    def finish_test_run(self, cancelled):
+        """Print the summary of the tests run, including a cancelled run."""
+        self.iface.messageBar().popWidget(self.test_progress_message)
+        self.test_progress_message = None
+        self.test_progress_bar = None
+        self.test_timings.record(self.run_timings)
+        self.test_timings.save()
+        self.dependency_finder = None
+        if self.result_exporter is not None:
+            self.result_exporter.close()
+            self.result_exporter = None
+        self.print_aggregated_result()
+        result = self.aggregated_test_result
+        self.results_dock.show_summary("{} tests run, {} failures, {} errors{}".format(
+            result.testsRun, len(result.failures), len(result.errors),
+            " (cancelled)" if cancelled else ""))
+
+    def run_plan(self, plan, failed_first=False):
+        """Yield each test run for a plan of test targets."""
+        for target, tests in plan:
+            for test in self.run_test(target, tests, failed_first):
+                yield test
+
+    def run_tests_in_parallel(self, plan, failed_first=False):
+        """
+        Runs the test modules in a plan in a pool of worker processes, each
+        with its own headless QGIS, and merges their results into the
+        aggregated TestResult. Test modules which need the QGIS GUI or the
+        loaded plugins are run in QGIS meanwhile, as is a single test module.
+
+        Yields each test run in QGIS, and the tests of each worker result
+        as it is merged. Closing the generator kills the workers.
+        """
+        pinned, jobs = self.plan_worker_jobs(plan, failed_first)
+        if len(jobs) < 2:
+            # Starting a worker's QGIS costs more than running one module.
+            pinned = plan
+            jobs = []
+
+        runner = ParallelRunner(
+            __name__.rpartition(".")[0],
+            self.worker_config(),
+            gui.settings_manager.cache_path("test_worker_{}.log"),
+        )
+        runner.start(jobs)
+        if jobs:
+            self.results_dock.add_note(
+                "Running {} test modules in worker processes, {} in QGIS.".format(
+                    len(jobs), len(pinned)))
+        try:
+            for target, tests in pinned:
+                for test in self.run_test(target, tests, failed_first):
+                    yield test
+                    finished = runner.collect(timeout=0)
+                    if finished is not None:
+                        for remote_test in self.merge_parallel_result(*finished):
+                            yield remote_test
+            while runner.remaining:
+                finished = runner.collect(timeout=0)
+                if finished is None:
+                    # Go back to the event loop while the workers run.
+                    yield None
+                else:
+                    for remote_test in self.merge_parallel_result(*finished):
+                        yield remote_test
+        finally:
+            runner.stop()
+            self.test_outcomes.save()
+
+    def run_tests_supervised(self, plan, failed_first=False):
+        """
+        Runs the test modules in a plan one at a time in a supervised worker
+        process with its own headless QGIS, so a test which hangs is timed
+        out rather than hanging QGIS. A test which times out is recorded as
+        an error, and the worker process is killed and started again to run
+        the rest of the tests. Test modules which need the QGIS GUI or the
+        loaded plugins are run in QGIS, without a timeout.
+
+        Yields the tests run in QGIS and in the worker process, and None
+        while waiting for the worker process. Closing the generator kills
+        the worker process.
+        """
+        pinned, jobs = self.plan_worker_jobs(plan, failed_first)
+        runner = SupervisedRunner(
+            __name__.rpartition(".")[0],
+            self.worker_config(),
+            gui.settings_manager.cache_path("test_worker_supervised.log"),
+            timeout_setting(
+                gui.settings_manager.load_setting("test_timeout"), DEFAULT_TEST_TIMEOUT),
+            timeout_setting(
+                gui.settings_manager.load_setting("module_timeout"), DEFAULT_MODULE_TIMEOUT),
+        )
+        if pinned:
+            self.results_dock.add_note(
+                "{} test modules need QGIS, so are run in QGIS without a timeout.".format(
+                    len(pinned)))
+        try:
+            for target, tests in pinned:
+                for test in self.run_test(target, tests, failed_first):
+                    yield test
+            for job in jobs:
+                supervised = runner.run(job)
+                while not supervised.finished:
+                    records = supervised.poll(timeout=0)
+                    if not records:
+                        # Go back to the event loop while the tests run.
+                        yield None
+                    for record in records:
+                        self.add_test_record(record)
+                        yield RemoteTest(record["id"], record["description"])
+                self.merge_parallel_result(job, supervised.result(), show_records=False)
+        finally:
+            runner.stop()
+            self.test_outcomes.save()
+
+    def plan_worker_jobs(self, plan, failed_first=False):
+        """
+        Returns the targets of a plan which must be run in QGIS, as they
+        need the QGIS GUI or the loaded plugins, and the jobs to run the
+        other targets in a worker process (see testing.parallel).
+        """
+        test_folder = gui.settings_manager.load_setting("test_folder")
+        pinned = []
+        jobs = []
+        for target, tests in plan:
+            module_name, name = split_target(self.test_index, target) or (target, None)
+            path = self.test_index.get(module_name, {}).get("path")
+            if path is None or needs_gui(os.path.join(test_folder, path)):
+                pinned.append((target, tests))
+            else:
+                jobs.append({
+                    "module": module_name,
+                    "name": name,
+                    "tests": tests,
+                    "failed": self.test_outcomes.failed(module_name) if failed_first else None,
+                })
+        return pinned, jobs
+
+    def worker_config(self):
+        """The config sent to each worker process (see testing.headless)."""
+        return {
+            "prefix_path": QgsApplication.prefixPath(),
+            "test_folder": gui.settings_manager.load_setting("test_folder"),
+            "record_folders": self.impact_folders(),
+            "capture": self.result_exporter is not None,
+        }
+
+    def merge_parallel_result(self, job, data, show_records=True):
+        """
+        Shows the tests of a job run by a worker process, or of a test
+        module which failed to import, in the Test Results panel, unless
+        they were shown as they ran, and records and aggregates its result.
+        Returns the tests it ran.
+        """
+        if show_records:
+            for record in data["records"]:
+                self.add_test_record(record)
+        self.run_timings.extend(data["timings"])
+        tests, result = result_from_json(data)
+        self.record_test_impact(
+            job["module"], job["name"] or job["tests"], result, set(data["accessed"]))
+        self.test_outcomes.record(tests, result)
+        self.prepare_result(result)
+        return tests
+
+    def add_test_record(self, record):
+        """Shows the record of a test in the Test Results panel, and exports
+        it if results are being exported for CI.
+        """
+        self.results_dock.add_record(record)
+        if self.result_exporter is not None:
+            self.result_exporter.write(record)
+
     def prepare_result(self, result):
         """Extend aggregated TestResult"""
         if result:
@@ -375,74 +980,74 @@ class ScriptAssistant:
             )
 
     def print_aggregated_result(self):
-        """Print a summary of all tests to the QGIS Python Console"""
-        if self.aggregated_test_result.testsRun:
-            print ""
-            if self.aggregated_test_result.errors:
-                print "ERRORS:\n"
-                for error in self.aggregated_test_result.errors:
-                    print error[0]
-                    print "-" * len(error[0].__str__())
-                    print "{0}\n".format(error[1])
-            if self.aggregated_test_result.failures:
-                print "FAILURES:\n"
-                for failure in self.aggregated_test_result.failures:
-                    print failure[0]
-                    print "-" * len(failure[0].__str__())
-                    print "{0}\n".format(failure[1])
-            if self.aggregated_test_result.unexpectedSuccesses:
-                print "UNEXPECTED SUCCESSES:\n"
-                for unexpected in self.aggregated_test_result.unexpectedSuccesses:
-                    print unexpected
-                print ""
-            if self.aggregated_test_result.skipped:
-                print "SKIPPED:\n"
-                for skip in self.aggregated_test_result.skipped:
-                    print "{0} - {1}".format(skip[0], skip[1])
-                print ""
-
-            successes = self.aggregated_test_result.testsRun - (
-                len(self.aggregated_test_result.errors) +
-                len(self.aggregated_test_result.failures) +
-                len(self.aggregated_test_result.expectedFailures) +
-                len(self.aggregated_test_result.unexpectedSuccesses) +
-                len(self.aggregated_test_result.skipped)
+        """Print a summary of all tests to the QGIS Python Console. The
+        tracebacks are shown in the Test Results panel, and the summary is
+        printed in one go, as the console redraws on every write.
+        """
+        result = self.aggregated_test_result
+        if result.testsRun:
+            lines = [""]
+            if result.errors:
+                lines.append("ERRORS:\n")
+                lines.extend(str(error[0]) for error in result.errors)
+                lines.append("")
+            if result.failures:
+                lines.append("FAILURES:\n")
+                lines.extend(str(failure[0]) for failure in result.failures)
+                lines.append("")
+            if result.errors or result.failures:
+                lines.append("See the Test Results panel for the tracebacks.\n")
+            if result.unexpectedSuccesses:
+                lines.append("UNEXPECTED SUCCESSES:\n")
+                lines.extend(str(unexpected) for unexpected in result.unexpectedSuccesses)
+                lines.append("")
+            if result.skipped:
+                lines.append("SKIPPED:\n")
+                lines.extend("{0} - {1}".format(skip[0], skip[1]) for skip in result.skipped)
+                lines.append("")
+
+            successes = result.testsRun - (
+                len(result.errors) +
+                len(result.failures) +
+                len(result.expectedFailures) +
+                len(result.unexpectedSuccesses) +
+                len(result.skipped)
             )
 
-            self.print_table_row(
-                "Successes", successes)
-            self.print_table_row(
-                "Errors", len(self.aggregated_test_result.errors))
-            self.print_table_row(
-                "Failures", len(self.aggregated_test_result.failures))
-            self.print_table_row(
-                "Expected Failures", len(self.aggregated_test_result.expectedFailures))
-            self.print_table_row(
-                "Unexpected Successes", len(self.aggregated_test_result.unexpectedSuccesses))
-            self.print_table_row(
-                "Skipped", len(self.aggregated_test_result.skipped))
-
-            print """+===========================+============+
+            for result_type, count in (
+                    ("Successes", successes),
+                    ("Errors", len(result.errors)),
+                    ("Failures", len(result.failures)),
+                    ("Expected Failures", len(result.expectedFailures)),
+                    ("Unexpected Successes", len(result.unexpectedSuccesses)),
+                    ("Skipped", len(result.skipped))):
+                if count:
+                    lines.append(self.table_row(result_type, count))
+
+            lines.append("""+===========================+============+
 | Total                     |       {total: >{fill}} |
 +---------------------------+------------+
             """.format(
-                total=self.aggregated_test_result.testsRun,
+                total=result.testsRun,
                 fill='4'
-            )
+            ))
+            lines.extend(timing_report(
+                self.run_timings, self.test_timings,
+                regression_ratio(gui.settings_manager.load_setting("regression_ratio"))))
+            print "\n".join(lines)
 
         else:
             print "\nNo tests were run.\n"
 
     @staticmethod
-    def print_table_row(result_type, count):
-        if count:
-            print """+---------------------------+------------+
+    def table_row(result_type, count):
+        return """+---------------------------+------------+
 | {result_type: <{text_fill}} | {count: >{count_fill}} |""".format(
-                result_type=result_type,
-                text_fill='25',
-                count=count,
-                count_fill='10'
-            )
+            result_type=result_type,
+            text_fill='25',
+            count=count,
+            count_fill='10'
+        )
 
     def open_python_console(self):
         """Ensures that the QGIS Python Console is visible to the user."""
@@ -459,20 +1064,141 @@ class ScriptAssistant:
             # so we only use it when we know that is is closed
             self.iface.actionShowPythonDialog().trigger()
 
-    def run_test(self, test_name):
-        """Import test scripts, run using run_tests method.
+    def run_test(self, test_name, tests=None, failed_first=False):
+        """Import test scripts, and run their tests one at a time, yielding
+        each test after it has run. The test name is a test module, or a
+        test case class or test method within one. Optionally only run the
+        named classes or methods within the module, or run the tests which
+        failed last time first.
+
+        The result is recorded and aggregated once the tests have finished,
+        or once the run is cancelled by closing the generator.
 
         Optionally reload and view depending on settings.
         """
-        module = import_module(test_name)
-        # have to reload otherwise a QGIS restart is required after changes
-        if gui.settings_manager.load_setting("no_reload") == "Y":
-            pass
+        # Test modules are imported by their dotted name within the test folder.
+        test_folder = gui.settings_manager.load_setting("test_folder")
+        if test_folder and test_folder not in sys.path:
+            sys.path.append(test_folder)
+        module_name, name = split_target(self.test_index, test_name) or (test_name, None)
+        folders = [test_folder] + self.impact_folders()
+        recorder = FileAccessRecorder(folders)
+        result = None
+        ran = []
+        finished = False
+        steps = None
+        try:
+            # Record the files the test opens to find what it depends on. The
+            # recorder replaces open(), so it is only active while the test
+            # module is imported and while each test runs, never while QGIS
+            # runs between tests.
+            try:
+                with recorder:
+                    with Stopwatch() as import_time:
+                        # have to reload otherwise a QGIS restart is required after changes
+                        if gui.settings_manager.load_setting("no_reload") == "Y":
+                            executed = module_name not in sys.modules
+                            module = import_module(module_name)
+                        else:
+                            module, executed = self.reload_test_module(module_name, folders)
+                    if tests:
+                        suite = unittest.TestLoader().loadTestsFromNames(tests, module)
+                    elif name:
+                        suite = unittest.TestLoader().loadTestsFromName(name, module)
+                    else:
+                        suite = unittest.TestLoader().loadTestsFromModule(module)
+                    if failed_first:
+                        suite = order_failed_first(suite, set(self.test_outcomes.failed(module_name)))
+            except Exception:
+                # A module which fails to import or load is an error of the
+                # module itself, as for a worker process which exits, and
+                # the run goes on to the next module.
+                job = {"module": module_name, "name": name, "tests": tests}
+                data = crashed_result(job, traceback.format_exc())
+                for test in self.merge_parallel_result(job, data):
+                    yield test
+                self.test_outcomes.save()
+                return
+            # What the tests print is only captured when it is exported.
+            result = CollectingResult(
+                self.add_test_record, capture=self.result_exporter is not None)
+            if executed:
+                result.add_timing(
+                    import_timing_id(module_name), import_time.wall, import_time.cpu)
+            steps = suite_steps(suite, result)
+            while True:
+                with recorder:
+                    test = next(steps, None)
+                if test is None:
+                    break
+                ran.append(test)
+                yield test
+            finished = True
+        finally:
+            if steps is not None:
+                # Tear down the fixtures of a cancelled run.
+                with recorder:
+                    steps.close()
+            if result is not None:
+                self.module_reloader.update(folders)
+                if finished:
+                    accessed = recorder.paths
+                    if not executed:
+                        # The files opened when the module was last imported are still used.
+                        accessed = accessed | self.test_impact_map.paths(module_name)
+                    self.record_test_impact(module_name, name or tests, result, accessed)
+                self.test_outcomes.record(ran, result)
+                self.test_outcomes.save()
+                self.run_timings.extend(result.timings)
+                self.prepare_result(result)
+
+    def reload_test_module(self, module_name, folders):
+        """
+        Imports a test module after reloading the modules from the test,
+        script and test data folders which have changed since they were
+        loaded, and the modules which use them. The test module itself is
+        also reloaded if it is affected by changes to other files it
+        depends on, such as a script or test data, or if it has not passed.
+
+        Returns the module, and whether its code was run by importing or
+        reloading it.
+        """
+        force = []
+        if self.test_impact_map.is_affected(module_name):
+            force.append(module_name)
+        reloaded = self.module_reloader.reload(folders, force)
+        executed = module_name in reloaded or module_name not in sys.modules
+        return import_module(module_name), executed
+
+    @staticmethod
+    def impact_folders():
+        """The configured script and test data folders, in which the files
+        a test depends on are looked for.
+        """
+        folders = gui.settings_manager.split_folders(
+            gui.settings_manager.load_setting("script_folder"))
+        folders.append(gui.settings_manager.load_setting("test_data_folder"))
+        return [folder for folder in folders if folder and os.path.isdir(folder)]
+
+    def record_test_impact(self, module_name, name, result, accessed):
+        """
+        Records the dependencies of a test module when the whole module has
+        passed. A module with a failure is forgotten, so it is affected by
+        changes until it passes again.
+        """
+        if result.wasSuccessful() and result.testsRun:
+            if name is not None:
+                return
+            with self.discovery_lock:
+                if self.dependency_finder is None:
+                    self.dependency_finder = DependencyFinder(
+                        gui.settings_manager.load_setting("test_folder"), self.impact_folders(),
+                        self.test_directory_index, self.test_module_cache)
+                dependencies = self.dependency_finder.dependencies(module_name)
+            self.test_impact_map.record(module_name, dependencies | accessed)
         else:
-            reload(module)
-        suite = unittest.TestLoader().loadTestsFromModule(module)
-        result = unittest.TextTestRunner(verbosity=2, stream=sys.stdout).run(suite)
-        return result
+            self.test_impact_map.forget(module_name)
+        self.test_impact_map.save()
 
     @pyqtSlot()
     def add_test_data_to_map(self):
@@ -482,14 +1208,19 @@ class ScriptAssistant:
         test_data_folder = gui.settings_manager.load_setting("test_data_folder")
         test_folder = gui.settings_manager.load_setting("test_folder")
         current_test = gui.settings_manager.load_setting("current_test")
-        if current_test == "$ALL":
+        if current_test in SUITE_TARGETS:
             self.iface.messageBar().pushMessage(
                 self.tr("Select a Single Test"),
                 self.tr("Cannot add test data for all tests."),
                 level=QgsMessageBar.WARNING,
             )
             return
-        test_file = open(os.path.join(test_folder, "test_{}.py".format(current_test)), "r")
+        module_name = (split_target(self.test_index, current_test) or (current_test, None))[0]
+        if module_name in self.test_index:
+            test_path = self.test_index[module_name]["path"]
+        else:
+            test_path = "{}.py".format(module_name.replace(".", os.sep))
+        test_file = open(os.path.join(test_folder, test_path), "r")
         test_text = test_file.read()
         test_file.close()
         matches = re.findall(r"\/(.*).shp", test_text)
@@ -539,8 +1270,9 @@ class ScriptAssistant:
         """Save current settings to Project file and config."""
         script_folder = self.dlg_settings.lne_script.text()
         gui.settings_manager.save_setting("script_folder", script_folder)
-        if os.path.exists(script_folder):
-            self.reload_scripts_action.setText("Reload: {}".format(script_folder))
+        script_folders = gui.settings_manager.split_folders(script_folder)
+        if script_folders and all(os.path.exists(folder) for folder in script_folders):
+            self.reload_scripts_action.setText(self.reload_action_text(script_folders))
             self.reload_scripts_action.setEnabled(True)
         else:
             self.reload_scripts_action.setText("Invalid Script Folder Path")
@@ -554,10 +1286,13 @@ class ScriptAssistant:
 
         test_folder = self.dlg_settings.lne_test.text()
         gui.settings_manager.save_setting("test_folder", test_folder)
+        self.update_test_watcher()
         if os.path.exists(test_folder):
             gui.settings_manager.save_setting("current_test", "$ALL")
             self.test_script_action.setEnabled(True)
             self.test_all_action.setEnabled(True)
+            self.test_affected_action.setEnabled(True)
+            self.test_failed_first_action.setEnabled(True)
             if test_folder not in sys.path:
                 sys.path.append(test_folder)
             self.update_test_script_menu()
@@ -565,6 +1300,9 @@ class ScriptAssistant:
             self.test_script_action.setText("Invalid Test Script Path")
             self.test_script_action.setEnabled(False)
             self.test_all_action.setEnabled(False)
+            self.test_affected_action.setEnabled(False)
+            self.test_failures_action.setEnabled(False)
+            self.test_failed_first_action.setEnabled(False)
             self.add_test_data_action.setEnabled(False)
             if test_folder != "":
                 self.iface.messageBar().pushMessage(
@@ -588,10 +1326,9 @@ class ScriptAssistant:
                     level=QgsMessageBar.CRITICAL,
                 )
 
-        if self.dlg_settings.chk_reload.isChecked():
-            gui.settings_manager.save_setting("no_reload", "Y")
-        else:
-            gui.settings_manager.save_setting("no_reload", "N")
+        for setting_name, value in self.dlg_settings.option_values().items():
+            gui.settings_manager.save_setting(setting_name, value)
+        self.update_script_watcher()
 
         if self.dlg_settings.cmb_config.lineEdit().text():
             gui.settings_manager.save_setting(
@@ -601,6 +1338,19 @@ class ScriptAssistant:
 
     def unload(self):
         """Removes the plugin menu item and icon from QGIS GUI."""
+        self.script_watcher.stop()
+        self.script_watcher.wait()
+        self.test_watcher.stop()
+        self.test_watcher.wait()
+        if self.sync_worker is not None:
+            self.sync_worker.wait()
+        if self.discovery_worker is not None:
+            self.discovery_worker.wait()
+        if self.test_run is not None:
+            self.test_run.stop()
+        if self.results_dock is not None:
+            self.iface.removeDockWidget(self.results_dock)
+            self.results_dock.deleteLater()
         for action in self.actions:
             self.iface.removePluginMenu(self.tr(u"&Script Assistant"), action)
             self.iface.removeToolBarIcon(action)
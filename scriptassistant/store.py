@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""
+Helpers for persisting plugin state (manifests, indexes and caches) to disk.
+"""
+
+import os
+import json
+import errno
+import tempfile
+
+
+def replace_file(source, destination):
+    """Move source over destination, replacing destination if it exists.
+
+    os.rename is atomic on POSIX but refuses to overwrite on Windows, so the
+    destination is removed first on that platform.
+    """
+    try:
+        os.rename(source, destination)
+    except OSError as error:
+        if error.errno != errno.EEXIST and os.name != "nt":
+            raise
+        os.remove(destination)
+        os.rename(source, destination)
+
+
+class JsonStore(object):
+    """A dictionary persisted as a JSON file.
+
+    If path is None the store is kept in memory only. A missing or corrupt
+    file results in an empty store rather than an error, as everything kept
+    in a store can be rebuilt from the file system.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.data = {}
+        self.load()
+
+    def load(self):
+        """Load the store from disk."""
+        self.data = {}
+        if self.path and os.path.isfile(self.path):
+            try:
+                with open(self.path, "r") as store_file:
+                    data = json.load(store_file)
+            except (IOError, ValueError):
+                return
+            if isinstance(data, dict):
+                self.data = data
+
+    def save(self):
+        """Write the store to disk atomically."""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        handle, temp_path = tempfile.mkstemp(
+            prefix=".", suffix=".tmp", dir=directory)
+        with os.fdopen(handle, "w") as store_file:
+            json.dump(self.data, store_file)
+        replace_file(temp_path, self.path)
+
+    def clear(self):
+        """Remove all entries."""
+        self.data = {}
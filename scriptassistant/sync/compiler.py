@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+"""
+Syntax checking of scripts before they are deployed, with the results cached
+by content hash so that a script is only ever compiled once.
+"""
+
+from ..store import JsonStore
+
+
+def compile_script(path):
+    """Compile a script and return None, or (line number, message) if it has
+    a syntax error.
+    """
+    with open(path, "rb") as script:
+        source = script.read()
+    try:
+        compile(source, path, "exec")
+    except SyntaxError as error:
+        return error.lineno or 0, error.msg
+    except (TypeError, ValueError) as error:
+        # e.g. null bytes in the source
+        return 0, str(error)
+    return None
+
+
+class CompileCache(JsonStore):
+    """Compile results keyed by the md5 of the script's contents. Each entry
+    is None, or [line number, message] for a syntax error.
+    """
+
+    def check(self, path, digest):
+        """Return the compile result for a script with the given digest,
+        compiling it only if that content has not been seen before.
+        """
+        if digest not in self.data:
+            error = compile_script(path)
+            self.data[digest] = list(error) if error else None
+        return self.data[digest]
+
+    def prune(self, digests):
+        """Forget results for content other than digests."""
+        digests = set(digests)
+        for digest in list(self.data):
+            if digest not in digests:
+                del self.data[digest]
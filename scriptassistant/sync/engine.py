@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+"""
+Incremental synchronisation of a script folder into the QGIS processing
+scripts folder.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+from manifest import hash_file
+from scanner import DirectoryIndex
+from ..store import replace_file
+
+# Files are classified and copied on a small pool of threads, as most of
+# the time goes on waiting for stat / read calls to network file systems.
+SYNC_WORKERS = 8
+
+# Deployment modes. Linked scripts fall back to copies where the file
+# system (or Python on Windows) does not support links.
+COPY, LINK = "copy", "link"
+
+UNCHANGED, TOUCHED, CHANGED, EDITED, REJECTED, INVALID = range(6)
+
+
+class SyncResult(object):
+    """The destination names of the scripts touched by a sync, the paths of
+    all candidate scripts found in the source folders, (kept path, ignored
+    path) pairs for scripts whose names collided within a folder or were
+    overridden by a later folder, and (path, line number, message) for
+    scripts rejected because of syntax errors.
+    """
+
+    def __init__(self):
+        self.sources = []
+        self.added = []
+        self.updated = []
+        self.removed = []
+        self.unchanged = []
+        self.collisions = []
+        self.overridden = []
+        self.copied_instead_of_linked = []
+        self.invalid = []
+
+    @property
+    def changed(self):
+        """True if the processing scripts folder was modified."""
+        return bool(self.added or self.updated or self.removed)
+
+
+def parallel_map(function, items, workers=SYNC_WORKERS):
+    """Return [function(item) for item in items], calling function on up
+    to workers threads. The first exception raised is re-raised here.
+    """
+    results = [None] * len(items)
+    errors = []
+    indexes = iter(range(len(items)))
+    lock = threading.Lock()
+
+    def work():
+        while not errors:
+            with lock:
+                index = next(indexes, None)
+            if index is None:
+                return
+            try:
+                results[index] = function(items[index])
+            except Exception:
+                errors.append(sys.exc_info())
+
+    threads = [threading.Thread(target=work) for _ in range(min(workers, len(items)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0][0], errors[0][1], errors[0][2]
+    return results
+
+
+def is_candidate(filename):
+    """Return True if a file name could be a user processing script."""
+    return filename.endswith(".py") and not filename.startswith("_")
+
+
+def atomic_copy(source_path, destination_path):
+    """Copy source_path to destination_path via a temporary file in the
+    destination folder, so the destination is never seen half written.
+
+    The temporary file does not end in .py, so processing will not try to
+    load it.
+    """
+    destination_dir, filename = os.path.split(destination_path)
+    handle, temp_path = tempfile.mkstemp(
+        prefix=".{}.".format(filename), suffix=".tmp", dir=destination_dir)
+    try:
+        with os.fdopen(handle, "wb") as destination:
+            with open(source_path, "rb") as source:
+                shutil.copyfileobj(source, destination)
+        shutil.copymode(source_path, temp_path)
+        replace_file(temp_path, destination_path)
+    except (IOError, OSError):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def temporary_path(destination_path):
+    """Return an unused path alongside destination_path which processing
+    will not try to load.
+    """
+    destination_dir, filename = os.path.split(destination_path)
+    handle, temp_path = tempfile.mkstemp(
+        prefix=".{}.".format(filename), suffix=".tmp", dir=destination_dir)
+    os.close(handle)
+    os.remove(temp_path)
+    return temp_path
+
+
+def atomic_link(source_path, destination_path):
+    """Link destination_path to source_path, replacing any existing file.
+
+    A symbolic link is tried first, then a hard link. Returns False if
+    neither is supported.
+    """
+    link_functions = [
+        getattr(os, name) for name in ("symlink", "link") if hasattr(os, name)
+    ]
+    for link_function in link_functions:
+        temp_path = temporary_path(destination_path)
+        try:
+            if link_function is os.symlink:
+                link_function(os.path.abspath(source_path), temp_path)
+            else:
+                link_function(source_path, temp_path)
+        except OSError:
+            continue
+        replace_file(temp_path, destination_path)
+        return True
+    return False
+
+
+def is_linked(source_path, destination_path):
+    """Return True if destination_path is a link to source_path."""
+    if os.path.islink(destination_path):
+        return os.path.realpath(destination_path) == os.path.realpath(source_path)
+    if hasattr(os.path, "samefile") and os.path.exists(destination_path):
+        return os.path.samefile(source_path, destination_path)
+    return False
+
+
+def find_scripts(source_dir, directory_index):
+    """Return (file name, path) for every candidate script in source_dir
+    and its sub-directories, shallowest first and then in path order.
+    """
+    scripts = []
+    for directory, filenames in directory_index.walk(source_dir):
+        for filename in filenames:
+            if is_candidate(filename):
+                scripts.append((filename, os.path.join(directory, filename)))
+    return scripts
+
+
+def classify_script(filename, source_path, destination_path, manifest, is_script,
+                    mode=COPY, compile_cache=None):
+    """Work out whether a single script needs to be deployed.
+
+    Runs on a pool thread, so only reads from the manifest. Returns a tuple
+    of the outcome, source stat, content hash and syntax error. A linked
+    script which has been edited is EDITED, as it needs no deployment but
+    its algorithm still needs reloading. New and changed scripts with a
+    syntax error are INVALID.
+    """
+    source_stat = os.stat(source_path)
+    if manifest.is_current(filename, source_path, source_stat, destination_path, mode):
+        return UNCHANGED, source_stat, None, None
+
+    if is_script is not None and not is_script(source_path):
+        return REJECTED, source_stat, None, None
+
+    digest = hash_file(source_path)
+    entry = manifest.get(filename)
+    if entry is None or entry["source"] != source_path or \
+            entry.get("mode", COPY) != mode:
+        status = CHANGED
+    elif mode == LINK and is_linked(source_path, destination_path):
+        status = TOUCHED if entry["hash"] == digest else EDITED
+    elif entry["hash"] == digest and manifest.destination_intact(filename, destination_path):
+        status = TOUCHED
+    else:
+        status = CHANGED
+
+    if status in (CHANGED, EDITED) and compile_cache is not None:
+        error = compile_cache.check(source_path, digest)
+        if error:
+            return INVALID, source_stat, digest, error
+    return status, source_stat, digest, None
+
+
+def deploy_script(source_path, destination_path, mode=COPY):
+    """Copy or link a script. Returns the stat of the deployed file and
+    whether it was copied because linking is not supported.
+    """
+    if mode == LINK and atomic_link(source_path, destination_path):
+        return os.stat(destination_path), False
+    atomic_copy(source_path, destination_path)
+    return os.stat(destination_path), mode == LINK
+
+
+def sync_scripts(source_dirs, destination_dir, manifest, is_script=None,
+                 directory_index=None, workers=SYNC_WORKERS, mode=COPY,
+                 compile_cache=None):
+    """Copy (or link) new and changed scripts from the ordered list of
+    source_dirs and their sub-directories to destination_dir, and remove
+    deployed scripts that no longer exist in any of source_dirs.
+
+    Links are only created or removed when the set of scripts changes, as
+    edits to a linked script are seen through the link.
+
+    The processing scripts folder is flat, so scripts sharing a file name
+    are merged before anything is copied. A script in a later source folder
+    overrides one in an earlier folder. Within a folder the shallowest
+    script is used, then the first in path order, and the others are
+    reported as collisions.
+
+    If a compile cache is given, new and changed scripts are compiled and
+    those with syntax errors are not deployed. The previously deployed
+    version of such a script is left in place.
+
+    Only scripts recorded in the manifest are ever removed, so scripts added
+    to the processing folder by other means are left alone. The manifest,
+    directory index and compile cache are updated in place but not saved.
+    """
+    result = SyncResult()
+    if not os.path.isdir(destination_dir):
+        os.makedirs(destination_dir)
+    if directory_index is None:
+        directory_index = DirectoryIndex()
+
+    # Later folders take precedence, so are listed first.
+    tasks = []
+    folders = {}
+    for source_dir in reversed(source_dirs):
+        for filename, source_path in find_scripts(source_dir, directory_index):
+            result.sources.append(source_path)
+            folders[source_path] = source_dir
+            tasks.append((filename, source_path, os.path.join(destination_dir, filename)))
+
+    outcomes = parallel_map(
+        lambda task: classify_script(
+            task[0], task[1], task[2], manifest, is_script, mode, compile_cache),
+        tasks, workers
+    )
+
+    # Resolve collisions between valid scripts, in precedence order.
+    kept = {}
+    to_deploy = []
+    for task, outcome in zip(tasks, outcomes):
+        filename, source_path, destination_path = task
+        status, source_stat, digest, error = outcome
+        if status == REJECTED:
+            continue
+        if filename in kept:
+            if folders[kept[filename]] == folders[source_path]:
+                result.collisions.append((kept[filename], source_path))
+            else:
+                result.overridden.append((kept[filename], source_path))
+            continue
+        kept[filename] = source_path
+        if status == INVALID:
+            result.invalid.append((source_path, error[0], error[1]))
+        elif status == UNCHANGED:
+            result.unchanged.append(filename)
+        elif status in (TOUCHED, EDITED):
+            # Already deployed. For a link the deployed file's stat is that
+            # of the source, so it is recorded afresh.
+            manifest.record(
+                filename, source_path, source_stat, digest,
+                os.stat(destination_path), mode
+            )
+            if status == TOUCHED:
+                result.unchanged.append(filename)
+            else:
+                result.updated.append(filename)
+        else:
+            to_deploy.append((filename, source_path, destination_path, source_stat, digest))
+
+    deployed = parallel_map(
+        lambda deploy: deploy_script(deploy[1], deploy[2], mode), to_deploy, workers
+    )
+
+    # Apply the deployments to the manifest on this thread only.
+    for deploy, (destination_stat, copied_instead) in zip(to_deploy, deployed):
+        filename, source_path, _, source_stat, digest = deploy
+        if manifest.get(filename) is None:
+            result.added.append(filename)
+        else:
+            result.updated.append(filename)
+        if copied_instead:
+            result.copied_instead_of_linked.append(filename)
+        manifest.record(
+            filename, source_path, source_stat, digest, destination_stat, mode)
+
+    for filename in sorted(set(manifest.names()) - set(kept)):
+        destination_path = os.path.join(destination_dir, filename)
+        # lexists, as a link to a deleted script no longer "exists".
+        if os.path.lexists(destination_path):
+            os.remove(destination_path)
+        manifest.remove(filename)
+        result.removed.append(filename)
+
+    if compile_cache is not None:
+        compile_cache.prune(
+            [manifest.get(filename)["hash"] for filename in manifest.names()] +
+            [invalid_digest for _, _, invalid_digest, invalid_error in outcomes if invalid_error]
+        )
+
+    result.added.sort()
+    result.updated.sort()
+    result.unchanged.sort()
+    return result
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""
+The script manifest records every script that has been copied into the QGIS
+processing scripts folder, so that later reloads only copy what has changed.
+"""
+
+import os
+import hashlib
+
+from ..store import JsonStore
+
+HASH_CHUNK_SIZE = 65536
+
+
+def hash_file(path):
+    """Return the md5 hex digest of a file's contents."""
+    digest = hashlib.md5()
+    with open(path, "rb") as source:
+        chunk = source.read(HASH_CHUNK_SIZE)
+        while chunk:
+            digest.update(chunk)
+            chunk = source.read(HASH_CHUNK_SIZE)
+    return digest.hexdigest()
+
+
+class ScriptManifest(JsonStore):
+    """Persisted record of deployed scripts, keyed by destination file name.
+
+    Each entry holds the source path, size, mtime and content hash of the
+    script as it was deployed, the deployment mode ("copy" or "link"), and
+    the size and mtime of the deployed file itself so that copies which have
+    been edited or deleted behind our back are detected.
+    """
+
+    def get(self, name):
+        """Return the entry for a deployed script, or None."""
+        return self.data.get(name)
+
+    def names(self):
+        """Return the destination names of all deployed scripts."""
+        return list(self.data.keys())
+
+    def record(self, name, source_path, source_stat, digest, destination_stat,
+               mode="copy"):
+        """Record that source_path has been deployed, given the stat of the
+        deployed file.
+        """
+        self.data[name] = {
+            "source": source_path,
+            "mode": mode,
+            "size": source_stat.st_size,
+            "mtime": source_stat.st_mtime,
+            "hash": digest,
+            "destination_size": destination_stat.st_size,
+            "destination_mtime": destination_stat.st_mtime,
+        }
+
+    def remove(self, name):
+        """Forget a deployed script."""
+        self.data.pop(name, None)
+
+    def is_current(self, name, source_path, source_stat, destination_path,
+                   mode="copy"):
+        """Return True if the deployed file is known to match the source
+        without reading either file.
+        """
+        entry = self.get(name)
+        return (
+            entry is not None and
+            entry["source"] == source_path and
+            entry.get("mode", "copy") == mode and
+            entry["size"] == source_stat.st_size and
+            entry["mtime"] == source_stat.st_mtime and
+            self.destination_intact(name, destination_path)
+        )
+
+    def destination_intact(self, name, destination_path):
+        """Return True if the deployed copy has not been touched since it
+        was recorded.
+        """
+        entry = self.get(name)
+        try:
+            destination_stat = os.stat(destination_path)
+        except OSError:
+            return False
+        return (
+            entry is not None and
+            entry["destination_size"] == destination_stat.st_size and
+            entry["destination_mtime"] == destination_stat.st_mtime
+        )
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""
+Refreshing the processing script provider after a sync.
+"""
+
+import os
+
+from qgis.utils import plugins
+
+
+def refresh_script_algorithms(script_dir, added, updated, removed):
+    """Add, replace or remove only the algorithms for the given script file
+    names in script_dir, then refresh the toolbox.
+
+    QGIS 2.18 keeps each provider's algorithms in a plain list, so they can
+    be swapped individually. Older versions (and any unexpected failure)
+    fall back to refreshing the whole provider, which re-parses every
+    script. Returns True if the targeted refresh was used.
+    """
+    try:
+        from processing.core.alglist import algList
+        from processing.core.ProcessingLog import ProcessingLog
+        from processing.script.ScriptAlgorithm import ScriptAlgorithm
+    except ImportError:
+        # QGIS 2.14 caches algorithms by name in Processing.algs.
+        plugins["processing"].toolbox.updateProvider("script")
+        return False
+
+    provider = algList.getProviderFromName("script")
+    if provider is None or not hasattr(provider, "algs"):
+        plugins["processing"].toolbox.updateProvider("script")
+        return False
+
+    stale = set(
+        os.path.normcase(os.path.join(script_dir, filename))
+        for filename in list(added) + list(updated) + list(removed)
+    )
+    algs = [
+        alg for alg in provider.algs
+        if os.path.normcase(getattr(alg, "descriptionFile", "") or "") not in stale
+    ]
+    for filename in list(added) + list(updated):
+        path = os.path.join(script_dir, filename)
+        # As ScriptUtils.loadFromFolder, skip and log scripts which fail.
+        try:
+            alg = ScriptAlgorithm(path)
+        except Exception as error:
+            ProcessingLog.addToLog(
+                ProcessingLog.LOG_ERROR,
+                "Could not load script: {}\n{}".format(path, error)
+            )
+            continue
+        if alg.name.strip() != "":
+            alg.provider = provider
+            algs.append(alg)
+    provider.algs = algs
+    algList.providerUpdated.emit(provider.getName())
+    return True
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+"""
+Recursive folder scanning backed by a persisted index of directory listings,
+so that directories which have not changed are not listed again.
+"""
+
+import os
+import time
+from collections import deque
+
+from ..store import JsonStore
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+# Directories modified this recently may be modified again within the mtime
+# resolution of the file system, so their listings are not trusted.
+MTIME_GRACE_PERIOD = 2
+
+
+def list_directory(path):
+    """Return the sorted file and sub-directory names in a directory.
+
+    Hidden directories, __pycache__ and symlinked directories (which could
+    form a cycle) are not included.
+    """
+    files = []
+    dirs = []
+    if scandir is not None:
+        for entry in scandir(path):
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.name)
+            elif entry.is_file():
+                files.append(entry.name)
+    else:
+        for name in os.listdir(path):
+            entry_path = os.path.join(path, name)
+            if os.path.isdir(entry_path) and not os.path.islink(entry_path):
+                dirs.append(name)
+            elif os.path.isfile(entry_path):
+                files.append(name)
+    dirs = [name for name in dirs if not name.startswith(".") and name != "__pycache__"]
+    return sorted(files), sorted(dirs)
+
+
+class DirectoryIndex(JsonStore):
+    """Directory listings keyed by path, each valid for the mtime the
+    directory had when it was listed.
+
+    A directory's mtime changes when entries are added, removed or renamed
+    in it, but not when a file in it is edited or a sub-directory changes,
+    so every directory is still stat'ed but only changed ones are listed.
+    """
+
+    def listing(self, path):
+        """Return the file and sub-directory names in a directory, listing
+        it only if it has changed since it was last listed.
+        """
+        mtime = os.stat(path).st_mtime
+        entry = self.data.get(path)
+        if entry is not None and entry["mtime"] == mtime:
+            return entry["files"], entry["dirs"]
+        files, dirs = list_directory(path)
+        if time.time() - mtime > MTIME_GRACE_PERIOD:
+            self.data[path] = {"mtime": mtime, "files": files, "dirs": dirs}
+        else:
+            self.data.pop(path, None)
+        return files, dirs
+
+    def walk(self, root):
+        """Yield (directory path, file names) for root and every directory
+        below it, top down, forgetting any indexed directories below root
+        which no longer exist.
+        """
+        visited = set()
+        pending = deque([root])
+        while pending:
+            path = pending.popleft()
+            try:
+                files, dirs = self.listing(path)
+            except OSError:
+                continue
+            visited.add(path)
+            yield path, files
+            pending.extend(os.path.join(path, name) for name in dirs)
+        self.prune(root, visited)
+
+    def prune(self, root, visited):
+        """Forget indexed directories in root and below it which are not in
+        visited.
+        """
+        prefix = os.path.join(root, "")
+        for path in list(self.data):
+            if (path == root or path.startswith(prefix)) and path not in visited:
+                del self.data[path]
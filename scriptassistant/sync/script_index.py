@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+"""
+An index of processing script metadata, parsed from the ##name=type header
+block of each script and cached against the script's size and mtime.
+"""
+
+import os
+
+from ..store import JsonStore
+
+
+def is_within(path, folder):
+    """Return True if path is inside folder or one of its sub-directories."""
+    return path.startswith(os.path.join(folder, ""))
+
+
+def parse_header(lines):
+    """Parse the processing header block from an iterable of lines.
+
+    Blank lines and ordinary comments (e.g. the encoding declaration) before
+    the header are skipped. The header is the run of ##name=type lines that
+    follows, and parsing stops at the first line after it, so the rest of
+    the script is never read.
+    """
+    metadata = {
+        "valid": False,
+        "name": None,
+        "group": None,
+        "inputs": [],
+        "outputs": [],
+    }
+    header = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith("##"):
+            header.append(line)
+        elif header or (line and not line.startswith("#")):
+            break
+
+    # A script must start with ## formatting that looks like a processing
+    # script, rather than a comment banner.
+    if not header or header[0].startswith("## ") or header[0].startswith("###"):
+        return metadata
+    metadata["valid"] = True
+
+    for line in header:
+        if "=" not in line:
+            continue
+        description, declaration = line[2:].split("=", 1)
+        declaration = declaration.strip()
+        if declaration.lower() == "group":
+            metadata["group"] = description
+        elif declaration.lower() == "name":
+            metadata["name"] = description
+        elif declaration.lower().startswith("output"):
+            metadata["outputs"].append([description, declaration[6:].strip()])
+        else:
+            metadata["inputs"].append([description, declaration])
+    return metadata
+
+
+class ScriptMetadataIndex(JsonStore):
+    """Script metadata keyed by path, each entry valid for the size and
+    mtime the script had when it was parsed.
+    """
+
+    def get(self, path):
+        """Return the metadata for a script, parsing its header if the
+        script is new or has changed since it was last indexed.
+        """
+        stat = os.stat(path)
+        entry = self.data.get(path)
+        if entry is None or entry["size"] != stat.st_size or \
+                entry["mtime"] != stat.st_mtime:
+            with open(path) as lines:
+                entry = parse_header(lines)
+            entry["size"] = stat.st_size
+            entry["mtime"] = stat.st_mtime
+            self.data[path] = entry
+        return entry
+
+    def cached(self, path):
+        """Return the last known metadata for a script without touching
+        the disk, or None if the script has never been indexed.
+        """
+        return self.data.get(path)
+
+    def is_processing_script(self, path):
+        """Return True if the script's header is a valid processing header."""
+        return self.get(path)["valid"]
+
+    def scripts_in(self, folder):
+        """Return the paths of the valid scripts indexed in folder and its
+        sub-directories, without touching the disk.
+        """
+        return sorted(
+            path for path, entry in self.data.items()
+            if is_within(path, folder) and entry["valid"]
+        )
+
+    def prune(self, folder, paths):
+        """Forget scripts indexed in folder and its sub-directories which
+        are not in paths.
+        """
+        paths = set(paths)
+        for path in list(self.data):
+            if is_within(path, folder) and path not in paths:
+                del self.data[path]
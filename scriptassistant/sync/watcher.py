@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+import os
+from collections import deque
+from functools import partial
+
+from PyQt4.QtCore import pyqtSignal, pyqtSlot, QObject, QTimer, QFileSystemWatcher
+
+from engine import is_candidate
+from scanner import DirectoryIndex
+from worker import SyncWorker
+
+# Milliseconds without file system events before a change is reported.
+DEBOUNCE_INTERVAL = 1000
+# Events held between reports. Any more and a change is always reported.
+MAX_QUEUED_EVENTS = 1000
+
+
+class ScriptFolderWatcher(QObject):
+    """Watches script folders and their sub-directories and emits
+    scriptsChanged once a burst of file system events has settled.
+
+    Each directory is watched for scripts being added, removed or renamed
+    and each candidate script is watched for edits. Events only restart the
+    debounce timer, so a burst of any size results in a single report.
+
+    The folders are scanned for directories and scripts on a worker thread,
+    as walking a large folder (or one on a network share) would block QGIS.
+    """
+
+    scriptsChanged = pyqtSignal()
+
+    def __init__(self, parent=None, interval=DEBOUNCE_INTERVAL,
+                 max_events=MAX_QUEUED_EVENTS):
+        """Constructor."""
+        super(ScriptFolderWatcher, self).__init__(parent)
+        self.folders = []
+        self.directories = set()
+        self.scripts = set()
+        self.directory_index = DirectoryIndex()
+        self.events = deque(maxlen=max_events)
+        self.overflowed = False
+        # Scans started before the folders last changed are ignored.
+        self.generation = 0
+        self.scan_worker = None
+        self.scan_report = False
+        self.scan_pending = False
+        self.pending_report = False
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.queue_event)
+        self.watcher.fileChanged.connect(self.queue_event)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.flush_events)
+
+    def watch(self, folders):
+        """Start watching a list of folders, replacing any already watched."""
+        self.stop()
+        self.folders = list(folders)
+        self.start_scan()
+
+    def stop(self):
+        """Stop watching and discard any queued events."""
+        self.timer.stop()
+        self.events.clear()
+        self.overflowed = False
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
+        self.folders = []
+        self.directories = set()
+        self.scripts = set()
+        # A running scan may still be using the old index.
+        self.directory_index = DirectoryIndex()
+        self.generation += 1
+        self.scan_pending = False
+        self.pending_report = False
+
+    def wait(self):
+        """Wait for a running scan to finish, e.g. before unloading."""
+        if self.scan_worker is not None:
+            self.scan_worker.wait()
+
+    def start_scan(self, report=False):
+        """Scan the watched folders on a worker thread, and watch what is
+        found. If report is True, scriptsChanged is emitted if the scripts
+        found have changed. A scan requested while another is running is
+        started once it has finished.
+        """
+        if self.scan_worker is not None and self.scan_worker.isRunning():
+            self.scan_pending = True
+            self.pending_report = self.pending_report or report
+            return
+        self.scan_report = report
+        self.scan_worker = SyncWorker(partial(
+            self.scan, self.generation, list(self.folders), self.directory_index))
+        self.scan_worker.syncFinished.connect(self.finish_scan)
+        self.scan_worker.start()
+
+    @staticmethod
+    def scan(generation, folders, directory_index):
+        """Return the generation, and the paths of the directories and
+        candidate scripts in the folders. Runs on the scan worker thread.
+        """
+        directories = set()
+        scripts = set()
+        for folder in folders:
+            for directory, filenames in directory_index.walk(folder):
+                directories.add(directory)
+                scripts.update(
+                    os.path.join(directory, filename) for filename in filenames
+                    if is_candidate(filename)
+                )
+        return generation, directories, scripts
+
+    @pyqtSlot(object, object)
+    def finish_scan(self, result, error):
+        """Watch the directories and scripts found by a scan. Runs on the
+        GUI thread.
+        """
+        self.scan_worker.wait()
+        self.scan_worker = None
+        if error is None and result[0] == self.generation:
+            _, self.directories, scripts = result
+            changed = self.scan_report and scripts != self.scripts
+            self.scripts = scripts
+            self.watch_paths()
+            if changed:
+                self.scriptsChanged.emit()
+        if self.scan_pending:
+            report = self.pending_report
+            self.scan_pending = False
+            self.pending_report = False
+            self.start_scan(report)
+
+    def watch_paths(self):
+        """Watch any directories and scripts not already watched. Editors
+        which save by replacing a file cause it to drop out of the watch
+        list.
+        """
+        missing = (self.directories - set(self.watcher.directories())) | \
+            (self.scripts - set(self.watcher.files()))
+        if missing:
+            self.watcher.addPaths(list(missing))
+
+    @pyqtSlot(str)
+    def queue_event(self, path):
+        if len(self.events) == self.events.maxlen:
+            self.overflowed = True
+        self.events.append(path)
+        self.timer.start()
+
+    @pyqtSlot()
+    def flush_events(self):
+        """Report a change if any queued event affects a script.
+
+        Events on directories are only relevant if the set of scripts has
+        changed, so editor swap files and the like are ignored. That is
+        checked by a scan in the background, which reports any change.
+        """
+        if not self.folders:
+            return
+        paths = set(self.events)
+        overflowed = self.overflowed
+        changed = overflowed or bool(paths & self.scripts)
+        self.events.clear()
+        self.overflowed = False
+
+        if overflowed or paths & self.directories:
+            # A script may have been added, removed or renamed.
+            self.start_scan(report=not changed)
+        self.watch_paths()
+
+        if changed:
+            self.scriptsChanged.emit()
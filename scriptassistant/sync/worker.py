@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+from PyQt4.QtCore import pyqtSignal, QThread
+
+
+class SyncWorker(QThread):
+    """Runs a script sync off the GUI thread.
+
+    syncFinished is emitted with the return value of the sync callable and
+    None, or None and the error raised. Slots connected from the GUI thread
+    are called via the GUI event loop, so they may safely touch the toolbox.
+    """
+
+    syncFinished = pyqtSignal(object, object)
+
+    def __init__(self, sync, parent=None):
+        """Constructor."""
+        super(SyncWorker, self).__init__(parent)
+        self.sync = sync
+
+    def run(self):
+        try:
+            result = self.sync()
+        except Exception as error:
+            # Report any error, so the plugin never waits on a finished thread.
+            self.syncFinished.emit(None, error)
+        else:
+            self.syncFinished.emit(result, None)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test discovery for the test menu, cached against the mtimes of the files
+that discovery depends on so that test modules are only parsed again when
+the test folder has changed.
+"""
+
+import os
+
+from ..store import JsonStore
+from inspection import find_modules
+
+
+def discovery_signature(test_folder, directory_index=None):
+    """Return {relative path: mtime} for every module in test_folder and the
+    packages below it.
+
+    Adding, removing or editing a test module, package __init__.py or a
+    module defining a base test case changes the discovered tests, so the
+    signature changes with them.
+    """
+    signature = {}
+    for path in find_modules(test_folder, directory_index).values():
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            continue
+        signature[os.path.relpath(path, test_folder)] = mtime
+    return signature
+
+
+class DiscoveryCache(JsonStore):
+    """Discovered tests keyed by test folder, each entry valid for the
+    signature the folder had when it was discovered.
+    """
+
+    def tests(self, test_folder, discover, directory_index=None):
+        """Return the test index for test_folder, calling
+        discover(test_folder) only if a module has been added, removed or
+        changed since the folder was last discovered.
+        """
+        signature = discovery_signature(test_folder, directory_index)
+        entry = self.data.get(test_folder)
+        if entry is not None and entry.get("signature") == signature and "tests" in entry:
+            return entry["tests"]
+        tests = discover(test_folder)
+        self.data[test_folder] = {"signature": signature, "tests": tests}
+        self.save()
+        return tests
+
+    def cached(self, test_folder):
+        """Return the last known test index for test_folder without
+        touching the disk, or None if it has never been discovered.
+        """
+        entry = self.data.get(test_folder)
+        if entry is None:
+            return None
+        return entry.get("tests")
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""
+Export of test results for CI, as JUnit XML and as JSON lines (one JSON
+record per test). Each test is written as soon as it finishes, so a long
+run never holds the whole document in memory, and the tests run so far
+can be read even if the run is killed.
+
+The files are set with the SCRIPT_ASSISTANT_JUNIT_XML and
+SCRIPT_ASSISTANT_JSON_LINES environment variables.
+"""
+
+import os
+import re
+import json
+import time
+import codecs
+import socket
+import unittest
+from xml.sax.saxutils import escape, quoteattr
+
+from outcomes import FAILED, SKIPPED
+from results import StreamingResult, ERROR, UNEXPECTED_SUCCESS
+
+JUNIT_XML_VARIABLE = "SCRIPT_ASSISTANT_JUNIT_XML"
+JSON_LINES_VARIABLE = "SCRIPT_ASSISTANT_JSON_LINES"
+
+# Characters which are not allowed in XML 1.0, even escaped.
+INVALID_XML = re.compile(u"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+# The id of an error in a class or module fixture, e.g.
+# setUpClass (test_module.TestCase).
+FIXTURE_ID = re.compile(r"^(\w+) \((.*)\)$")
+
+
+def xml_text(value):
+    """Return a value as unicode which can be written to XML."""
+    if isinstance(value, str):
+        value = value.decode("utf-8", "replace")
+    return INVALID_XML.sub(u"\ufffd", unicode(value))
+
+
+def split_test_id(test_id):
+    """Return the JUnit class name and test name of a test id."""
+    fixture = FIXTURE_ID.match(test_id)
+    if fixture is not None:
+        return fixture.group(2), fixture.group(1)
+    class_name, _, name = test_id.rpartition(".")
+    return class_name, name
+
+
+def failure_message(detail):
+    """Return the last line of a traceback, e.g. AssertionError: failed."""
+    lines = [line for line in (detail or "").splitlines() if line.strip()]
+    return lines[-1] if lines else ""
+
+
+class JUnitXmlWriter(object):
+    """Writes test records to a JUnit XML file as a single test suite.
+
+    As the file is written as the tests run, the test suite has no test
+    counts; JUnit readers count the test cases instead.
+    """
+
+    def __init__(self, path, name="scriptassistant"):
+        self.file = codecs.open(path, "w", "utf-8")
+        self.file.write(u'<?xml version="1.0" encoding="UTF-8"?>\n')
+        self.file.write(u"<testsuite name={} timestamp={} hostname={}>\n".format(
+            quoteattr(xml_text(name)),
+            quoteattr(time.strftime("%Y-%m-%dT%H:%M:%S")),
+            quoteattr(xml_text(socket.gethostname()))))
+        self.file.flush()
+
+    def write(self, record):
+        class_name, name = split_test_id(record["id"])
+        status = record["status"]
+        self.file.write(u"  <testcase classname={} name={} time={}>\n".format(
+            quoteattr(xml_text(class_name)),
+            quoteattr(xml_text(name)),
+            quoteattr("{:.3f}".format(record["duration"] or 0))))
+        if status in (FAILED, ERROR):
+            self.write_element(
+                "failure" if status == FAILED else "error",
+                record["detail"], failure_message(record["detail"]))
+        elif status == UNEXPECTED_SUCCESS:
+            self.write_element("failure", None, "Unexpected success")
+        elif status == SKIPPED:
+            self.write_element("skipped", None, record["detail"])
+        if record.get("output"):
+            self.write_element("system-out", record["output"])
+        self.file.write(u"  </testcase>\n")
+        self.file.flush()
+
+    def write_element(self, tag, text=None, message=None):
+        attributes = u""
+        if message is not None:
+            attributes = u" message={}".format(quoteattr(xml_text(message)))
+        if text:
+            self.file.write(u"    <{0}{1}>{2}</{0}>\n".format(
+                tag, attributes, escape(xml_text(text))))
+        else:
+            self.file.write(u"    <{}{}/>\n".format(tag, attributes))
+
+    def close(self):
+        self.file.write(u"</testsuite>\n")
+        self.file.close()
+
+
+class JsonLinesWriter(object):
+    """Writes each test record to a file as a line of JSON."""
+
+    def __init__(self, path):
+        self.file = open(path, "w")
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ResultExporter(object):
+    """Writes test records to a JUnit XML file and a JSON lines file, either
+    of which may be None.
+    """
+
+    def __init__(self, junit_xml=None, json_lines=None):
+        self.writers = []
+        if junit_xml:
+            self.writers.append(JUnitXmlWriter(junit_xml))
+        if json_lines:
+            self.writers.append(JsonLinesWriter(json_lines))
+
+    def write(self, record):
+        for writer in self.writers:
+            writer.write(record)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+        self.writers = []
+
+
+def exporter_from_environment():
+    """Return a ResultExporter for the files set in the environment, or
+    None if neither is set.
+    """
+    junit_xml = os.environ.get(JUNIT_XML_VARIABLE)
+    json_lines = os.environ.get(JSON_LINES_VARIABLE)
+    if not junit_xml and not json_lines:
+        return None
+    return ResultExporter(junit_xml, json_lines)
+
+
+class ExportingTextResult(StreamingResult, unittest.TextTestResult):
+    """A TextTestResult which also passes the record of each test, with
+    what it printed, to an exporter, without keeping it. Use it with
+    unittest.TextTestRunner as partial(ExportingTextResult, exporter).
+    """
+
+    def __init__(self, exporter, stream, descriptions, verbosity):
+        super(ExportingTextResult, self).__init__(
+            on_record=exporter.write, capture=True,
+            stream=stream, descriptions=descriptions, verbosity=verbosity)
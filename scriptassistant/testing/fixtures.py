@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+
+"""
+A cache for the outputs of processing algorithms run as test fixtures, e.g.
+a runalg at the top of a test module, so that an algorithm is only run
+again when the algorithm, its script, its input datasets or its parameters
+have changed.
+
+Outputs are keyed by a hash of the algorithm id, the content of the
+algorithm's script, the content of each input dataset (with its sidecar
+files, e.g. the .dbf and .shx of a shapefile) and the other parameters.
+Output files are copied into the cache folder, and entries are evicted
+when they have not been used for max_age seconds or when the cache is
+larger than max_size bytes.
+"""
+
+import os
+import time
+import shutil
+import hashlib
+
+from ..store import JsonStore
+
+# Evict entries unused for 30 days, and the least recently used entries
+# once the cache holds more than 1 GB.
+MAX_AGE = 30 * 24 * 60 * 60
+MAX_SIZE = 1024 * 1024 * 1024
+
+_default_cache = None
+
+
+def dataset_files(path):
+    """Return the sorted paths of a dataset file and its sidecar files,
+    the files in the same folder with the same name and another extension.
+    """
+    folder, filename = os.path.split(os.path.abspath(path))
+    stem = os.path.splitext(filename)[0]
+    try:
+        filenames = os.listdir(folder)
+    except OSError:
+        return []
+    return sorted(
+        os.path.join(folder, name) for name in filenames
+        if os.path.splitext(name)[0] == stem and os.path.isfile(os.path.join(folder, name))
+    )
+
+
+def dataset_path(value):
+    """Return the file of an input dataset, given a layer or a path, or
+    None if the value is not a dataset.
+    """
+    source = getattr(value, "source", None)
+    if callable(source):
+        # e.g. /data/BQ31.shp|layerid=0 for an OGR layer.
+        value = source().split("|")[0]
+    if isinstance(value, basestring) and os.path.isfile(value):
+        return value
+    return None
+
+
+def file_digest(path):
+    """Return the SHA-1 hex digest of the content of a file."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as data_file:
+        for chunk in iter(lambda: data_file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FixtureCache(JsonStore):
+    """Cached algorithm outputs keyed by fixture key, stored in folder.
+
+    The store also keeps the digest of each hashed file with its size and
+    mtime, so an unchanged input dataset is not read again.
+    """
+
+    def __init__(self, path=None, folder=None, max_size=MAX_SIZE, max_age=MAX_AGE):
+        self.folder = folder
+        self.max_size = max_size
+        self.max_age = max_age
+        super(FixtureCache, self).__init__(path)
+
+    def load(self):
+        super(FixtureCache, self).load()
+        self.data.setdefault("hashes", {})
+        self.data.setdefault("entries", {})
+
+    def clear(self):
+        super(FixtureCache, self).clear()
+        self.data = {"hashes": {}, "entries": {}}
+
+    def digest(self, path):
+        """Return the digest of a file, hashing it only if its size or
+        mtime have changed since it was last hashed.
+        """
+        stat = os.stat(path)
+        known = self.data["hashes"].get(path)
+        if known is not None and known[:2] == [stat.st_size, stat.st_mtime]:
+            return str(known[2])
+        digest = file_digest(path)
+        self.data["hashes"][path] = [stat.st_size, stat.st_mtime, digest]
+        return digest
+
+    def key(self, algorithm_id, script, args, version=""):
+        """Return the fixture key for running an algorithm, whose script
+        (if any) is the file script, with args.
+        """
+        key = hashlib.sha1()
+        key.update(repr((algorithm_id, version)))
+        if script and os.path.isfile(script):
+            key.update(self.digest(script))
+        for value in args:
+            path = dataset_path(value)
+            if path is None:
+                key.update(repr(("value", value)))
+            else:
+                key.update(repr(("dataset", [
+                    (os.path.splitext(name)[1], self.digest(name))
+                    for name in dataset_files(path)
+                ])))
+        return key.hexdigest()
+
+    def get(self, key, args=()):
+        """Return the outputs cached for key, or None. A cached output
+        which was written to a path given in args is copied back there.
+        """
+        entry = self.data["entries"].get(key)
+        if entry is None:
+            return None
+        entry_folder = os.path.join(self.folder, key)
+        outputs = {}
+        for name, output in entry["outputs"].items():
+            if "file" not in output:
+                outputs[name] = output["value"]
+                continue
+            path = os.path.join(entry_folder, output["file"])
+            if not all(os.path.isfile(os.path.join(entry_folder, file_name))
+                       for file_name in output["files"]):
+                self.remove(key)
+                return None
+            requested = output.get("requested")
+            if requested is not None and requested in args:
+                path = self.copy_dataset(path, requested)
+            outputs[name] = path
+        entry["used"] = time.time()
+        return outputs
+
+    def put(self, key, outputs, args=()):
+        """Cache the outputs of a run, then evict old entries, returning
+        the outputs with each output file replaced by its cached copy (other
+        than outputs written to a path given in args).
+        """
+        self.remove(key)
+        entry_folder = os.path.join(self.folder, key)
+        entry = {"outputs": {}, "size": 0, "used": time.time()}
+        cached = {}
+        for name, value in outputs.items():
+            path = dataset_path(value)
+            if path is None:
+                entry["outputs"][name] = {"value": value}
+                cached[name] = value
+                continue
+            if not os.path.isdir(entry_folder):
+                os.makedirs(entry_folder)
+            cached_path = self.copy_dataset(path, os.path.join(entry_folder, os.path.basename(path)))
+            files = [os.path.basename(file_name) for file_name in dataset_files(cached_path)]
+            entry["size"] += sum(
+                os.path.getsize(os.path.join(entry_folder, file_name)) for file_name in files)
+            entry["outputs"][name] = {"file": os.path.basename(path), "files": files}
+            if value in args:
+                entry["outputs"][name]["requested"] = value
+                cached[name] = value
+            else:
+                cached[name] = cached_path
+        self.data["entries"][key] = entry
+        # The outputs being returned are kept, even if they alone are
+        # larger than max_size.
+        self.evict(keep=key)
+        return cached
+
+    @staticmethod
+    def copy_dataset(source, destination):
+        """Copy a dataset file and its sidecar files to destination,
+        renaming them to match it, and return destination.
+        """
+        stem = os.path.splitext(destination)[0]
+        destination_folder = os.path.dirname(destination)
+        if destination_folder and not os.path.isdir(destination_folder):
+            os.makedirs(destination_folder)
+        for path in dataset_files(source):
+            shutil.copy2(path, stem + os.path.splitext(path)[1])
+        return destination
+
+    def remove(self, key):
+        """Remove an entry and its files."""
+        self.data["entries"].pop(key, None)
+        if self.folder:
+            shutil.rmtree(os.path.join(self.folder, key), ignore_errors=True)
+
+    def evict(self, now=None, keep=None):
+        """Remove the entries unused for more than max_age seconds, then the
+        least recently used entries other than keep until the cache fits
+        within max_size, and forget the digests of files which no longer
+        exist.
+        """
+        if now is None:
+            now = time.time()
+        entries = self.data["entries"]
+        for key in [key for key, entry in entries.items() if now - entry["used"] > self.max_age]:
+            self.remove(key)
+        by_use = sorted(
+            (key for key in entries if key != keep), key=lambda key: entries[key]["used"])
+        size = sum(entry["size"] for entry in entries.values())
+        while by_use and size > self.max_size:
+            key = by_use.pop(0)
+            size -= entries[key]["size"]
+            self.remove(key)
+        hashes = self.data["hashes"]
+        for path in [path for path in hashes if not os.path.isfile(path)]:
+            del hashes[path]
+
+    def run(self, algorithm_id, script, args, run, version=""):
+        """Return the outputs of running an algorithm with args, from the
+        cache or by calling run() and caching what it returns. A failed
+        run (returning None) is not cached.
+        """
+        key = self.key(algorithm_id, script, args, version)
+        outputs = self.get(key, args)
+        if outputs is None:
+            outputs = run()
+            if outputs is not None:
+                outputs = self.put(key, outputs, args)
+        self.save()
+        return outputs
+
+
+def default_cache():
+    """The fixture cache in the .qgis2/scriptassistant directory."""
+    global _default_cache
+    if _default_cache is None:
+        from qgis.core import QgsApplication
+        folder = os.path.join(QgsApplication.qgisSettingsDirPath(), "scriptassistant")
+        _default_cache = FixtureCache(
+            os.path.join(folder, "fixture_cache.json"), os.path.join(folder, "fixtures"))
+    return _default_cache
+
+
+def runalg(algorithm_id, *args):
+    """Run a processing algorithm as processing.runalg does, returning the
+    cached outputs if the algorithm, its script, its inputs and its
+    parameters are unchanged since it was last run.
+
+    Cached output files are shared between runs, so should not be edited.
+    """
+    import processing
+    from processing.core.Processing import Processing
+    from qgis.core import QGis
+    algorithm = Processing.getAlgorithm(algorithm_id)
+    script = getattr(algorithm, "descriptionFile", None)
+    return default_cache().run(
+        algorithm_id, script, args,
+        lambda: processing.runalg(algorithm_id, *args), QGis.QGIS_VERSION)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+"""
+A worker process for running test modules in parallel or supervised,
+started by parallel.WorkerProcess as python -m <plugin>.testing.headless.
+
+The first line on stdin is the config, {"prefix_path": QGIS prefix path,
+"test_folder": folder, "record_folders": [folders], "capture": whether to
+keep what each test prints in its record, "supervised": whether jobs are
+supervised (see run_job)}, and each line after it is a job. The result of
+each job is written to stdout as a JSON line, with a record and the
+timings of each test and the files they accessed. Anything else written
+to stdout, including by the tests and QGIS itself, goes to stderr instead.
+"""
+
+import os
+import sys
+import json
+import unittest
+import threading
+import traceback
+from importlib import import_module
+
+from impact import FileAccessRecorder
+from outcomes import iterate_tests, order_failed_first
+from parallel import result_to_json, crashed_result
+from results import CollectingResult
+from steps import suite_steps
+from supervisor import Watchdog
+from timing import Stopwatch, import_timing_id
+
+
+def start_qgis(prefix_path):
+    """Start a headless QgsApplication with Processing initialised."""
+    from qgis.core import QgsApplication
+    QgsApplication.setPrefixPath(prefix_path, True)
+    application = QgsApplication([], False)
+    application.initQgis()
+    from processing.core.Processing import Processing
+    Processing.initialize()
+    return application
+
+
+def run_job(job, config, send=None):
+    """Run the tests of a job, returning the JSON result.
+
+    If send is given, the job is supervised (see supervisor.py): the ids of
+    its tests are sent before they run, then the record of each test as it
+    finishes, and a timeout with the stack of the running test if it runs
+    past the job's test_timeout or module_timeout.
+    """
+    watchdog = None
+    if send is not None:
+        watchdog = Watchdog(
+            job.get("test_timeout"), job.get("module_timeout"),
+            lambda limit, stack: send({"event": "timeout", "limit": limit, "stack": stack}))
+        watchdog.start()
+    try:
+        with FileAccessRecorder([config["test_folder"]] + config["record_folders"]) as recorder:
+            try:
+                with Stopwatch() as import_time:
+                    module = import_module(job["module"])
+                if job["tests"]:
+                    suite = unittest.TestLoader().loadTestsFromNames(job["tests"], module)
+                elif job["name"]:
+                    suite = unittest.TestLoader().loadTestsFromName(job["name"], module)
+                else:
+                    suite = unittest.TestLoader().loadTestsFromModule(module)
+            except Exception:
+                data = crashed_result(job, traceback.format_exc())
+                if send is not None:
+                    for record in data["records"]:
+                        send({"event": "record", "record": record})
+                return data
+            if job.get("skip"):
+                # The tests already run before the last worker process was killed.
+                skip = set(job["skip"])
+                suite = unittest.TestSuite(
+                    test for test in iterate_tests(suite) if test.id() not in skip)
+            if job["failed"]:
+                suite = order_failed_first(suite, set(job["failed"]))
+            on_record = None
+            if send is not None:
+                send({"event": "tests", "tests": [test.id() for test in iterate_tests(suite)]})
+
+                def on_record(record):
+                    watchdog.touch()
+                    send({"event": "record", "record": record})
+            result = CollectingResult(on_record, capture=config.get("capture", False))
+            result.add_timing(import_timing_id(job["module"]), import_time.wall, import_time.cpu)
+            for _ in suite_steps(suite, result):
+                pass
+    finally:
+        if watchdog is not None:
+            watchdog.stop()
+    data = result_to_json(iterate_tests(suite), result)
+    data["accessed"] = sorted(recorder.paths)
+    return data
+
+
+def main():
+    # Keep stdout for results, and send everything else to stderr.
+    results = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    # The watchdog of a supervised job also writes to stdout.
+    lock = threading.Lock()
+
+    def send(message):
+        with lock:
+            results.write(json.dumps(message) + "\n")
+            results.flush()
+
+    config = json.loads(sys.stdin.readline())
+    sys.path.append(config["test_folder"])
+    application = start_qgis(config["prefix_path"])
+    for line in iter(sys.stdin.readline, ""):
+        if not line.strip():
+            break
+        send(run_job(json.loads(line), config, send if config.get("supervised") else None))
+    application.exitQgis()
+
+
+if __name__ == "__main__":
+    main()
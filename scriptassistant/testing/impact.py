@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+"""
+Change impact for test modules: the scripts, data files and helper modules
+each test module depends on, recorded with their size and mtime when the
+module last passed, so that only the test modules whose dependencies have
+since changed need to be run.
+
+Dependencies are found statically, from the imports of a test module and
+the file names in its string literals (e.g. a script path or a shapefile
+name), and refined while a module runs by recording the files it opens and
+the modules it imports from the watched folders.
+"""
+
+import os
+import re
+import ast
+import sys
+from collections import deque
+
+import __builtin__
+
+from ..store import JsonStore
+from ..sync.scanner import DirectoryIndex
+from ..sync.script_index import is_within
+from inspection import ParsedModule, find_modules
+
+# File names with an extension within string literals, e.g. the BQ31.shp
+# in r"{}/BQ31.shp".format(test_dir).
+FILE_NAME = re.compile(r"[\w\-]+\.[A-Za-z]\w*")
+
+
+def referenced_file_names(path):
+    """Return the file names which appear in the string literals of a
+    module, or an empty set if it cannot be parsed.
+    """
+    try:
+        with open(path, "rb") as module_file:
+            tree = ast.parse(module_file.read(), path)
+    except (IOError, SyntaxError, TypeError, ValueError):
+        return set()
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Str):
+            names.update(FILE_NAME.findall(node.s))
+    return names
+
+
+def files_by_stem(folders, directory_index=None):
+    """Return {file stem: [paths]} for the files in folders and their
+    sub-directories, other than compiled Python files.
+    """
+    if directory_index is None:
+        directory_index = DirectoryIndex()
+    stems = {}
+    for folder in folders:
+        for directory, filenames in directory_index.walk(folder):
+            for filename in filenames:
+                if filename.endswith((".pyc", ".pyo")):
+                    continue
+                stem = os.path.splitext(filename)[0]
+                stems.setdefault(stem, []).append(os.path.join(directory, filename))
+    return stems
+
+
+class DependencyFinder(object):
+    """Finds the static dependencies of the test modules in test_folder, see
+    static_dependencies.
+
+    The folders are listed once, when the finder is made, so make one for
+    each test run. Modules are parsed with module_cache, if given, and the
+    file names referenced by each module are read at most once.
+    """
+
+    def __init__(self, test_folder, search_folders, directory_index=None, module_cache=None):
+        self.paths = find_modules(test_folder, directory_index)
+        self.stems = files_by_stem([test_folder] + list(search_folders), directory_index)
+        self.module_cache = module_cache
+        self.file_names = {}
+
+    def parsed(self, name, path):
+        if self.module_cache is None:
+            return ParsedModule(name, path)
+        return self.module_cache.parsed(name, path)
+
+    def referenced_file_names(self, path):
+        if path not in self.file_names:
+            self.file_names[path] = referenced_file_names(path)
+        return self.file_names[path]
+
+    def dependencies(self, module_name):
+        """Return the paths a test module depends on."""
+        if module_name not in self.paths:
+            return set()
+        dependencies = set()
+        pending = deque([module_name])
+        seen = set()
+        while pending:
+            name = pending.popleft()
+            if name in seen:
+                continue
+            seen.add(name)
+            path = self.paths[name]
+            dependencies.add(path)
+            module = self.parsed(name, path)
+            for candidates, attribute in module.imports.values():
+                imported = list(candidates)
+                if attribute is not None:
+                    # from package import module
+                    imported += ["{}.{}".format(candidate, attribute) for candidate in candidates]
+                for imported_name in imported:
+                    if imported_name in self.paths:
+                        pending.append(imported_name)
+                    # A module imported from a script folder.
+                    for dependency in self.stems.get(imported_name.rpartition(".")[2], []):
+                        if dependency.endswith(".py"):
+                            dependencies.add(dependency)
+            for file_name in self.referenced_file_names(path):
+                matches = self.stems.get(os.path.splitext(file_name)[0], [])
+                directories = set(
+                    os.path.dirname(match) for match in matches
+                    if os.path.basename(match) == file_name
+                )
+                dependencies.update(
+                    match for match in matches if os.path.dirname(match) in directories)
+        return dependencies
+
+
+def static_dependencies(test_folder, module_name, search_folders, directory_index=None,
+                        module_cache=None):
+    """Return the paths a test module depends on: its own file, the modules
+    in test_folder it imports (directly or through other modules), and the
+    files in search_folders (or test_folder) named in any of them.
+
+    A referenced file brings its sidecar files with it, so naming a
+    shapefile depends on its .dbf, .shx and .prj too.
+    """
+    return DependencyFinder(
+        test_folder, search_folders, directory_index, module_cache).dependencies(module_name)
+
+
+class FileAccessRecorder(object):
+    """Records the files in a set of folders opened with open(), and the
+    modules imported from them, while the recorder is active.
+
+    Use as a context manager around importing and running a test module.
+    Files opened from any thread are seen, so only those within the folders
+    are kept.
+    """
+
+    def __init__(self, folders):
+        self.folders = [os.path.abspath(folder) for folder in folders if folder]
+        self.paths = set()
+        self.modules = None
+        self.original_open = None
+
+    def __enter__(self):
+        self.modules = set(sys.modules)
+        self.original_open = __builtin__.open
+        original_open = self.original_open
+        recorder = self
+
+        def recording_open(name, *args, **kwargs):
+            recorder.record(name)
+            return original_open(name, *args, **kwargs)
+
+        __builtin__.open = recording_open
+        return self
+
+    def __exit__(self, *exc_info):
+        __builtin__.open = self.original_open
+        for name in set(sys.modules) - self.modules:
+            path = getattr(sys.modules[name], "__file__", None)
+            if path:
+                if path.endswith((".pyc", ".pyo")):
+                    path = path[:-1]
+                self.record(path)
+        return False
+
+    def record(self, path):
+        if not isinstance(path, basestring):
+            return
+        path = os.path.abspath(path)
+        if any(is_within(path, folder) for folder in self.folders):
+            self.paths.add(path)
+
+
+class ImpactMap(JsonStore):
+    """The dependencies of each test module keyed by module name, with the
+    size and mtime each dependency had when the module last passed.
+    """
+
+    def record(self, module_name, paths):
+        """Record a passing run of a test module which depends on paths."""
+        files = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[path] = [stat.st_size, stat.st_mtime]
+        self.data[module_name] = files
+
+    def paths(self, module_name):
+        """Return the dependencies recorded for a test module."""
+        return set(self.data.get(module_name, {}))
+
+    def forget(self, module_name):
+        """Forget a test module, so that it is affected until it passes."""
+        self.data.pop(module_name, None)
+
+    def is_affected(self, module_name):
+        """Return True if a test module has not passed, or if any of its
+        dependencies have changed or been removed since it last passed.
+        """
+        files = self.data.get(module_name)
+        if files is None:
+            return True
+        for path, (size, mtime) in files.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return True
+            if stat.st_size != size or stat.st_mtime != mtime:
+                return True
+        return False
+
+    def affected(self, module_names):
+        """Return the test modules in module_names which are affected."""
+        return [name for name in module_names if self.is_affected(name)]
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+
+"""
+Static discovery of unittest tests. Test modules are parsed rather than
+imported, so nothing in a test module (e.g. a processing fixture run at
+import) is executed until its tests are run.
+"""
+
+import os
+import re
+import ast
+from collections import deque
+from fnmatch import fnmatch
+from unittest import TestLoader
+
+from ..store import JsonStore
+from ..sync.scanner import DirectoryIndex
+
+# As unittest discovery, only files which can be imported as modules.
+VALID_MODULE_NAME = re.compile(r"[_a-z]\w*\.py$", re.IGNORECASE)
+TEST_PATTERN = "test_*.py"
+TEST_METHOD_PREFIX = TestLoader.testMethodPrefix
+# The resolved reference for unittest.TestCase and its equivalents.
+TEST_CASE = "TestCase"
+
+
+def find_modules(test_folder, directory_index=None):
+    """Return {dotted module name: path} for every module in test_folder
+    and the packages below it, as unittest discovery would import them.
+
+    Directory listings come from directory_index, so only directories which
+    have changed since the last scan are listed again.
+    """
+    if directory_index is None:
+        directory_index = DirectoryIndex()
+    modules = {}
+    visited = set()
+    pending = deque([(test_folder, "")])
+    while pending:
+        directory, package = pending.popleft()
+        try:
+            files, dirs = directory_index.listing(directory)
+        except OSError:
+            continue
+        visited.add(directory)
+        # Sub-directories which are not packages are not discovered.
+        if package and "__init__.py" not in files:
+            continue
+        for name in files:
+            if not VALID_MODULE_NAME.match(name):
+                continue
+            module = os.path.splitext(name)[0]
+            if module != "__init__":
+                modules[package + module] = os.path.join(directory, name)
+            elif package:
+                modules[package[:-1]] = os.path.join(directory, name)
+        pending.extend(
+            (os.path.join(directory, name), package + name + ".")
+            for name in dirs if "." not in name
+        )
+    directory_index.prune(test_folder, visited)
+    return modules
+
+
+def dotted_name(node):
+    """Return the dotted name of a Name or Attribute node, or None."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        value = dotted_name(node.value)
+        if value is not None:
+            return "{}.{}".format(value, node.attr)
+    return None
+
+
+def module_statements(body):
+    """Yield the statements of a module body, including those in if and
+    try blocks (e.g. a fallback import).
+    """
+    for node in body:
+        yield node
+        if isinstance(node, ast.If):
+            for child in module_statements(node.body + node.orelse):
+                yield child
+        elif isinstance(node, ast.TryExcept):
+            handlers = [child for handler in node.handlers for child in handler.body]
+            for child in module_statements(node.body + handlers + node.orelse):
+                yield child
+        elif isinstance(node, ast.TryFinally):
+            for child in module_statements(node.body + node.finalbody):
+                yield child
+
+
+class ParsedModule(object):
+    """The top level classes and imports of a module, parsed from the file
+    or restored from a module cache entry.
+    """
+
+    def __init__(self, name, path, entry=None):
+        self.name = name
+        self.path = path
+        if os.path.basename(path) == "__init__.py":
+            self.package = name
+        else:
+            self.package = name.rpartition(".")[0]
+        # {class name: ([base references], [test method names])}
+        self.classes = {}
+        # {local name: ([candidate modules], None)} for import module, or
+        # {local name: ([candidate modules], attribute)} for from module
+        # import attribute
+        self.imports = {}
+        self.error = None
+        if entry is None:
+            self.parse()
+        else:
+            self.classes = entry["classes"]
+            self.imports = entry["imports"]
+            self.error = entry["error"]
+
+    def entry(self):
+        """Return the parse as a module cache entry."""
+        return {
+            "name": self.name,
+            "classes": self.classes,
+            "imports": self.imports,
+            "error": self.error,
+        }
+
+    def parse(self):
+        try:
+            with open(self.path, "rb") as module_file:
+                tree = ast.parse(module_file.read(), self.path)
+        except (IOError, SyntaxError, TypeError, ValueError) as error:
+            self.error = str(error)
+            return
+        for node in module_statements(tree.body):
+            if isinstance(node, ast.ClassDef):
+                methods = [
+                    item.name for item in node.body
+                    if isinstance(item, ast.FunctionDef) and
+                    item.name.startswith(TEST_METHOD_PREFIX)
+                ]
+                self.classes[node.name] = (
+                    [dotted_name(base) for base in node.bases], methods)
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        self.imports[alias.asname] = (self.absolute_module(alias.name, 0), None)
+                    else:
+                        head = alias.name.split(".")[0]
+                        self.imports[head] = (self.absolute_module(head, 0), None)
+            elif isinstance(node, ast.ImportFrom):
+                module = self.absolute_module(node.module, node.level)
+                for alias in node.names:
+                    self.imports[alias.asname or alias.name] = (module, alias.name)
+
+    def absolute_module(self, module, level):
+        """Return the candidate absolute names of an imported module. Python
+        2 tries an implicit relative import before an absolute one.
+        """
+        if level:
+            parts = self.package.split(".") if self.package else []
+            base = ".".join(parts[:len(parts) - (level - 1)])
+            return [".".join(part for part in (base, module) if part)]
+        if self.package:
+            return ["{}.{}".format(self.package, module), module]
+        return [module]
+
+
+class ModuleCache(JsonStore):
+    """Parsed modules keyed by path, each entry valid for the size and mtime
+    the module had when it was parsed.
+    """
+
+    def parsed(self, name, path):
+        """Return the ParsedModule for a module, parsing it only if it is new
+        or has changed since it was last parsed.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return ParsedModule(name, path)
+        entry = self.data.get(path)
+        if entry is not None and entry["name"] == name and \
+                entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return ParsedModule(name, path, entry)
+        module = ParsedModule(name, path)
+        entry = module.entry()
+        entry["size"] = stat.st_size
+        entry["mtime"] = stat.st_mtime
+        self.data[path] = entry
+        return module
+
+    def prune(self, test_folder, paths):
+        """Forget modules in test_folder which are not in paths."""
+        paths = set(paths)
+        prefix = os.path.join(test_folder, "")
+        for path in list(self.data):
+            if path.startswith(prefix) and path not in paths:
+                del self.data[path]
+
+
+class TestIndexer(object):
+    """Builds an index of the tests in a test folder from parsed modules,
+    resolving test case base classes defined anywhere in the folder.
+    """
+
+    def __init__(self, test_folder, directory_index=None, module_cache=None):
+        self.test_folder = test_folder
+        self.paths = find_modules(test_folder, directory_index)
+        self.module_cache = module_cache
+        self.parsed = {}
+        self.resolved = {}
+
+    def module(self, name):
+        """Return the parsed module with a dotted name, or None if it is not
+        in the test folder.
+        """
+        if name not in self.paths:
+            return None
+        if name not in self.parsed:
+            if self.module_cache is None:
+                self.parsed[name] = ParsedModule(name, self.paths[name])
+            else:
+                self.parsed[name] = self.module_cache.parsed(name, self.paths[name])
+        return self.parsed[name]
+
+    def local_module(self, candidates):
+        """Return the first candidate module name in the test folder, or the
+        last (external) candidate.
+        """
+        for candidate in candidates:
+            if candidate in self.paths:
+                return candidate
+        return candidates[-1]
+
+    def resolve(self, module, reference, depth=0):
+        """Resolve a base class reference within a parsed module to
+        (module name, class name), TEST_CASE or None.
+        """
+        if reference is None or depth > 10:
+            return None
+        parts = reference.split(".")
+        if len(parts) == 1:
+            if reference in module.classes:
+                return module.name, reference
+            if reference in module.imports:
+                source, attribute = module.imports[reference]
+                if attribute is not None:
+                    return self.resolve_attribute(source, attribute, depth)
+            return TEST_CASE if reference == TEST_CASE else None
+
+        head = parts[0]
+        if head not in module.imports:
+            return TEST_CASE if parts[-1] == TEST_CASE else None
+        candidates, attribute = module.imports[head]
+        if attribute is not None:
+            candidates = ["{}.{}".format(candidate, attribute) for candidate in candidates]
+        candidates = [".".join([candidate] + parts[1:-1]) for candidate in candidates]
+        return self.resolve_attribute(candidates, parts[-1], depth)
+
+    def resolve_attribute(self, candidates, attribute, depth):
+        """Resolve a class imported from one of the candidate modules."""
+        parsed = self.module(self.local_module(candidates))
+        if parsed is None or parsed.error:
+            # e.g. unittest.TestCase, qgis.testing.unittest.TestCase
+            return TEST_CASE if attribute == TEST_CASE else None
+        if attribute in parsed.classes:
+            return parsed.name, attribute
+        # A class imported into a module and imported again from there.
+        return self.resolve(parsed, attribute, depth + 1)
+
+    def class_methods(self, module_name, class_name, visiting=()):
+        """Return (is a TestCase, sorted test method names) for a class,
+        including the test methods it inherits from classes (e.g. mixins)
+        in the test folder.
+        """
+        key = (module_name, class_name)
+        if key in self.resolved:
+            return self.resolved[key]
+        if key in visiting:
+            return False, []
+        module = self.module(module_name)
+        bases, methods = module.classes[class_name]
+        is_test_case = False
+        methods = set(methods)
+        for base in bases:
+            target = self.resolve(module, base)
+            if target == TEST_CASE:
+                is_test_case = True
+            elif target is not None:
+                base_is_test_case, inherited = self.class_methods(
+                    target[0], target[1], visiting + (key,))
+                is_test_case = is_test_case or base_is_test_case
+                methods.update(inherited)
+        self.resolved[key] = (is_test_case, sorted(methods))
+        return self.resolved[key]
+
+    def index(self, pattern=TEST_PATTERN):
+        """Return {module name: {"path", "error", "classes"}} for each test
+        module, where classes is {class name: [test method names]}. Modules
+        which cannot be parsed are included so that the error is reported
+        when they are run.
+        """
+        index = {}
+        for name, path in self.paths.items():
+            if not fnmatch(os.path.basename(path), pattern):
+                continue
+            module = self.module(name)
+            classes = {}
+            for class_name in module.classes:
+                is_test_case, methods = self.class_methods(name, class_name)
+                if is_test_case and methods:
+                    classes[class_name] = methods
+            if classes or module.error:
+                index[name] = {
+                    "path": os.path.relpath(path, self.test_folder),
+                    "error": module.error,
+                    "classes": classes,
+                }
+        if self.module_cache is not None:
+            self.module_cache.prune(self.test_folder, self.paths.values())
+        return index
+
+
+def discover_tests(test_folder, directory_index=None, module_cache=None,
+                   pattern=TEST_PATTERN):
+    """Return the index of the tests in test_folder, without importing any
+    test module. Only directories and modules which have changed since they
+    were last indexed in directory_index and module_cache are read again.
+    """
+    return TestIndexer(test_folder, directory_index, module_cache).index(pattern)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+"""
+The outcome of each test the last time it was run, kept between sessions so
+that failures can be rerun on their own or ahead of the other tests.
+"""
+
+import re
+import unittest
+
+from ..store import JsonStore
+from targets import SUITE_TARGETS
+
+PASSED = "passed"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# Run modes: only the tests which failed last time, or every test with the
+# tests which failed last time first.
+RERUN_FAILURES = "rerun_failures"
+FAILED_FIRST = "failed_first"
+
+# The description unittest gives an error in a class or module fixture,
+# e.g. setUpClass (test_module.ExampleTest).
+FIXTURE_ERROR = re.compile(r"^\w+ \((.+)\)$")
+
+
+def in_scope(test_id, target):
+    """Return True if a test id is within a test target."""
+    return target in SUITE_TARGETS or test_id == target or \
+        test_id.startswith(target + ".")
+
+
+def iterate_tests(suite):
+    """Yield the tests in a suite and any suites nested in it."""
+    for test in suite:
+        if unittest.suite._isnotsuite(test):
+            yield test
+        else:
+            for nested_test in iterate_tests(test):
+                yield nested_test
+
+
+def order_failed_first(suite, failed_ids):
+    """Return a suite of the tests in suite with the tests in failed_ids
+    first, keeping the order of the tests otherwise.
+    """
+    tests = list(iterate_tests(suite))
+    tests.sort(key=lambda test: test.id() not in failed_ids)
+    return unittest.TestSuite(tests)
+
+
+class OutcomeStore(JsonStore):
+    """Test outcomes keyed by test id (module.Class.method), or by module
+    name for a module which failed as a whole, e.g. as it could not be
+    imported or its worker process crashed.
+    """
+
+    def record(self, tests, result):
+        """Record the outcome of each test run for a result. The failure of
+        a whole module is dropped once its tests have run.
+        """
+        failed = set()
+        fixture_failures = []
+        for test, _ in result.errors + result.failures:
+            match = FIXTURE_ERROR.match(test.id())
+            if match:
+                fixture_failures.append(match.group(1))
+            else:
+                failed.add(test.id())
+        skipped = set(test.id() for test, _ in result.skipped)
+        tests = list(tests)
+        test_ids = set(test.id() for test in tests)
+        for test_id in test_ids:
+            module_name = test_id.rsplit(".", 2)[0]
+            if module_name not in test_ids:
+                self.data.pop(module_name, None)
+        for test in tests:
+            test_id = test.id()
+            if test_id in failed or any(in_scope(test_id, target) for target in fixture_failures):
+                self.data[test_id] = FAILED
+            elif test_id in skipped:
+                self.data[test_id] = SKIPPED
+            else:
+                self.data[test_id] = PASSED
+
+    def failed(self, target):
+        """Return the sorted ids of the tests within target which failed or
+        had an error last time they were run.
+        """
+        return sorted(
+            test_id for test_id, outcome in self.data.items()
+            if outcome == FAILED and in_scope(test_id, target)
+        )
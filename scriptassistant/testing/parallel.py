@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+
+"""
+Running test modules in parallel, in a pool of worker processes each with
+its own headless QgsApplication (see headless.py).
+
+Jobs are sent to a worker as JSON lines on its stdin, and each result is
+read back as a JSON line from its stdout, so that a result can be merged
+into the TestResult of the GUI process. Test modules which need the live
+QGIS GUI or the loaded plugins are pinned to the GUI process.
+"""
+
+import os
+import re
+import ast
+import sys
+import json
+import time
+import threading
+import subprocess
+import unittest
+import multiprocessing
+from Queue import Queue, Empty
+
+from inspection import dotted_name
+from results import make_record, ERROR
+
+# Test runners
+IN_PROCESS = "in_process"
+PARALLEL = "parallel"
+
+# The module attributes only the GUI process has.
+GUI_NAMES = ("iface", "plugins")
+
+# A comment pinning a test module to the GUI process.
+IN_PROCESS_MARKER = re.compile(r"^#\s*scriptassistant:\s*in-process\s*$", re.MULTILINE)
+
+
+def needs_gui(path):
+    """Return True if a test module is pinned to the GUI process, because
+    it has the in-process marker comment or uses qgis.utils.iface or
+    qgis.utils.plugins. A module which cannot be parsed is pinned too, so
+    that it fails the same way it would in the GUI process.
+    """
+    try:
+        with open(path, "rb") as module_file:
+            source = module_file.read()
+        tree = ast.parse(source, path)
+    except (IOError, SyntaxError, TypeError, ValueError):
+        return True
+    if IN_PROCESS_MARKER.search(source):
+        return True
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module == "qgis.utils":
+            if any(alias.name in GUI_NAMES for alias in node.names):
+                return True
+        elif isinstance(node, ast.Attribute) and node.attr in GUI_NAMES:
+            if dotted_name(node.value) in ("qgis.utils", "utils"):
+                return True
+    return False
+
+
+def python_executable():
+    """The Python interpreter for worker processes. Within QGIS,
+    sys.executable may be the QGIS binary rather than Python.
+    """
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+    for path in (os.path.join(sys.exec_prefix, "python.exe"),
+                 os.path.join(sys.exec_prefix, "bin", "python")):
+        if os.path.isfile(path):
+            return path
+    return "python"
+
+
+def result_to_json(tests, result):
+    """Return a JSON serialisable copy of a TestResult for the tests run,
+    keeping the id and description of each test, and the records and
+    timings of the tests if it is a CollectingResult.
+    """
+    def describe(test):
+        return [test.id(), str(test)]
+
+    return {
+        "tests": [test.id() for test in tests],
+        "testsRun": result.testsRun,
+        "errors": [describe(test) + [text] for test, text in result.errors],
+        "failures": [describe(test) + [text] for test, text in result.failures],
+        "skipped": [describe(test) + [reason] for test, reason in result.skipped],
+        "expectedFailures": [describe(test) + [text] for test, text in result.expectedFailures],
+        "unexpectedSuccesses": [describe(test) for test in result.unexpectedSuccesses],
+        "records": getattr(result, "records", []),
+        "timings": getattr(result, "timings", []),
+    }
+
+
+class RemoteTest(object):
+    """A test run in a worker process, as seen by the GUI process."""
+
+    def __init__(self, test_id, description=None):
+        self.test_id = test_id
+        self.description = description or test_id
+
+    def id(self):
+        return self.test_id
+
+    def __str__(self):
+        return self.description
+
+
+def result_from_json(data):
+    """Return the (tests, TestResult) of a result read from a worker."""
+    result = unittest.TestResult()
+    result.testsRun = data["testsRun"]
+    for key in ("errors", "failures", "skipped", "expectedFailures"):
+        getattr(result, key).extend(
+            (RemoteTest(test_id, description), text) for test_id, description, text in data[key])
+    result.unexpectedSuccesses.extend(
+        RemoteTest(test_id, description) for test_id, description in data["unexpectedSuccesses"])
+    return [RemoteTest(test_id) for test_id in data["tests"]], result
+
+
+def crashed_result(job, message):
+    """Return the result of a job whose module could not be run, e.g. as
+    it failed to import or its worker process exited, in which the module
+    itself is the test which failed.
+    """
+    test_id = job["module"]
+    return {
+        "tests": [test_id],
+        "testsRun": 1,
+        "errors": [[test_id, test_id, message]],
+        "failures": [],
+        "skipped": [],
+        "expectedFailures": [],
+        "unexpectedSuccesses": [],
+        "records": [make_record(test_id, test_id, ERROR, None, message)],
+        "timings": [],
+        "accessed": [],
+    }
+
+
+class WorkerProcess(object):
+    """A worker process running test modules one job at a time.
+
+    The log is emptied when the worker process is first started. A worker
+    process started again after a crash or a timeout appends to it, after
+    a header, so the log of the process which failed is kept.
+    """
+
+    def __init__(self, package, config, log_path):
+        self.package = package
+        self.config = config
+        self.log_path = log_path
+        self.process = None
+        self.killed = False
+        self.starts = 0
+
+    def start(self):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(path for path in sys.path if path)
+        self.starts += 1
+        with open(self.log_path, "w" if self.starts == 1 else "a") as log:
+            log.write("--- Worker process {} started at {} ---\n".format(
+                self.starts, time.strftime("%Y-%m-%d %H:%M:%S")))
+            log.flush()
+            self.process = subprocess.Popen(
+                [python_executable(), "-m", "{}.testing.headless".format(self.package)],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=log, env=env,
+            )
+        self.send(self.config)
+
+    def send(self, message):
+        self.process.stdin.write(json.dumps(message) + "\n")
+        self.process.stdin.flush()
+
+    def run(self, job):
+        """Run a job, returning its result. A worker process which has
+        exited is restarted for the next job.
+        """
+        try:
+            if self.process is None:
+                self.start()
+                if self.killed:
+                    self.process.kill()
+            self.send(job)
+            line = self.process.stdout.readline()
+        except (IOError, OSError) as error:
+            self.stop()
+            return crashed_result(job, "The worker process could not be run: {}".format(error))
+        if not line:
+            self.stop()
+            return crashed_result(job, self.exit_message())
+        return json.loads(line)
+
+    def exit_message(self):
+        return "The worker process exited, see worker process {} in {}.".format(
+            self.starts, self.log_path)
+
+    def kill(self):
+        """Kill the process, e.g. to cancel the job it is running."""
+        self.killed = True
+        if self.process is not None:
+            try:
+                self.process.kill()
+            except OSError:
+                pass
+
+    def stop(self):
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+            except (IOError, OSError):
+                pass
+            self.process.wait()
+            self.process = None
+
+
+class ParallelRunner(object):
+    """Runs jobs in a pool of worker processes.
+
+    Each job is {"module": name, "name": class or method or None,
+    "tests": [names] or None, "failed": [test ids] or None}, where failed
+    tests are run first. The jobs are fed to the workers by one thread per
+    worker, so results can be collected while other tests run in the GUI
+    process.
+    """
+
+    def __init__(self, package, config, log_path, processes=None):
+        self.package = package
+        self.config = config
+        self.log_path = log_path
+        self.processes = processes or multiprocessing.cpu_count()
+        self.jobs = Queue()
+        self.results = Queue()
+        self.threads = []
+        self.workers = []
+        self.remaining = 0
+        self.stopped = False
+
+    def start(self, jobs):
+        """Start running jobs."""
+        for job in jobs:
+            self.jobs.put(job)
+            self.remaining += 1
+        for number in range(min(self.processes, self.remaining)):
+            worker = WorkerProcess(
+                self.package, self.config, self.log_path.format(number))
+            thread = threading.Thread(target=self.feed, args=(worker,))
+            thread.daemon = True
+            thread.start()
+            self.workers.append(worker)
+            self.threads.append(thread)
+
+    def feed(self, worker):
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None or self.stopped:
+                    break
+                self.results.put((job, worker.run(job)))
+        finally:
+            worker.stop()
+
+    def collect(self, timeout=None):
+        """Return (job, result) for the next job to finish, or None if none
+        finishes within timeout seconds.
+        """
+        try:
+            finished = self.results.get(timeout=timeout)
+        except Empty:
+            return None
+        self.remaining -= 1
+        return finished
+
+    def stop(self):
+        """Stop the workers, killing any which are still running a job."""
+        self.stopped = True
+        while True:
+            try:
+                self.jobs.get_nowait()
+            except Empty:
+                break
+        for _ in self.threads:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.kill()
+        for thread in self.threads:
+            thread.join()
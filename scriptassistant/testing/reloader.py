@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+"""
+Reloading only the modules that need it: the modules imported from the
+test, script and helper folders whose files have changed since they were
+loaded, and the modules which depend on them, in dependency order.
+"""
+
+import os
+import sys
+import inspect
+
+from ..sync.script_index import is_within
+from inspection import ParsedModule
+
+
+def source_path(module):
+    """Return the source file of a module, or None if it has no file."""
+    path = getattr(module, "__file__", None)
+    if not path:
+        return None
+    if path.endswith((".pyc", ".pyo")):
+        path = path[:-1]
+    return os.path.abspath(path)
+
+
+def file_signature(path):
+    """Return [size, mtime] of a file, or None if it cannot be found."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime]
+
+
+def module_dependencies(modules):
+    """Return {module name: set(names)} of the modules in modules which each
+    module uses, whether imported as a module or as a name from it.
+
+    The imports of each module are parsed, as a constant imported from a
+    module does not know where it came from, and the names in each module
+    are checked for those imported some other way.
+    """
+    dependencies = {}
+    for name, module in modules.items():
+        used = set()
+        path = source_path(module)
+        if path and os.path.isfile(path):
+            for candidates, attribute in ParsedModule(name, path).imports.values():
+                used.update(candidates)
+                if attribute is not None:
+                    # from package import module
+                    used.update("{}.{}".format(candidate, attribute) for candidate in candidates)
+        for value in vars(module).values():
+            if inspect.ismodule(value):
+                used.add(value.__name__)
+            else:
+                used.add(getattr(value, "__module__", None))
+        used.discard(name)
+        dependencies[name] = used & set(modules)
+    return dependencies
+
+
+def dependency_order(names, dependencies):
+    """Return names sorted so that each module comes after the modules it
+    depends on. Modules in an import cycle are sorted by name.
+    """
+    names = set(names)
+    pending = dict((name, dependencies.get(name, set()) & names) for name in names)
+    order = []
+    while pending:
+        ready = sorted(name for name, used in pending.items() if not used)
+        if not ready:
+            # An import cycle: reload what remains by name.
+            ready = sorted(pending)
+        for name in ready:
+            del pending[name]
+        for used in pending.values():
+            used.difference_update(ready)
+        order.extend(ready)
+    return order
+
+
+class ModuleReloader(object):
+    """Tracks the modules imported from a set of folders, with the size and
+    mtime their file had when they were loaded.
+    """
+
+    def __init__(self):
+        # {module name: [size, mtime]}
+        self.loaded = {}
+
+    @staticmethod
+    def tracked_modules(folders):
+        """Return {name: module} of the loaded modules within folders."""
+        folders = [os.path.abspath(folder) for folder in folders if folder]
+        modules = {}
+        for name, module in sys.modules.items():
+            path = source_path(module) if module is not None else None
+            if path and any(is_within(path, folder) for folder in folders):
+                modules[name] = module
+        return modules
+
+    def update(self, folders):
+        """Record the modules within folders imported since the last update,
+        and forget the modules which are no longer loaded.
+        """
+        modules = self.tracked_modules(folders)
+        for name in list(self.loaded):
+            if name not in modules:
+                del self.loaded[name]
+        for name, module in modules.items():
+            if name not in self.loaded:
+                self.loaded[name] = file_signature(source_path(module))
+
+    def reload(self, folders, force=()):
+        """Reload the modules within folders whose files have changed since
+        they were loaded, the modules in force which are loaded, and every
+        module which depends on them. Return the names of the modules
+        reloaded, in the order they were reloaded.
+        """
+        self.update(folders)
+        modules = self.tracked_modules(folders)
+        stale = set(name for name in force if name in modules)
+        for name, module in modules.items():
+            if file_signature(source_path(module)) != self.loaded[name]:
+                stale.add(name)
+        if not stale:
+            return []
+
+        dependencies = module_dependencies(modules)
+        dependents = {}
+        for name, used in dependencies.items():
+            for used_name in used:
+                dependents.setdefault(used_name, set()).add(name)
+        pending = list(stale)
+        while pending:
+            for name in dependents.get(pending.pop(), ()):
+                if name not in stale:
+                    stale.add(name)
+                    pending.append(name)
+
+        order = dependency_order(stale, dependencies)
+        for name in order:
+            module = sys.modules[name]
+            reload(module)
+            self.loaded[name] = file_signature(source_path(module))
+        return order
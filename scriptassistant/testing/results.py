@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test results which make a record of each test as it finishes, for the
+test results panel or an export, rather than writing each test to a
+stream.
+"""
+
+import sys
+import time
+import unittest
+from StringIO import StringIO
+
+from outcomes import PASSED, FAILED, SKIPPED
+from timing import cpu_time
+
+ERROR = "error"
+EXPECTED_FAILURE = "expected failure"
+UNEXPECTED_SUCCESS = "unexpected success"
+
+
+def make_record(test_id, description, status, duration=None, detail=None, cpu=None,
+                output=None):
+    """Return the record of a test: its id and description, its status,
+    the wall and CPU time it took in seconds (None if unknown), its
+    traceback or skip reason and what it printed, if captured (None if
+    there is none).
+    """
+    return {
+        "id": test_id,
+        "description": description,
+        "status": status,
+        "duration": duration,
+        "cpu": cpu,
+        "detail": detail,
+        "output": output,
+    }
+
+
+class StreamingResult(unittest.TestResult):
+    """A TestResult which makes a record of each test as it finishes and
+    passes it to on_record, without keeping it, e.g. to write it to a file.
+
+    If capture is True, what each test writes to stdout and stderr is kept
+    in its record instead. Other keyword arguments are passed on to the
+    next TestResult class, e.g. unittest.TextTestResult in a subclass of
+    both.
+    """
+
+    def __init__(self, on_record=None, capture=False, **kwargs):
+        super(StreamingResult, self).__init__(**kwargs)
+        self.on_record = on_record
+        self.capture = capture
+        self.start_time = None
+        self.start_cpu = None
+        self.status = None
+        self.detail = None
+        self.captured = None
+
+    def startTest(self, test):
+        super(StreamingResult, self).startTest(test)
+        if self.capture:
+            self.captured = (sys.stdout, sys.stderr, StringIO())
+            sys.stdout = sys.stderr = self.captured[2]
+        self.start_time = time.time()
+        self.start_cpu = cpu_time()
+        self.status = PASSED
+        self.detail = None
+
+    def stopTest(self, test):
+        wall = time.time() - self.start_time
+        cpu = cpu_time() - self.start_cpu
+        output = None
+        if self.captured is not None:
+            sys.stdout, sys.stderr, buffer = self.captured
+            self.captured = None
+            output = buffer.getvalue() or None
+        super(StreamingResult, self).stopTest(test)
+        self.add_record(test, self.status, wall, self.detail, cpu, output)
+        self.add_timing(test.id(), wall, cpu)
+        self.start_time = None
+
+    def add_record(self, test, status, duration=None, detail=None, cpu=None, output=None):
+        self.report(make_record(test.id(), str(test), status, duration, detail, cpu, output))
+
+    def report(self, record):
+        if self.on_record is not None:
+            self.on_record(record)
+
+    def add_timing(self, timing_id, wall, cpu):
+        """The timings are not kept."""
+
+    def set_status(self, test, status, detail=None):
+        if self.start_time is None:
+            # An error in a class or module fixture, outside of any test.
+            self.add_record(test, status, None, detail)
+        else:
+            self.status = status
+            self.detail = detail
+
+    def addError(self, test, err):
+        super(StreamingResult, self).addError(test, err)
+        self.set_status(test, ERROR, self.errors[-1][1])
+
+    def addFailure(self, test, err):
+        super(StreamingResult, self).addFailure(test, err)
+        self.set_status(test, FAILED, self.failures[-1][1])
+
+    def addSkip(self, test, reason):
+        super(StreamingResult, self).addSkip(test, reason)
+        self.set_status(test, SKIPPED, reason)
+
+    def addExpectedFailure(self, test, err):
+        super(StreamingResult, self).addExpectedFailure(test, err)
+        self.set_status(test, EXPECTED_FAILURE, self.expectedFailures[-1][1])
+
+    def addUnexpectedSuccess(self, test):
+        super(StreamingResult, self).addUnexpectedSuccess(test)
+        self.set_status(test, UNEXPECTED_SUCCESS)
+
+
+class CollectingResult(StreamingResult):
+    """A StreamingResult which also keeps the record of each test in
+    records.
+
+    The [timing id, wall, cpu] timings of the tests, and of any fixtures
+    or imports added with add_timing, are kept in timings.
+    """
+
+    def __init__(self, on_record=None, capture=False, **kwargs):
+        super(CollectingResult, self).__init__(on_record, capture, **kwargs)
+        self.records = []
+        self.timings = []
+
+    def report(self, record):
+        self.records.append(record)
+        super(CollectingResult, self).report(record)
+
+    def add_timing(self, timing_id, wall, cpu):
+        self.timings.append([timing_id, wall, cpu])
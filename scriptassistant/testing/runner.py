@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""
+Running tests cooperatively on the GUI thread: one test at a time, going
+back to the Qt event loop between tests, so that QGIS stays usable while
+tests run and a run can be cancelled between two tests.
+
+A run is a generator (see steps.py) which runs a test each time it is
+advanced and yields the test it ran. Closing the generator cancels the
+run, running any class and module tear downs that are due.
+"""
+
+import traceback
+
+from PyQt4.QtCore import pyqtSignal, pyqtSlot, QObject, QTimer
+
+# Milliseconds to wait before advancing a run which is waiting, e.g. for
+# worker processes, so that QGIS isn't kept busy polling them.
+WAIT_INTERVAL = 100
+
+
+class CooperativeRunner(QObject):
+    """Advances a test run one test at a time from the Qt event loop.
+
+    testFinished is emitted with the number of tests run so far and the
+    test just run. A run may also yield None to go back to the event loop
+    while it waits, e.g. for worker processes, and is then advanced again
+    after WAIT_INTERVAL milliseconds. runFinished is emitted with
+    True if the run was cancelled, or False if it finished.
+    """
+
+    testFinished = pyqtSignal(int, object)
+    runFinished = pyqtSignal(bool)
+
+    def __init__(self, steps, parent=None):
+        """Constructor."""
+        super(CooperativeRunner, self).__init__(parent)
+        self.steps = steps
+        self.count = 0
+        self.running = False
+        self.cancel_requested = False
+
+    def start(self):
+        self.running = True
+        QTimer.singleShot(0, self.step)
+
+    def cancel(self):
+        """Cancel the run once the current test has finished."""
+        self.cancel_requested = True
+
+    def stop(self):
+        """Cancel the run straight away, e.g. when the plugin is unloaded."""
+        if self.running:
+            self.finish(True)
+
+    def is_running(self):
+        return self.running
+
+    @pyqtSlot()
+    def step(self):
+        if not self.running:
+            return
+        if self.cancel_requested:
+            self.finish(True)
+            return
+        try:
+            test = next(self.steps)
+        except StopIteration:
+            self.finish(False)
+            return
+        except Exception:
+            # A bug in the run itself; test modules which fail to import
+            # are recorded as errors by the run.
+            traceback.print_exc()
+            self.finish(False)
+            return
+        if test is None:
+            QTimer.singleShot(WAIT_INTERVAL, self.step)
+            return
+        self.count += 1
+        self.testFinished.emit(self.count, test)
+        QTimer.singleShot(0, self.step)
+
+    def finish(self, cancelled):
+        self.running = False
+        try:
+            self.steps.close()
+        except Exception:
+            traceback.print_exc()
+        self.runFinished.emit(cancelled)
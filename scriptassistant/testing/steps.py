@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+"""
+Running the tests of a suite one at a time, so that a run can go back to
+the Qt event loop between tests (see runner.py) and be cancelled.
+"""
+
+import unittest
+
+from outcomes import iterate_tests
+from timing import Stopwatch, fixture_timing_id
+
+
+def suite_steps(suite, result):
+    """Run the tests in a suite one at a time with their class and module
+    fixtures, as TestSuite.run does, yielding each test after it has run
+    (or been skipped due to a failed fixture).
+
+    If the result has an add_timing method, the time taken by the fixtures
+    run before the first test of each test case class is added with it.
+    """
+    fixtures = unittest.TestSuite()
+    result._testRunEntered = True
+    result.startTestRun()
+    try:
+        for test in iterate_tests(suite):
+            if result.shouldStop:
+                break
+            new_class = test.__class__ is not getattr(result, "_previousTestClass", None)
+            with Stopwatch() as fixture_time:
+                fixtures._tearDownPreviousClass(test, result)
+                fixtures._handleModuleFixture(test, result)
+                fixtures._handleClassSetUp(test, result)
+            if new_class and hasattr(result, "add_timing"):
+                result.add_timing(
+                    fixture_timing_id(test.__class__), fixture_time.wall, fixture_time.cpu)
+            result._previousTestClass = test.__class__
+            if not (getattr(test.__class__, "_classSetupFailed", False) or
+                    getattr(result, "_moduleSetUpFailed", False)):
+                test(result)
+            yield test
+    finally:
+        fixtures._tearDownPreviousClass(None, result)
+        fixtures._handleModuleTearDown(result)
+        result._testRunEntered = False
+        result.stopTestRun()
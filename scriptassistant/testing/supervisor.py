@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+
+"""
+Running test modules one at a time in a supervised worker process, so that
+a test which never finishes (e.g. a processing script stuck in a loop)
+can't hang QGIS.
+
+The worker process (see headless.py) streams each test's record as it
+finishes. A watchdog thread in the worker process reports the stack of
+the test when it runs longer than the test timeout, or its module runs
+longer than the module timeout. The test is then recorded as an error
+with that stack, the worker process is killed, and a new one runs the
+rest of the module's tests. A worker process which doesn't respond, or
+exits, is treated the same way.
+"""
+
+import sys
+import json
+import time
+import threading
+import traceback
+from Queue import Queue, Empty
+
+from parallel import WorkerProcess
+from outcomes import FAILED, SKIPPED, FIXTURE_ERROR
+from results import make_record, ERROR, EXPECTED_FAILURE, UNEXPECTED_SUCCESS
+
+SUPERVISED = "supervised"
+
+TEST_TIMEOUT = "test"
+MODULE_TIMEOUT = "module"
+
+# The default timeouts (seconds).
+DEFAULT_TEST_TIMEOUT = 60
+DEFAULT_MODULE_TIMEOUT = 600
+
+# How often the watchdog checks the time taken (seconds).
+WATCHDOG_INTERVAL = 0.5
+
+# How much longer than a timeout to wait for the watchdog before killing
+# an unresponsive worker process without a stack (seconds), e.g. when a
+# test is stuck in C code which holds the GIL.
+GRACE_PERIOD = 10
+
+
+def timeout_setting(setting, default):
+    """Return the timeout in seconds for a setting value, or None if there
+    is no timeout.
+    """
+    try:
+        seconds = float(setting)
+    except (TypeError, ValueError):
+        seconds = default
+    return seconds if seconds > 0 else None
+
+
+def thread_stack(thread_id):
+    """Return the formatted stack of a running thread."""
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return ""
+    return "".join(traceback.format_stack(frame))
+
+
+class Watchdog(threading.Thread):
+    """Watches the tests run by a thread, calling on_timeout(limit, stack)
+    once if a test runs longer than test_timeout seconds (measured from
+    when the previous test finished, so including the fixtures run before
+    it) or all the tests run longer than module_timeout seconds.
+    """
+
+    def __init__(self, test_timeout, module_timeout, on_timeout, thread_id=None):
+        super(Watchdog, self).__init__()
+        self.daemon = True
+        self.test_timeout = test_timeout
+        self.module_timeout = module_timeout
+        self.on_timeout = on_timeout
+        self.thread_id = thread_id or threading.current_thread().ident
+        self.started = self.test_started = time.time()
+        self.finished = threading.Event()
+
+    def touch(self):
+        """Note that a test has finished."""
+        self.test_started = time.time()
+
+    def expired(self, now):
+        """Return the limit which has been exceeded, or None."""
+        if self.module_timeout and now - self.started > self.module_timeout:
+            return MODULE_TIMEOUT
+        if self.test_timeout and now - self.test_started > self.test_timeout:
+            return TEST_TIMEOUT
+        return None
+
+    def run(self):
+        while not self.finished.wait(WATCHDOG_INTERVAL):
+            limit = self.expired(time.time())
+            if limit is not None:
+                self.on_timeout(limit, thread_stack(self.thread_id))
+                return
+
+    def stop(self):
+        self.finished.set()
+
+
+def records_to_json(tests, records, timings, accessed):
+    """Return the JSON result of the tests run, as parallel.result_to_json,
+    from their records. As with unittest, errors in class and module
+    fixtures are not counted as tests run.
+    """
+    def entries(status, detail=True):
+        return [
+            [record["id"], record["description"]] + ([record["detail"]] if detail else [])
+            for record in records if record["status"] == status
+        ]
+
+    return {
+        "tests": tests,
+        "testsRun": len([record for record in records if not FIXTURE_ERROR.match(record["id"])]),
+        "errors": entries(ERROR),
+        "failures": entries(FAILED),
+        "skipped": entries(SKIPPED),
+        "expectedFailures": entries(EXPECTED_FAILURE),
+        "unexpectedSuccesses": entries(UNEXPECTED_SUCCESS, False),
+        "records": records,
+        "timings": timings,
+        "accessed": sorted(accessed),
+    }
+
+
+class SupervisedWorker(WorkerProcess):
+    """A worker process whose output is read on a thread, so that it can be
+    waited on with a timeout, and which can be killed and started again.
+    """
+
+    def __init__(self, package, config, log_path):
+        super(SupervisedWorker, self).__init__(package, config, log_path)
+        self.lines = None
+
+    def start(self):
+        super(SupervisedWorker, self).start()
+        self.lines = Queue()
+        thread = threading.Thread(target=self.read, args=(self.process.stdout, self.lines))
+        thread.daemon = True
+        thread.start()
+
+    @staticmethod
+    def read(stream, lines):
+        for line in iter(stream.readline, ""):
+            lines.put(line)
+        # The process has exited.
+        lines.put(None)
+
+    def next_line(self, timeout):
+        """Return the next line written by the process, "" if there is none
+        within timeout seconds, or None if the process has exited.
+        """
+        try:
+            return self.lines.get(timeout=timeout)
+        except Empty:
+            return ""
+
+    def kill(self):
+        """Kill the process. The next job starts a new one."""
+        if self.process is not None:
+            try:
+                self.process.kill()
+            except OSError:
+                pass
+            self.stop()
+
+
+class SupervisedJob(object):
+    """A job run in a supervised worker process, restarting the worker
+    process to run the rest of the job's tests after a test times out.
+    Call poll until finished, then get the JSON result with result.
+    """
+
+    def __init__(self, worker, job, test_timeout=None, module_timeout=None):
+        self.worker = worker
+        self.job = job
+        self.test_timeout = test_timeout
+        self.module_timeout = module_timeout
+        self.started = time.time()
+        # The ids of the job's tests in the order they are run, once known.
+        self.tests = None
+        self.records = []
+        self.recorded = set()
+        self.timings = []
+        self.accessed = set()
+        self.finished = False
+        self.attempt_records = []
+        self.last_event = None
+        self.start(self.job)
+
+    def start(self, job):
+        """Send the job to the worker process, starting it if needed."""
+        self.attempt_records = []
+        self.last_event = time.time()
+        if self.module_timeout:
+            job = dict(job, module_timeout=self.module_timeout - (self.last_event - self.started))
+        else:
+            job = dict(job, module_timeout=None)
+        job["test_timeout"] = self.test_timeout
+        try:
+            if self.worker.process is None:
+                self.worker.start()
+            self.worker.send(job)
+        except (IOError, OSError) as error:
+            self.worker.kill()
+            self.add(make_record(
+                self.job["module"], self.job["module"], ERROR, None,
+                "The worker process could not be run: {}".format(error)))
+            self.finished = True
+
+    def poll(self, timeout):
+        """Handle what the worker process has written within timeout
+        seconds, returning the records of the tests which have finished.
+        """
+        first = len(self.records)
+        line = self.worker.next_line(timeout)
+        while line and not self.finished:
+            self.handle(json.loads(line))
+            line = self.worker.next_line(0)
+        if not self.finished:
+            if line is None:
+                self.stop_test(self.worker.exit_message())
+            else:
+                self.check_responding(time.time())
+        return self.records[first:]
+
+    def handle(self, message):
+        event = message.get("event")
+        if event == "timeout":
+            self.stop_test("{} Stack of the test process:\n\n{}".format(
+                self.timeout_message(message["limit"]), message["stack"]), message["limit"])
+            return
+        self.last_event = time.time()
+        if event == "tests":
+            if self.tests is None:
+                self.tests = message["tests"]
+        elif event == "record":
+            self.add(message["record"])
+            self.attempt_records.append(message["record"])
+        else:
+            # The result of the job, whose records have already been sent.
+            self.timings.extend(message["timings"])
+            self.accessed.update(message["accessed"])
+            self.finished = True
+
+    def check_responding(self, now):
+        """Kill a worker process which has run past a timeout without the
+        watchdog reporting it.
+        """
+        if self.test_timeout and now - self.last_event > self.test_timeout + GRACE_PERIOD:
+            limit = TEST_TIMEOUT
+        elif self.module_timeout and now - self.started > self.module_timeout + GRACE_PERIOD:
+            limit = MODULE_TIMEOUT
+        else:
+            return
+        self.stop_test("{} The test process did not respond, so no stack is available.".format(
+            self.timeout_message(limit)), limit)
+
+    def timeout_message(self, limit):
+        seconds = self.module_timeout if limit == MODULE_TIMEOUT else self.test_timeout
+        return "Timed out after {:g} seconds ({} timeout).".format(seconds, limit)
+
+    def remaining(self):
+        """The ids of the tests which have not finished, or None if the
+        tests were never loaded.
+        """
+        if self.tests is None:
+            return None
+        return [test_id for test_id in self.tests if test_id not in self.recorded]
+
+    def stop_test(self, message, limit=None):
+        """Record the running test as an error, kill the worker process and
+        run the rest of the tests in a new one, unless the module timed out.
+        The limit is None if the worker process exited by itself.
+        """
+        self.worker.kill()
+        self.timings.extend(
+            [record["id"], record["duration"], record["cpu"]]
+            for record in self.attempt_records if record["duration"] is not None)
+        remaining = self.remaining()
+        if not remaining:
+            # Stuck or crashed while importing the module or after its last test.
+            self.add(make_record(self.job["module"], self.job["module"], ERROR, None, message))
+            self.finished = True
+            return
+        self.add(make_record(
+            remaining[0], remaining[0], ERROR, time.time() - self.last_event, message))
+        if limit == MODULE_TIMEOUT and len(remaining) > 1:
+            self.add(make_record(
+                self.job["module"], self.job["module"], ERROR, None,
+                "{} tests were not run as the module timed out.".format(len(remaining) - 1)))
+        if limit == MODULE_TIMEOUT or len(remaining) == 1:
+            self.finished = True
+        else:
+            self.start(dict(self.job, skip=sorted(self.recorded)))
+
+    def add(self, record):
+        self.records.append(record)
+        self.recorded.add(record["id"])
+
+    def result(self):
+        """Return the JSON result of the job's tests which finished, and of
+        the module itself if it had an error, e.g. it timed out.
+        """
+        tests = [test_id for test_id in self.tests or [] if test_id in self.recorded]
+        if self.job["module"] in self.recorded:
+            tests.append(self.job["module"])
+        return records_to_json(tests, self.records, self.timings, self.accessed)
+
+
+class SupervisedRunner(object):
+    """Runs jobs (see parallel.ParallelRunner) one at a time in a single
+    supervised worker process, with the given timeouts in seconds.
+    """
+
+    def __init__(self, package, config, log_path, test_timeout=None, module_timeout=None):
+        self.worker = SupervisedWorker(package, dict(config, supervised=True), log_path)
+        self.test_timeout = test_timeout
+        self.module_timeout = module_timeout
+
+    def run(self, job):
+        """Start running a job, returning its SupervisedJob."""
+        return SupervisedJob(self.worker, job, self.test_timeout, self.module_timeout)
+
+    def stop(self):
+        """Stop the worker process, killing it if it is running a job."""
+        self.worker.kill()
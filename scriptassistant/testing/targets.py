@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test targets selected in the test menu: a whole test module, a test case
+class or a single test method, named by dotted path (e.g.
+test_module.ExampleTest.test_method), or a target for several test modules.
+"""
+
+# Every test module, and the test modules affected by changes since they
+# last passed.
+ALL_TESTS = "$ALL"
+AFFECTED_TESTS = "$AFFECTED"
+SUITE_TARGETS = (ALL_TESTS, AFFECTED_TESTS)
+
+
+def split_target(test_index, target):
+    """Split a dotted test target into its module name and the name of the
+    class or method within that module (None for a whole module).
+
+    Returns None if the target is not in the test index.
+    """
+    module = target
+    names = []
+    while module:
+        if module in test_index:
+            if not names:
+                return module, None
+            classes = test_index[module]["classes"]
+            if names[0] in classes and (
+                    len(names) == 1 or
+                    (len(names) == 2 and names[1] in classes[names[0]])):
+                return module, ".".join(names)
+            return None
+        module, _, name = module.rpartition(".")
+        names.insert(0, name)
+    return None
+
+
+def module_targets(test_index, module):
+    """Yield (class target, [method targets]) for each test case class in
+    a test module, in alphabetical order.
+    """
+    for class_name, methods in sorted(test_index[module]["classes"].items()):
+        class_target = "{}.{}".format(module, class_name)
+        yield class_target, ["{}.{}".format(class_target, method) for method in methods]
+
+
+def count_tests(test_index, target, tests=None):
+    """Return the number of test methods a test target runs, or only the
+    classes or methods named in tests within it, according to the test
+    index. Tests which are only known once a module is imported (e.g.
+    test methods added at import) are not counted.
+    """
+    split = split_target(test_index, target)
+    if split is None:
+        return 0
+    module, name = split
+    classes = test_index[module]["classes"]
+    if tests:
+        names = tests
+    elif name:
+        names = [name]
+    else:
+        names = classes
+    count = 0
+    for name in names:
+        class_name, _, method = name.partition(".")
+        if method:
+            count += 1
+        else:
+            count += len(classes.get(class_name, []))
+    return count
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+"""
+Timing of test runs: the wall and CPU time of each test, of each test case
+class's fixtures and of importing each test module, kept between sessions
+so that the slowest tests and the tests which have become slower can be
+reported at the end of a run.
+"""
+
+import os
+import time
+
+from ..store import JsonStore
+
+# The number of durations kept for each timing.
+HISTORY_LENGTH = 10
+
+# Timings shorter than this are too noisy to be flagged as regressions.
+MIN_REGRESSION = 0.05
+
+DEFAULT_RATIO = 2.0
+
+
+def cpu_time():
+    """Return the user and system CPU time used by this process."""
+    times = os.times()
+    return times[0] + times[1]
+
+
+def import_timing_id(module_name):
+    return "{} (import)".format(module_name)
+
+
+def fixture_timing_id(test_class):
+    return "{}.{} (fixtures)".format(test_class.__module__, test_class.__name__)
+
+
+def regression_ratio(setting):
+    """Return the regression ratio for a setting value, or None if
+    regressions should not be flagged.
+    """
+    try:
+        ratio = float(setting)
+    except (TypeError, ValueError):
+        ratio = DEFAULT_RATIO
+    if ratio <= 1.0:
+        return None
+    return ratio
+
+
+class Stopwatch(object):
+    """Measures the wall and CPU time taken within a with block."""
+
+    def __init__(self):
+        self.wall = None
+        self.cpu = None
+        self.start = None
+
+    def __enter__(self):
+        self.start = (time.time(), cpu_time())
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall = time.time() - self.start[0]
+        self.cpu = cpu_time() - self.start[1]
+        return False
+
+
+class TimingHistory(JsonStore):
+    """The last HISTORY_LENGTH [wall, cpu] durations of each timing, keyed
+    by timing id (a test id, or an import or fixtures timing id), oldest
+    first.
+    """
+
+    def record(self, timings):
+        """Record the [timing id, wall, cpu] timings of a run."""
+        for timing_id, wall, cpu in timings:
+            history = self.data.setdefault(timing_id, [])
+            history.append([wall, cpu])
+            del history[:-HISTORY_LENGTH]
+
+    def usual(self, timing_id):
+        """Return the median wall time of a timing before the latest run,
+        or None if it has no earlier runs.
+        """
+        history = self.data.get(timing_id, [])[:-1]
+        if not history:
+            return None
+        walls = sorted(wall for wall, _ in history)
+        middle = len(walls) // 2
+        if len(walls) % 2:
+            return walls[middle]
+        return (walls[middle - 1] + walls[middle]) / 2.0
+
+    def is_regression(self, timing_id, wall, ratio):
+        """Return True if the latest wall time of a timing is more than
+        ratio times its usual wall time.
+        """
+        if ratio is None or wall < MIN_REGRESSION:
+            return False
+        usual = self.usual(timing_id)
+        return usual is not None and wall > usual * ratio
+
+    def trend(self, timing_id):
+        """Return the recorded wall times of a timing, e.g. 0.52 0.49 1.31."""
+        return " ".join("{:.2f}".format(wall) for wall, _ in self.data.get(timing_id, []))
+
+
+def timing_report(timings, history, ratio=None, count=10):
+    """Return the lines of a report of the count slowest [timing id, wall,
+    cpu] timings of a run with their trend in history, followed by the
+    timings which regressed by more than ratio. The run should already be
+    recorded in history.
+    """
+    lines = []
+    slowest = sorted(timings, key=lambda timing: timing[1], reverse=True)[:count]
+    if slowest:
+        lines.append("SLOWEST:\n")
+        lines.append("{: >9} {: >9}  {}".format("Wall (s)", "CPU (s)", "Test"))
+        for timing_id, wall, cpu in slowest:
+            lines.append("{: >9.3f} {: >9.3f}  {}".format(wall, cpu, timing_id))
+            lines.append("{: >21}History: {}".format("", history.trend(timing_id)))
+        lines.append("")
+    regressions = [
+        (timing_id, wall) for timing_id, wall, _ in timings
+        if history.is_regression(timing_id, wall, ratio)
+    ]
+    if regressions:
+        lines.append("SLOWER THAN USUAL (more than {:g} times):\n".format(ratio))
+        for timing_id, wall in regressions:
+            lines.append("{} took {:.3f}s, usually {:.3f}s".format(
+                timing_id, wall, history.usual(timing_id)))
+        lines.append("")
+    return lines
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+from PyQt4.QtCore import pyqtSignal, QThread
+
+
+class DiscoveryWorker(QThread):
+    """Runs test discovery for a test folder off the GUI thread.
+
+    discoveryFinished is emitted with the test folder, the test index and
+    None, or the test folder, None and the error raised. Slots connected
+    from the GUI thread are called via the GUI event loop, so they may
+    safely rebuild the test menu.
+    """
+
+    discoveryFinished = pyqtSignal(object, object, object)
+
+    def __init__(self, test_folder, discover, parent=None):
+        """Constructor."""
+        super(DiscoveryWorker, self).__init__(parent)
+        self.test_folder = test_folder
+        self.discover = discover
+
+    def run(self):
+        try:
+            tests = self.discover(self.test_folder)
+        except Exception as error:
+            # Report any error, so the plugin never waits on a finished thread.
+            self.discoveryFinished.emit(self.test_folder, None, error)
+        else:
+            self.discoveryFinished.emit(self.test_folder, tests, None)
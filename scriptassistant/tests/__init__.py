@@ -2,11 +2,58 @@
 
 import sys
 import unittest
+from functools import partial
 
+import benchmark_reload
+from ..testing.export import ExportingTextResult, exporter_from_environment
 from test_script_assistant import ScriptAssistantSettingsTest
+from test_script_sync import ScriptSyncTest, ScriptMetadataIndexTest, DirectoryIndexTest
+from test_test_discovery import DiscoveryCacheTest, StaticDiscoveryTest, TestTargetTest
+from test_test_impact import TestImpactTest
+from test_test_outcomes import TestOutcomeTest
+from test_test_parallel import TestParallelTest
+from test_test_fixtures import TestFixtureTest
+from test_test_reload import TestReloadTest
+from test_test_steps import TestStepsTest
+from test_test_results import TestResultsTest
+from test_test_timing import TestTimingTest
+from test_test_export import TestExportTest
+from test_test_supervisor import TestSupervisorTest
 
 
 def run_tests():
     suite = unittest.TestSuite()
     suite.addTests(unittest.makeSuite(ScriptAssistantSettingsTest, "test"))
-    unittest.TextTestRunner(verbosity=2, stream=sys.stdout).run(suite)
+    suite.addTests(unittest.makeSuite(ScriptSyncTest, "test"))
+    suite.addTests(unittest.makeSuite(ScriptMetadataIndexTest, "test"))
+    suite.addTests(unittest.makeSuite(DirectoryIndexTest, "test"))
+    suite.addTests(unittest.makeSuite(DiscoveryCacheTest, "test"))
+    suite.addTests(unittest.makeSuite(StaticDiscoveryTest, "test"))
+    suite.addTests(unittest.makeSuite(TestTargetTest, "test"))
+    suite.addTests(unittest.makeSuite(TestImpactTest, "test"))
+    suite.addTests(unittest.makeSuite(TestOutcomeTest, "test"))
+    suite.addTests(unittest.makeSuite(TestParallelTest, "test"))
+    suite.addTests(unittest.makeSuite(TestFixtureTest, "test"))
+    suite.addTests(unittest.makeSuite(TestReloadTest, "test"))
+    suite.addTests(unittest.makeSuite(TestStepsTest, "test"))
+    suite.addTests(unittest.makeSuite(TestResultsTest, "test"))
+    suite.addTests(unittest.makeSuite(TestTimingTest, "test"))
+    suite.addTests(unittest.makeSuite(TestExportTest, "test"))
+    suite.addTests(unittest.makeSuite(TestSupervisorTest, "test"))
+    # Export the results for CI if $SCRIPT_ASSISTANT_JUNIT_XML or
+    # $SCRIPT_ASSISTANT_JSON_LINES is set.
+    exporter = exporter_from_environment()
+    if exporter is None:
+        unittest.TextTestRunner(verbosity=2, stream=sys.stdout).run(suite)
+        return
+    try:
+        unittest.TextTestRunner(
+            verbosity=2, stream=sys.stdout,
+            resultclass=partial(ExportingTextResult, exporter)).run(suite)
+    finally:
+        exporter.close()
+
+
+def run_benchmarks():
+    if not benchmark_reload.run_benchmarks():
+        raise AssertionError("Script reload benchmark thresholds were exceeded.")
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks how reloading scripts scales with the size of the script folder.
+
+Synthetic script folders of each size are generated, mixing valid processing
+scripts with scripts that have no processing header or a syntax error, and
+the sync engine is timed for:
+
+* cold - no manifest or caches and an empty processing folder
+* warm - caches reloaded from disk (as after a QGIS restart) and every
+  script touched without its content changing
+* noop - nothing has changed
+* single_change - one script has been edited
+* index_cold / index_warm - parsing every script header, then querying the
+  cached headers
+
+When run inside QGIS, refreshing the processing script provider is also
+timed, both in full (provider_full) and for a single changed script
+(provider_single_change).
+
+Results are printed as a table and written as JSON. Each result has a
+threshold in milliseconds per script, and the run fails if any is exceeded.
+
+Run within QGIS (or via qgis_testrunner.sh) with
+scriptassistant.tests.run_benchmarks, or headless with the directory
+containing scriptassistant on the PYTHONPATH:
+
+    python scriptassistant/tests/benchmark_reload.py
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+from scriptassistant.sync.compiler import CompileCache
+from scriptassistant.sync.engine import sync_scripts
+from scriptassistant.sync.manifest import ScriptManifest
+from scriptassistant.sync.scanner import DirectoryIndex
+from scriptassistant.sync.script_index import ScriptMetadataIndex
+
+SIZES = [10, 100, 1000, 10000]
+
+# Milliseconds per script which a scenario may not exceed.
+THRESHOLDS = {
+    "cold": 3.0,
+    "warm": 1.5,
+    "noop": 0.3,
+    "single_change": 0.3,
+    "index_cold": 0.5,
+    "index_warm": 0.01,
+    "provider_full": 20.0,
+    "provider_single_change": 0.5,
+}
+
+# Every NO_HEADER_EVERY'th script is not a processing script, and every
+# SYNTAX_ERROR_EVERY'th has a syntax error.
+NO_HEADER_EVERY = 10
+SYNTAX_ERROR_EVERY = 25
+
+SCRIPT_TEMPLATE = """# -*- coding: utf-8 -*-
+##Benchmark=group
+##Input_{index}=vector
+##Distance_{index}=number 10.0
+##Output_{index}=output vector
+
+layer = processing.getObject(Input_{index})
+output = Output_{index}
+"""
+
+NO_HEADER_TEMPLATE = """# -*- coding: utf-8 -*-
+\"\"\"Helper module {index}, not a processing script.\"\"\"
+
+def helper_{index}():
+    return {index}
+"""
+
+
+def write_script(path, index, edited=False):
+    if index % NO_HEADER_EVERY == 0:
+        text = NO_HEADER_TEMPLATE.format(index=index)
+    else:
+        text = SCRIPT_TEMPLATE.format(index=index)
+        if index % SYNTAX_ERROR_EVERY == 0:
+            text += "if True\n    pass\n"
+    if edited:
+        text += "# edited\n"
+    with open(path, "w") as script:
+        script.write(text)
+
+
+def generate_script_folder(folder, size):
+    """Write size synthetic scripts to folder, spread over groups of 100."""
+    paths = []
+    for index in range(1, size + 1):
+        group_dir = os.path.join(folder, "group_{}".format(index // 100))
+        if not os.path.isdir(group_dir):
+            os.makedirs(group_dir)
+        path = os.path.join(group_dir, "script_{}.py".format(index))
+        write_script(path, index)
+        paths.append(path)
+    # Back-date everything so directory listings can be cached.
+    for directory, _, filenames in os.walk(folder):
+        os.utime(directory, (0, 0))
+        for filename in filenames:
+            os.utime(os.path.join(directory, filename), (0, 0))
+    return paths
+
+
+def timed(function):
+    """Call function and return its result and wall time in seconds."""
+    start = time.time()
+    result = function()
+    return result, time.time() - start
+
+
+class ReloadBenchmark(object):
+    """Times each reload scenario for a single script folder size."""
+
+    def __init__(self, size, work_dir):
+        self.size = size
+        self.source_dir = os.path.join(work_dir, "source")
+        self.destination_dir = os.path.join(work_dir, "processing")
+        self.cache_dir = os.path.join(work_dir, "cache")
+        self.paths = generate_script_folder(self.source_dir, size)
+        self.load_caches(fresh=True)
+        self.results = []
+
+    def load_caches(self, fresh=False):
+        def cache(name):
+            path = os.path.join(self.cache_dir, name)
+            if fresh and os.path.exists(path):
+                os.remove(path)
+            return path
+        self.manifest = ScriptManifest(cache("manifest.json"))
+        self.index = ScriptMetadataIndex(cache("index.json"))
+        self.directory_index = DirectoryIndex(cache("directories.json"))
+        self.compile_cache = CompileCache(cache("compile.json"))
+
+    def save_caches(self):
+        for store in (self.manifest, self.index, self.directory_index, self.compile_cache):
+            store.save()
+
+    def sync(self):
+        return sync_scripts(
+            [self.source_dir], self.destination_dir, self.manifest,
+            self.index.is_processing_script, self.directory_index,
+            compile_cache=self.compile_cache
+        )
+
+    def record(self, scenario, seconds):
+        per_script = seconds * 1000.0 / self.size
+        self.results.append({
+            "size": self.size,
+            "scenario": scenario,
+            "seconds": seconds,
+            "ms_per_script": per_script,
+            "threshold_ms_per_script": THRESHOLDS[scenario],
+            "passed": per_script <= THRESHOLDS[scenario],
+        })
+
+    def run(self):
+        _, seconds = timed(lambda: [self.index.get(path) for path in self.paths])
+        self.record("index_cold", seconds)
+        _, seconds = timed(lambda: [self.index.cached(path) for path in self.paths])
+        self.record("index_warm", seconds)
+
+        self.load_caches(fresh=True)
+        _, seconds = timed(self.sync)
+        self.record("cold", seconds)
+        self.save_caches()
+
+        self.load_caches()
+        now = time.time()
+        for path in self.paths:
+            os.utime(path, (now, now))
+        _, seconds = timed(self.sync)
+        self.record("warm", seconds)
+
+        _, seconds = timed(self.sync)
+        self.record("noop", seconds)
+
+        write_script(self.paths[1], 2, edited=True)
+        result, seconds = timed(self.sync)
+        self.record("single_change", seconds)
+
+        if processing_available():
+            self.run_provider(result)
+        return self.results
+
+    def run_provider(self, result):
+        """Time refreshing the script provider, using the scripts deployed
+        to the benchmark's own processing folder so that the user's scripts
+        folder is never touched.
+        """
+        from processing.script.ScriptUtils import ScriptUtils
+        from scriptassistant.sync.provider import refresh_script_algorithms
+
+        _, seconds = timed(lambda: ScriptUtils.loadFromFolder(self.destination_dir))
+        self.record("provider_full", seconds)
+
+        try:
+            _, seconds = timed(lambda: refresh_script_algorithms(
+                self.destination_dir, [], result.updated, []))
+            self.record("provider_single_change", seconds)
+        finally:
+            # Remove the benchmark's algorithm from the toolbox again, even
+            # if the refresh failed part way.
+            refresh_script_algorithms(self.destination_dir, [], [], result.updated)
+
+
+def processing_available():
+    try:
+        import processing  # noqa
+    except ImportError:
+        return False
+    return True
+
+
+def print_results(results):
+    print "{: >6} {: <24} {: >10} {: >14} {: >10}".format(
+        "Size", "Scenario", "Seconds", "ms/script", "Passed")
+    for result in results:
+        print "{: >6} {: <24} {: >10.3f} {: >14.4f} {: >10}".format(
+            result["size"], result["scenario"], result["seconds"],
+            result["ms_per_script"], "yes" if result["passed"] else "NO")
+
+
+def run_benchmarks(sizes=SIZES, output=None):
+    """Run the benchmarks for each size, print the results and write them
+    as JSON to output (default $SCRIPT_ASSISTANT_BENCHMARK_OUTPUT, else
+    stdout). Returns True if every threshold was met.
+    """
+    results = []
+    for size in sizes:
+        work_dir = tempfile.mkdtemp()
+        try:
+            results.extend(ReloadBenchmark(size, work_dir).run())
+        finally:
+            shutil.rmtree(work_dir)
+
+    print_results(results)
+    passed = all(result["passed"] for result in results)
+    document = {"passed": passed, "thresholds": THRESHOLDS, "results": results}
+    output = output or os.environ.get("SCRIPT_ASSISTANT_BENCHMARK_OUTPUT")
+    if output:
+        with open(output, "w") as output_file:
+            json.dump(document, output_file, indent=2)
+    else:
+        print json.dumps(document, indent=2)
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_benchmarks() else 1)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+"""A base test case for the tests which write files to a temporary folder."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class FolderTestCase(unittest.TestCase):
+    """A TestCase with a temporary folder, self.folder, which is removed
+    after each test.
+    """
+
+    # The mtime files are written with unless one is given, or None for the
+    # current time. An old mtime keeps cached directory listings.
+    file_mtime = None
+
+    def setUp(self):
+        """Runs before each test."""
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.folder)
+
+    def make_folder(self, name):
+        """Create a folder within the temporary folder and return its path."""
+        path = os.path.join(self.folder, name)
+        os.makedirs(path)
+        return path
+
+    def write_file(self, path, text="", mtime=None):
+        """Write a file, creating its directory, and return its path. A
+        relative path is within the temporary folder.
+        """
+        path = os.path.join(self.folder, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as output:
+            output.write(text)
+        if mtime is None:
+            mtime = self.file_mtime
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
@@ -45,6 +45,8 @@ class ScriptAssistantSettingsTest(unittest.TestCase):
         self.assertEqual(self.dlg.lne_test.text(), __location__)
         self.assertEqual(self.dlg.lne_test_data.text(), "")
         self.assertFalse(self.dlg.chk_reload.isChecked())
+        self.assertEqual(self.dlg.option_values()["test_runner"], "in_process")
+        self.assertEqual(self.dlg.option_values()["test_timeout"], "60.0")
 
     def test_deleting_settings(self):
         count = self.dlg.cmb_config.count()
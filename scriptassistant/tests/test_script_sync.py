@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+
+"""Tests the incremental script sync used by the Reload Scripts action."""
+
+import os
+import shutil
+import unittest
+
+from scriptassistant.sync.compiler import CompileCache
+from scriptassistant.sync.engine import sync_scripts, COPY, LINK
+from scriptassistant.sync.manifest import ScriptManifest
+from scriptassistant.sync.scanner import DirectoryIndex
+from scriptassistant.sync.script_index import parse_header, ScriptMetadataIndex
+
+from folders import FolderTestCase
+
+SCRIPT = "##Input=vector\n##Output=output vector\n"
+
+
+class ScriptSyncTest(FolderTestCase):
+    """Test syncing a script folder into a processing scripts folder."""
+
+    def setUp(self):
+        """Runs before each test."""
+        super(ScriptSyncTest, self).setUp()
+        self.source_dir = self.make_folder("scripts")
+        self.destination_dir = self.make_folder("processing")
+        self.manifest = ScriptManifest()
+
+    def write_script(self, filename, text=SCRIPT):
+        self.write_file(os.path.join(self.source_dir, filename), text)
+
+    def sync(self, mode=COPY, compile_cache=None):
+        return sync_scripts(
+            [self.source_dir], self.destination_dir, self.manifest, mode=mode,
+            compile_cache=compile_cache)
+
+    def test_new_scripts_are_added(self):
+        self.write_script("a.py")
+        self.write_script("_private.py")
+        self.write_script("notes.txt")
+        result = self.sync()
+        self.assertEqual(result.added, ["a.py"])
+        self.assertTrue(result.changed)
+        self.assertEqual(os.listdir(self.destination_dir), ["a.py"])
+
+    def test_many_scripts_are_copied(self):
+        names = ["script_{}.py".format(i) for i in range(50)]
+        for name in names:
+            self.write_script(name)
+        result = self.sync()
+        self.assertEqual(result.added, sorted(names))
+        # No temporary files are left behind.
+        self.assertEqual(sorted(os.listdir(self.destination_dir)), sorted(names))
+
+    def test_unchanged_sync_is_a_no_op(self):
+        self.write_script("a.py")
+        self.sync()
+        result = self.sync()
+        self.assertFalse(result.changed)
+        self.assertEqual(result.unchanged, ["a.py"])
+
+    def test_changed_script_is_updated(self):
+        self.write_script("a.py")
+        self.sync()
+        self.write_script("a.py", SCRIPT + "print 'changed'\n")
+        result = self.sync()
+        self.assertEqual(result.updated, ["a.py"])
+
+    def test_deleted_script_is_removed(self):
+        self.write_script("a.py")
+        self.sync()
+        os.remove(os.path.join(self.source_dir, "a.py"))
+        with open(os.path.join(self.destination_dir, "other.py"), "w") as other:
+            other.write(SCRIPT)
+        result = self.sync()
+        self.assertEqual(result.removed, ["a.py"])
+        # Scripts not deployed by the plugin are left alone.
+        self.assertEqual(os.listdir(self.destination_dir), ["other.py"])
+
+    def test_deleted_copy_is_restored(self):
+        self.write_script("a.py")
+        self.sync()
+        os.remove(os.path.join(self.destination_dir, "a.py"))
+        result = self.sync()
+        self.assertEqual(result.updated, ["a.py"])
+        self.assertTrue(os.path.isfile(os.path.join(self.destination_dir, "a.py")))
+
+    def test_sub_directories_are_synced(self):
+        self.write_script(os.path.join("vector", "a.py"))
+        self.write_script(os.path.join("vector", "polygon", "b.py"))
+        self.write_script(os.path.join(".git", "c.py"))
+        result = self.sync()
+        self.assertEqual(result.added, ["a.py", "b.py"])
+
+    def test_shallowest_script_wins_name_collisions(self):
+        self.write_script(os.path.join("raster", "a.py"))
+        self.write_script(os.path.join("vector", "a.py"))
+        result = self.sync()
+        self.assertEqual(result.collisions, [(
+            os.path.join(self.source_dir, "raster", "a.py"),
+            os.path.join(self.source_dir, "vector", "a.py"),
+        )])
+        self.write_script("a.py")
+        result = self.sync()
+        self.assertEqual(result.updated, ["a.py"])
+        self.assertEqual(len(result.collisions), 2)
+        self.assertEqual(
+            self.manifest.get("a.py")["source"], os.path.join(self.source_dir, "a.py"))
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "Links are not supported")
+    def test_link_mode_links_scripts(self):
+        self.write_script("a.py")
+        self.sync(LINK)
+        destination_path = os.path.join(self.destination_dir, "a.py")
+        self.assertTrue(os.path.islink(destination_path))
+        link_stat = os.lstat(destination_path)
+
+        self.write_script("a.py", SCRIPT + "print 'changed'\n")
+        result = self.sync(LINK)
+        self.assertEqual(result.updated, ["a.py"])
+        # The link was not replaced.
+        self.assertEqual(os.lstat(destination_path).st_ino, link_stat.st_ino)
+        self.assertFalse(self.sync(LINK).changed)
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "Links are not supported")
+    def test_switching_mode_redeploys_scripts(self):
+        self.write_script("a.py")
+        self.sync()
+        self.assertEqual(self.sync(LINK).updated, ["a.py"])
+        self.assertTrue(os.path.islink(os.path.join(self.destination_dir, "a.py")))
+        self.assertEqual(self.sync(COPY).updated, ["a.py"])
+        self.assertFalse(os.path.islink(os.path.join(self.destination_dir, "a.py")))
+        # The source was not written through the link.
+        with open(os.path.join(self.source_dir, "a.py")) as script:
+            self.assertEqual(script.read(), SCRIPT)
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "Links are not supported")
+    def test_dangling_link_is_removed(self):
+        self.write_script("a.py")
+        self.sync(LINK)
+        os.remove(os.path.join(self.source_dir, "a.py"))
+        self.assertEqual(self.sync(LINK).removed, ["a.py"])
+        self.assertEqual(os.listdir(self.destination_dir), [])
+
+    def test_later_folders_override_earlier_folders(self):
+        override_dir = self.make_folder("override")
+        self.write_script("a.py")
+        self.write_script("b.py")
+        self.write_file(os.path.join(override_dir, "a.py"), SCRIPT + "print 'override'\n")
+        result = sync_scripts(
+            [self.source_dir, override_dir], self.destination_dir, self.manifest)
+        self.assertEqual(result.added, ["a.py", "b.py"])
+        self.assertEqual(result.collisions, [])
+        self.assertEqual(result.overridden, [(
+            os.path.join(override_dir, "a.py"), os.path.join(self.source_dir, "a.py")
+        )])
+        with open(os.path.join(self.destination_dir, "a.py")) as script:
+            self.assertIn("override", script.read())
+
+    def test_scripts_with_syntax_errors_are_not_deployed(self):
+        compile_cache = CompileCache()
+        self.write_script("a.py")
+        self.sync(compile_cache=compile_cache)
+        self.write_script("a.py", SCRIPT + "if True\n    pass\n")
+        self.write_script("b.py", SCRIPT + "print 'b'\n")
+        result = self.sync(compile_cache=compile_cache)
+        self.assertEqual(result.added, ["b.py"])
+        self.assertEqual(result.updated, [])
+        self.assertEqual(result.invalid, [
+            (os.path.join(self.source_dir, "a.py"), 3, "invalid syntax")
+        ])
+        # The last good version is left deployed.
+        with open(os.path.join(self.destination_dir, "a.py")) as script:
+            self.assertEqual(script.read(), SCRIPT)
+
+    def test_compile_results_are_cached(self):
+        compile_cache = CompileCache()
+        self.write_script("a.py", SCRIPT + "if True\n    pass\n")
+        self.sync(compile_cache=compile_cache)
+        self.assertEqual(len(compile_cache.data), 1)
+        digest = list(compile_cache.data)[0]
+        compile_cache.data[digest] = [1, "cached"]
+        result = self.sync(compile_cache=compile_cache)
+        self.assertEqual(result.invalid[0][2], "cached")
+
+    def test_manifest_is_persisted(self):
+        manifest_path = os.path.join(self.destination_dir, "manifest", "manifest.json")
+        self.manifest = ScriptManifest(manifest_path)
+        self.write_script("a.py")
+        self.sync()
+        self.manifest.save()
+        self.manifest = ScriptManifest(manifest_path)
+        self.assertFalse(self.sync().changed)
+
+
+class ScriptMetadataIndexTest(FolderTestCase):
+    """Test parsing and caching processing script headers."""
+
+    def setUp(self):
+        """Runs before each test."""
+        super(ScriptMetadataIndexTest, self).setUp()
+        self.script_dir = self.folder
+        self.index = ScriptMetadataIndex()
+
+    def test_header_is_parsed(self):
+        metadata = parse_header([
+            "# -*- coding: utf-8 -*-\n",
+            "##Vector tools=group\n",
+            "##Add area=name\n",
+            "##BQ31=vector\n",
+            "##BQ31_Updated=output vector\n",
+            "\n",
+            "##Ignored=number\n",
+        ])
+        self.assertTrue(metadata["valid"])
+        self.assertEqual(metadata["group"], "Vector tools")
+        self.assertEqual(metadata["name"], "Add area")
+        self.assertEqual(metadata["inputs"], [["BQ31", "vector"]])
+        self.assertEqual(metadata["outputs"], [["BQ31_Updated", "vector"]])
+
+    def test_invalid_headers(self):
+        self.assertFalse(parse_header(["import os\n", "##a=vector\n"])["valid"])
+        self.assertFalse(parse_header(["## A comment\n"])["valid"])
+        self.assertFalse(parse_header(["###########\n"])["valid"])
+        self.assertFalse(parse_header([])["valid"])
+
+    def test_index_is_refreshed_when_script_changes(self):
+        path = self.write_file("a.py", "print 'not a script'\n")
+        self.assertFalse(self.index.is_processing_script(path))
+        self.write_file(path, SCRIPT + "print 'now a script'\n")
+        self.assertTrue(self.index.is_processing_script(path))
+        self.assertEqual(self.index.scripts_in(self.script_dir), [path])
+        self.index.prune(self.script_dir, [])
+        self.assertIsNone(self.index.cached(path))
+
+
+class DirectoryIndexTest(FolderTestCase):
+    """Test the persisted index of directory listings."""
+
+    def setUp(self):
+        """Runs before each test."""
+        super(DirectoryIndexTest, self).setUp()
+        self.root = self.folder
+        for path in ["x.py", os.path.join("a", "y.py"), os.path.join("a", "b", "z.py")]:
+            self.write_file(path)
+        # Back-date the directories so that their listings are cached.
+        for directory in [self.root, os.path.join(self.root, "a"),
+                          os.path.join(self.root, "a", "b")]:
+            os.utime(directory, (0, 0))
+        self.index = DirectoryIndex()
+
+    def test_walk_is_recursive(self):
+        walked = dict(self.index.walk(self.root))
+        self.assertEqual(walked[self.root], ["x.py"])
+        self.assertEqual(walked[os.path.join(self.root, "a", "b")], ["z.py"])
+
+    def test_unchanged_directories_are_not_listed(self):
+        list(self.index.walk(self.root))
+        entry = self.index.data[os.path.join(self.root, "a")]
+        entry["files"] = ["cached.py"]
+        walked = dict(self.index.walk(self.root))
+        self.assertEqual(walked[os.path.join(self.root, "a")], ["cached.py"])
+
+    def test_removed_directories_are_forgotten(self):
+        list(self.index.walk(self.root))
+        shutil.rmtree(os.path.join(self.root, "a"))
+        os.utime(self.root, (0, 1))
+        list(self.index.walk(self.root))
+        self.assertEqual(list(self.index.data), [self.root])
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+"""Tests the cached, static test discovery used to build the test menu."""
+
+import os
+import unittest
+
+from folders import FolderTestCase
+from scriptassistant.testing.discovery import discovery_signature, DiscoveryCache
+from scriptassistant.sync.scanner import DirectoryIndex
+from scriptassistant.testing.inspection import discover_tests, ModuleCache
+from scriptassistant.testing.targets import split_target, module_targets, count_tests
+
+TEST = "import unittest\n\n\nclass ATest(unittest.TestCase):\n\n    def test_a(self):\n        pass\n"
+
+
+class DiscoveryCacheTest(FolderTestCase):
+    """Test that test folders are only discovered again when they change."""
+
+    file_mtime = 1000
+
+    def setUp(self):
+        """Runs before each test."""
+        super(DiscoveryCacheTest, self).setUp()
+        self.test_folder = self.make_folder("tests")
+        self.cache_dir = self.make_folder("cache")
+        self.discovered = []
+
+    def write_test(self, filename, text=TEST, mtime=None):
+        self.write_file(os.path.join(self.test_folder, filename), text, mtime)
+
+    def discover(self, test_folder):
+        self.discovered.append(test_folder)
+        return discover_tests(test_folder)
+
+    def test_signature_includes_modules_and_packages(self):
+        self.write_test("test_a.py")
+        self.write_test("helper.py")
+        self.write_test("notes.txt")
+        self.write_test(os.path.join("package", "__init__.py"), "")
+        self.write_test(os.path.join("package", "test_b.py"))
+        self.write_test(os.path.join("folder", "test_c.py"))
+        self.write_test(os.path.join(".hidden", "__init__.py"), "")
+        self.write_test(os.path.join(".hidden", "test_d.py"))
+        self.assertEqual(
+            sorted(discovery_signature(self.test_folder)),
+            ["helper.py", os.path.join("package", "__init__.py"),
+             os.path.join("package", "test_b.py"), "test_a.py"]
+        )
+
+    def test_unchanged_folder_is_not_discovered_again(self):
+        self.write_test("test_a.py")
+        cache = DiscoveryCache()
+        self.assertEqual(sorted(cache.tests(self.test_folder, self.discover)), ["test_a"])
+        self.assertEqual(sorted(cache.tests(self.test_folder, self.discover)), ["test_a"])
+        self.assertEqual(len(self.discovered), 1)
+
+    def test_changed_test_is_discovered_again(self):
+        self.write_test("test_a.py")
+        cache = DiscoveryCache()
+        cache.tests(self.test_folder, self.discover)
+        self.write_test("test_a.py", mtime=2000)
+        cache.tests(self.test_folder, self.discover)
+        self.assertEqual(len(self.discovered), 2)
+
+    def test_added_and_removed_tests_are_discovered(self):
+        self.write_test("test_a.py")
+        cache = DiscoveryCache()
+        cache.tests(self.test_folder, self.discover)
+        self.write_test("test_b.py")
+        self.assertEqual(sorted(cache.tests(self.test_folder, self.discover)), ["test_a", "test_b"])
+        os.remove(os.path.join(self.test_folder, "test_a.py"))
+        self.assertEqual(sorted(cache.tests(self.test_folder, self.discover)), ["test_b"])
+        self.assertEqual(len(self.discovered), 3)
+
+    def test_cache_is_persisted(self):
+        self.write_test("test_a.py")
+        path = os.path.join(self.cache_dir, "test_discovery.json")
+        DiscoveryCache(path).tests(self.test_folder, self.discover)
+        cache = DiscoveryCache(path)
+        self.assertEqual(sorted(cache.tests(self.test_folder, self.discover)), ["test_a"])
+        self.assertEqual(len(self.discovered), 1)
+
+
+class StaticDiscoveryTest(FolderTestCase):
+    """Test finding tests by parsing test modules."""
+
+    def setUp(self):
+        """Runs before each test."""
+        super(StaticDiscoveryTest, self).setUp()
+        self.test_folder = self.folder
+
+    def classes(self, module):
+        return discover_tests(self.test_folder)[module]["classes"]
+
+    def test_modules_are_not_imported(self):
+        self.write_file("test_a.py", "raise ImportError\n" + TEST)
+        self.assertEqual(self.classes("test_a"), {"ATest": ["test_a"]})
+
+    def test_only_test_cases_with_tests_are_found(self):
+        self.write_file("test_a.py", (
+            "from unittest import TestCase\n"
+            "class Helper(object):\n    def test_x(self):\n        pass\n"
+            "class Empty(TestCase):\n    def helper(self):\n        pass\n"
+            "class ATest(TestCase):\n    def test_b(self):\n        pass\n"
+            "    def test_a(self):\n        pass\n"
+        ))
+        self.write_file("other.py", TEST)
+        index = discover_tests(self.test_folder)
+        self.assertEqual(list(index), ["test_a"])
+        self.assertEqual(index["test_a"]["classes"], {"ATest": ["test_a", "test_b"]})
+
+    def test_inherited_tests_are_found(self):
+        self.write_file("base.py", (
+            "import unittest as ut\n"
+            "class BaseTest(ut.TestCase):\n    def test_base(self):\n        pass\n"
+            "class Mixin(object):\n    def test_mixin(self):\n        pass\n"
+        ))
+        self.write_file("test_a.py", (
+            "import base\n"
+            "from base import Mixin as Extra\n"
+            "class ATest(Extra, base.BaseTest):\n    def test_a(self):\n        pass\n"
+            "class SubTest(ATest):\n    pass\n"
+        ))
+        self.assertEqual(self.classes("test_a"), {
+            "ATest": ["test_a", "test_base", "test_mixin"],
+            "SubTest": ["test_a", "test_base", "test_mixin"],
+        })
+
+    def test_packages_have_dotted_module_names(self):
+        self.write_file(os.path.join("package", "__init__.py"), "")
+        self.write_file(os.path.join("package", "helpers.py"), TEST)
+        self.write_file(os.path.join("package", "test_b.py"), (
+            "from .helpers import ATest\n"
+            "class BTest(ATest):\n    pass\n"
+        ))
+        # Not a package, so not discovered by unittest either.
+        self.write_file(os.path.join("folder", "test_c.py"), TEST)
+        index = discover_tests(self.test_folder)
+        self.assertEqual(list(index), ["package.test_b"])
+        self.assertEqual(index["package.test_b"]["classes"], {"BTest": ["test_a"]})
+
+    def test_syntax_errors_are_reported(self):
+        self.write_file("test_a.py", "class ATest(\n")
+        index = discover_tests(self.test_folder)
+        self.assertEqual(index["test_a"]["classes"], {})
+        self.assertTrue(index["test_a"]["error"])
+
+    def test_unchanged_modules_are_not_parsed_again(self):
+        self.write_file("test_a.py", TEST)
+        self.write_file("test_b.py", TEST)
+        for path in ("test_a.py", "test_b.py"):
+            os.utime(os.path.join(self.test_folder, path), (1000, 1000))
+        directory_index = DirectoryIndex()
+        module_cache = ModuleCache()
+        discover_tests(self.test_folder, directory_index, module_cache)
+        self.assertEqual(len(module_cache.data), 2)
+
+        # A cached parse is used even though the file now differs.
+        path = os.path.join(self.test_folder, "test_a.py")
+        with open(path, "w") as module_file:
+            module_file.write(TEST.replace("test_a", "test_x"))
+        os.utime(path, (1000, 1000))
+        self.assertEqual(
+            discover_tests(self.test_folder, directory_index, module_cache)["test_a"]["classes"],
+            {"ATest": ["test_a"]})
+        os.utime(path, (2000, 2000))
+        self.assertEqual(
+            discover_tests(self.test_folder, directory_index, module_cache)["test_a"]["classes"],
+            {"ATest": ["test_x"]})
+
+        os.remove(os.path.join(self.test_folder, "test_b.py"))
+        discover_tests(self.test_folder, directory_index, module_cache)
+        self.assertEqual(list(module_cache.data), [path])
+
+    def test_nested_packages_are_discovered(self):
+        for package in ("a", os.path.join("a", "b"), os.path.join("a", "b", "c")):
+            self.write_file(os.path.join(package, "__init__.py"), "")
+            self.write_file(os.path.join(package, "test_x.py"), TEST)
+        self.assertEqual(
+            sorted(discover_tests(self.test_folder)), ["a.b.c.test_x", "a.b.test_x", "a.test_x"])
+
+
+class TestTargetTest(unittest.TestCase):
+    """Test resolving the module, class and method targets in the test menu."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.test_index = {
+            "test_a": {"path": "test_a.py", "error": None, "classes": {
+                "BTest": ["test_b"], "ATest": ["test_a", "test_c"]}},
+            "package.test_b": {"path": "package/test_b.py", "error": None, "classes": {}},
+        }
+
+    def test_modules_classes_and_methods_are_split(self):
+        self.assertEqual(split_target(self.test_index, "test_a"), ("test_a", None))
+        self.assertEqual(split_target(self.test_index, "test_a.ATest"), ("test_a", "ATest"))
+        self.assertEqual(
+            split_target(self.test_index, "test_a.ATest.test_c"), ("test_a", "ATest.test_c"))
+        self.assertEqual(
+            split_target(self.test_index, "package.test_b"), ("package.test_b", None))
+
+    def test_unknown_targets_are_not_split(self):
+        self.assertIsNone(split_target(self.test_index, "test_c"))
+        self.assertIsNone(split_target(self.test_index, "test_a.CTest"))
+        self.assertIsNone(split_target(self.test_index, "test_a.ATest.test_b"))
+        self.assertIsNone(split_target(self.test_index, "test_a.ATest.test_a.extra"))
+        self.assertIsNone(split_target(self.test_index, "package"))
+
+    def test_module_targets_are_sorted(self):
+        self.assertEqual(list(module_targets(self.test_index, "test_a")), [
+            ("test_a.ATest", ["test_a.ATest.test_a", "test_a.ATest.test_c"]),
+            ("test_a.BTest", ["test_a.BTest.test_b"]),
+        ])
+
+    def test_tests_are_counted(self):
+        self.assertEqual(count_tests(self.test_index, "test_a"), 3)
+        self.assertEqual(count_tests(self.test_index, "test_a.ATest"), 2)
+        self.assertEqual(count_tests(self.test_index, "test_a.ATest.test_c"), 1)
+        self.assertEqual(count_tests(self.test_index, "test_a", ["ATest.test_a", "BTest"]), 2)
+        self.assertEqual(count_tests(self.test_index, "test_c"), 0)
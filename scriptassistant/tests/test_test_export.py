@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""Tests exporting test results as JUnit XML and JSON lines for CI."""
+
+import os
+import json
+import unittest
+from functools import partial
+from StringIO import StringIO
+from xml.etree import ElementTree
+
+from scriptassistant.testing.export import (ResultExporter, ExportingTextResult,
+                                            split_test_id)
+from scriptassistant.testing.results import CollectingResult
+
+from folders import FolderTestCase
+
+
+class TestExportTest(FolderTestCase):
+    """Test the JUnit XML and JSON lines files written as tests run."""
+
+    # Not collected with the tests in this module, as they fail on purpose.
+    class ExampleTest(unittest.TestCase):
+
+        def test_a(self):
+            print "a printed <this>"
+
+        def test_b(self):
+            self.fail("b failed")
+
+        def test_c(self):
+            raise ValueError("c errored")
+
+        @unittest.skip("not today")
+        def test_d(self):
+            pass
+
+    def setUp(self):
+        """Runs before each test."""
+        super(TestExportTest, self).setUp()
+        self.junit_xml = os.path.join(self.folder, "results.xml")
+        self.json_lines = os.path.join(self.folder, "results.jsonl")
+        self.suite = unittest.TestLoader().loadTestsFromTestCase(self.ExampleTest)
+
+    def test_results_are_written_as_each_test_finishes(self):
+        exporter = ResultExporter(self.junit_xml, self.json_lines)
+        result = CollectingResult(exporter.write, capture=True)
+        tests = iter(self.suite)
+        next(tests)(result)
+        with open(self.json_lines) as json_file:
+            self.assertEqual(len(json_file.readlines()), 1)
+        for test in tests:
+            test(result)
+        exporter.close()
+
+        with open(self.json_lines) as json_file:
+            records = [json.loads(line) for line in json_file]
+        self.assertEqual(
+            [record["status"] for record in records], ["passed", "failed", "error", "skipped"])
+        self.assertEqual(records[0]["output"], "a printed <this>\n")
+        self.assertIsNotNone(records[0]["duration"])
+
+        suite = ElementTree.parse(self.junit_xml).getroot()
+        self.assertEqual(suite.tag, "testsuite")
+        cases = suite.findall("testcase")
+        self.assertEqual([case.get("name") for case in cases], ["test_a", "test_b", "test_c", "test_d"])
+        self.assertEqual(cases[0].get("classname"), self.ExampleTest.__module__ + ".ExampleTest")
+        self.assertEqual(cases[0].find("system-out").text, "a printed <this>\n")
+        self.assertEqual(cases[1].find("failure").get("message"), "AssertionError: b failed")
+        self.assertIn("Traceback", cases[1].find("failure").text)
+        self.assertEqual(cases[2].find("error").get("message"), "ValueError: c errored")
+        self.assertEqual(cases[3].find("skipped").get("message"), "not today")
+
+    def test_text_runner_output_is_kept(self):
+        exporter = ResultExporter(json_lines=self.json_lines)
+        stream = StringIO()
+        unittest.TextTestRunner(
+            stream=stream, verbosity=2,
+            resultclass=partial(ExportingTextResult, exporter)).run(self.suite)
+        exporter.close()
+        self.assertIn("test_a", stream.getvalue())
+        self.assertIn("FAILED (failures=1, errors=1, skipped=1)", stream.getvalue())
+        self.assertNotIn("a printed", stream.getvalue())
+        with open(self.json_lines) as json_file:
+            self.assertEqual(len(json_file.readlines()), 4)
+
+    def test_exported_records_are_not_kept(self):
+        exporter = ResultExporter(json_lines=self.json_lines)
+        result = ExportingTextResult(exporter, StringIO(), True, 0)
+        self.suite(result)
+        exporter.close()
+        self.assertFalse(hasattr(result, "records"))
+        self.assertFalse(hasattr(result, "timings"))
+
+    def test_fixture_errors_are_named_after_their_class(self):
+        self.assertEqual(split_test_id("package.test_x.XTest.test_y"), ("package.test_x.XTest", "test_y"))
+        self.assertEqual(split_test_id("setUpClass (test_x.XTest)"), ("test_x.XTest", "setUpClass"))
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+"""Tests caching the outputs of processing algorithms run as test fixtures."""
+
+import os
+import shutil
+import tempfile
+import time
+
+from scriptassistant.testing.fixtures import FixtureCache
+
+from folders import FolderTestCase
+
+
+class TestFixtureTest(FolderTestCase):
+    """Test the fixture cache with a stand-in for running an algorithm."""
+
+    file_mtime = 1000
+
+    def setUp(self):
+        """Runs before each test."""
+        super(TestFixtureTest, self).setUp()
+        self.script = os.path.join(self.folder, "scripts", "add_area_column.py")
+        self.layer = os.path.join(self.folder, "testdata", "BQ31.shp")
+        self.write_file(self.script, "##Input=vector\n")
+        for extension in (".shp", ".dbf", ".shx"):
+            self.write_file(self.layer[:-4] + extension, extension)
+        self.cache = FixtureCache(
+            os.path.join(self.folder, "fixture_cache.json"), os.path.join(self.folder, "fixtures"))
+        self.runs = 0
+
+    def algorithm(self, output_path=None):
+        """Write an output shapefile, as runalg would with a None output."""
+        self.runs += 1
+        if output_path is None:
+            output_path = os.path.join(tempfile.mkdtemp(dir=self.folder), "BQ31_Updated.shp")
+        for extension in (".shp", ".dbf"):
+            self.write_file(output_path[:-4] + extension, "run {}".format(self.runs), 2000)
+        return {"BQ31_Updated": output_path, "AREA": 12.5}
+
+    def run_algorithm(self, *args):
+        return self.cache.run(
+            "script:addareacolumn", self.script, args, lambda: self.algorithm(*args[2:]))
+
+    def test_unchanged_fixtures_are_not_run_again(self):
+        first = self.run_algorithm(self.layer, None)
+        second = self.run_algorithm(self.layer, None)
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(second, first)
+        self.assertEqual(second["AREA"], 12.5)
+        self.assertTrue(second["BQ31_Updated"].startswith(os.path.join(self.folder, "fixtures")))
+        with open(second["BQ31_Updated"][:-4] + ".dbf") as dbf:
+            self.assertEqual(dbf.read(), "run 1")
+
+    def test_cache_is_persisted(self):
+        self.run_algorithm(self.layer, None)
+        self.cache = FixtureCache(self.cache.path, self.cache.folder)
+        self.run_algorithm(self.layer, None)
+        self.assertEqual(self.runs, 1)
+
+    def test_changes_run_fixtures_again(self):
+        self.run_algorithm(self.layer, None)
+        self.run_algorithm(self.layer, 10)
+        self.assertEqual(self.runs, 2)
+        self.write_file(self.layer[:-4] + ".dbf", "changed", 3000)
+        self.run_algorithm(self.layer, None)
+        self.assertEqual(self.runs, 3)
+        self.write_file(self.script, "##Input=vector\n##Output=output vector\n", 3000)
+        self.run_algorithm(self.layer, None)
+        self.assertEqual(self.runs, 4)
+        # Touching a file without changing its content keeps the key.
+        os.utime(self.script, (4000, 4000))
+        self.run_algorithm(self.layer, None)
+        self.assertEqual(self.runs, 4)
+
+    def test_requested_outputs_are_written(self):
+        output_path = os.path.join(self.folder, "output", "result.shp")
+        self.run_algorithm(self.layer, None, output_path)
+        shutil.rmtree(os.path.dirname(output_path))
+        outputs = self.run_algorithm(self.layer, None, output_path)
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(outputs["BQ31_Updated"], output_path)
+        self.assertTrue(os.path.isfile(output_path[:-4] + ".dbf"))
+
+    def test_missing_cached_files_run_fixtures_again(self):
+        outputs = self.run_algorithm(self.layer, None)
+        os.remove(outputs["BQ31_Updated"])
+        self.run_algorithm(self.layer, None)
+        self.assertEqual(self.runs, 2)
+
+    def test_old_entries_are_evicted(self):
+        outputs = self.run_algorithm(self.layer, None)
+        self.cache.evict(now=time.time() + self.cache.max_age * 2)
+        self.assertEqual(self.cache.data["entries"], {})
+        self.assertFalse(os.path.exists(outputs["BQ31_Updated"]))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        # Each entry's files take 10 bytes.
+        self.cache.max_size = 25
+        first = self.run_algorithm(self.layer, 1)
+        second = self.run_algorithm(self.layer, 2)
+        self.run_algorithm(self.layer, 1)
+        third = self.run_algorithm(self.layer, 3)
+        self.assertEqual(self.runs, 3)
+        self.assertTrue(os.path.exists(first["BQ31_Updated"]))
+        self.assertFalse(os.path.exists(second["BQ31_Updated"]))
+        self.assertTrue(os.path.exists(third["BQ31_Updated"]))
+
+    def test_cache_fits_after_a_large_entry_is_put(self):
+        self.cache.max_size = 25
+        self.run_algorithm(self.layer, 1)
+        self.run_algorithm(self.layer, 2)
+        large = os.path.join(self.folder, "large", "large.shp")
+        self.write_file(large, "x" * 20)
+        outputs = self.cache.put("large", {"OUTPUT": large})
+        entries = self.cache.data["entries"]
+        self.assertEqual(list(entries), ["large"])
+        self.assertLessEqual(sum(entry["size"] for entry in entries.values()), self.cache.max_size)
+        self.assertTrue(os.path.exists(outputs["OUTPUT"]))
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""Tests finding the test modules affected by changes since they last passed."""
+
+import os
+import __builtin__
+
+from scriptassistant.testing.impact import (FileAccessRecorder, ImpactMap, DependencyFinder,
+                                            static_dependencies)
+from scriptassistant.testing.inspection import ModuleCache
+
+from folders import FolderTestCase
+
+TEST = """import os
+import unittest
+
+from helpers import load_layer
+
+script = os.path.join(os.path.dirname(__file__), "..", "scripts", "add_area_column.py")
+layer = load_layer(r"{}/BQ31.shp".format("testdata"))
+
+
+class ATest(unittest.TestCase):
+
+    def test_a(self):
+        pass
+"""
+
+
+class TestImpactTest(FolderTestCase):
+    """Test the dependency map used to select affected test modules."""
+
+    file_mtime = 1000
+
+    def setUp(self):
+        """Runs before each test."""
+        super(TestImpactTest, self).setUp()
+        self.test_folder = os.path.join(self.folder, "tests")
+        self.script_folder = os.path.join(self.folder, "scripts")
+        self.data_folder = os.path.join(self.folder, "testdata")
+        self.write_file(os.path.join(self.test_folder, "test_a.py"), TEST)
+        self.write_file(os.path.join(self.test_folder, "helpers.py"), "def load_layer(path):\n    pass\n")
+        self.write_file(os.path.join(self.test_folder, "test_b.py"), "import unittest\n")
+        self.write_file(os.path.join(self.script_folder, "add_area_column.py"), "##Input=vector\n")
+        self.write_file(os.path.join(self.script_folder, "other.py"), "##Input=vector\n")
+        for extension in (".shp", ".dbf", ".shx"):
+            self.write_file(os.path.join(self.data_folder, "BQ31" + extension), "")
+        self.write_file(os.path.join(self.data_folder, "other.shp"), "")
+
+    def test_static_dependencies(self):
+        dependencies = static_dependencies(
+            self.test_folder, "test_a", [self.script_folder, self.data_folder])
+        self.assertEqual(sorted(os.path.relpath(path, self.folder) for path in dependencies), [
+            os.path.join("scripts", "add_area_column.py"),
+            os.path.join("testdata", "BQ31.dbf"),
+            os.path.join("testdata", "BQ31.shp"),
+            os.path.join("testdata", "BQ31.shx"),
+            os.path.join("tests", "helpers.py"),
+            os.path.join("tests", "test_a.py"),
+        ])
+
+    def test_dependency_finder_reuses_module_parses(self):
+        module_cache = ModuleCache()
+        finder = DependencyFinder(
+            self.test_folder, [self.script_folder, self.data_folder], module_cache=module_cache)
+        self.assertEqual(
+            finder.dependencies("test_a"),
+            static_dependencies(self.test_folder, "test_a", [self.script_folder, self.data_folder]))
+        self.assertEqual(finder.dependencies("test_b"), set([os.path.join(self.test_folder, "test_b.py")]))
+        self.assertEqual(len(module_cache.data), 3)
+
+        # The folders are listed once for the run.
+        self.write_file(os.path.join(self.data_folder, "new.shp"), "")
+        self.assertNotIn("new", finder.stems)
+
+    def test_file_access_is_recorded(self):
+        inside = os.path.join(self.data_folder, "other.shp")
+        outside = os.path.join(self.folder, "outside.txt")
+        self.write_file(outside, "")
+        original_open = __builtin__.open
+        with FileAccessRecorder([self.data_folder]) as recorder:
+            open(inside).close()
+            open(outside).close()
+        self.assertEqual(recorder.paths, set([inside]))
+        self.assertIs(__builtin__.open, original_open)
+
+    def test_modules_are_affected_until_they_pass(self):
+        impact_map = ImpactMap()
+        self.assertEqual(impact_map.affected(["test_a", "test_b"]), ["test_a", "test_b"])
+        impact_map.record("test_a", static_dependencies(
+            self.test_folder, "test_a", [self.script_folder, self.data_folder]))
+        self.assertEqual(impact_map.affected(["test_a", "test_b"]), ["test_b"])
+        impact_map.forget("test_a")
+        self.assertEqual(impact_map.affected(["test_a"]), ["test_a"])
+
+    def test_changed_dependencies_affect_modules(self):
+        impact_map = ImpactMap()
+        impact_map.record("test_a", static_dependencies(
+            self.test_folder, "test_a", [self.script_folder, self.data_folder]))
+        self.write_file(os.path.join(self.script_folder, "other.py"), "##Changed=vector\n", 2000)
+        self.assertEqual(impact_map.affected(["test_a"]), [])
+        self.write_file(os.path.join(self.data_folder, "BQ31.dbf"), "", 2000)
+        self.assertEqual(impact_map.affected(["test_a"]), ["test_a"])
+
+    def test_removed_dependencies_affect_modules(self):
+        impact_map = ImpactMap()
+        impact_map.record("test_a", static_dependencies(
+            self.test_folder, "test_a", [self.script_folder, self.data_folder]))
+        os.remove(os.path.join(self.test_folder, "helpers.py"))
+        self.assertEqual(impact_map.affected(["test_a"]), ["test_a"])
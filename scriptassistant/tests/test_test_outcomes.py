@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""Tests the test outcomes kept for rerunning failures and running failures first."""
+
+import unittest
+
+from scriptassistant.testing.outcomes import OutcomeStore, iterate_tests, order_failed_first
+
+
+class TestOutcomeTest(unittest.TestCase):
+    """Test recording test outcomes and ordering failures first."""
+
+    # Not collected with the tests in this module, as they fail on purpose.
+    class ExampleTest(unittest.TestCase):
+
+        def test_a(self):
+            pass
+
+        def test_b(self):
+            self.fail("b failed")
+
+        def test_c(self):
+            raise ValueError("c errored")
+
+        @unittest.skip("not today")
+        def test_d(self):
+            pass
+
+    class FixtureTest(unittest.TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            raise ValueError("fixture errored")
+
+        def test_e(self):
+            pass
+
+    def run_suite(self, suite):
+        result = unittest.TestResult()
+        suite.run(result)
+        return result
+
+    def test_outcomes_are_recorded(self):
+        suite = unittest.TestLoader().loadTestsFromTestCase(self.ExampleTest)
+        outcomes = OutcomeStore()
+        outcomes.record(iterate_tests(suite), self.run_suite(suite))
+        test_id = "{}.ExampleTest.".format(__name__)
+        self.assertEqual(outcomes.data, {
+            test_id + "test_a": "passed",
+            test_id + "test_b": "failed",
+            test_id + "test_c": "failed",
+            test_id + "test_d": "skipped",
+        })
+        self.assertEqual(outcomes.failed("$ALL"), [test_id + "test_b", test_id + "test_c"])
+        self.assertEqual(outcomes.failed(test_id + "test_b"), [test_id + "test_b"])
+        self.assertEqual(outcomes.failed("other_module"), [])
+
+    def test_fixture_errors_fail_their_tests(self):
+        suite = unittest.TestLoader().loadTestsFromTestCase(self.FixtureTest)
+        outcomes = OutcomeStore()
+        outcomes.record(iterate_tests(suite), self.run_suite(suite))
+        self.assertEqual(outcomes.failed(__name__), ["{}.FixtureTest.test_e".format(__name__)])
+
+    def test_passing_tests_are_no_longer_failures(self):
+        outcomes = OutcomeStore()
+        test = self.ExampleTest("test_a")
+        outcomes.data[test.id()] = "failed"
+        outcomes.record([test], self.run_suite(unittest.TestSuite([test])))
+        self.assertEqual(outcomes.failed("$ALL"), [])
+
+    def test_module_failures_are_dropped_once_its_tests_run(self):
+        outcomes = OutcomeStore()
+        outcomes.data[__name__] = "failed"
+        self.assertEqual(outcomes.failed("$ALL"), [__name__])
+        test = self.ExampleTest("test_a")
+        outcomes.record([test], self.run_suite(unittest.TestSuite([test])))
+        self.assertEqual(outcomes.data, {test.id(): "passed"})
+
+    def test_failures_are_ordered_first(self):
+        suite = unittest.TestLoader().loadTestsFromTestCase(self.ExampleTest)
+        failed = set(["{}.ExampleTest.{}".format(__name__, name) for name in ("test_c", "test_b")])
+        ordered = [test.id().rpartition(".")[2] for test in order_failed_first(suite, failed)]
+        self.assertEqual(ordered, ["test_b", "test_c", "test_a", "test_d"])
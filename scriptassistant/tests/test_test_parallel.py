@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""Tests pinning test modules to QGIS and merging results from worker processes."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from scriptassistant.testing.outcomes import OutcomeStore, iterate_tests
+from scriptassistant.testing.parallel import (needs_gui, result_from_json, result_to_json,
+                                              crashed_result)
+from scriptassistant.testing.results import CollectingResult
+
+
+class TestParallelTest(unittest.TestCase):
+    """Test the parts of the parallel test runner which run without QGIS."""
+
+    # Not collected with the tests in this module, as they fail on purpose.
+    class ExampleTest(unittest.TestCase):
+
+        def test_a(self):
+            pass
+
+        def test_b(self):
+            self.fail("b failed")
+
+        @unittest.skip("not today")
+        def test_c(self):
+            pass
+
+    def setUp(self):
+        """Runs before each test."""
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.folder)
+
+    def module_needs_gui(self, text):
+        path = os.path.join(self.folder, "test_module.py")
+        with open(path, "w") as module_file:
+            module_file.write(text)
+        return needs_gui(path)
+
+    def test_modules_using_the_gui_are_pinned(self):
+        self.assertFalse(self.module_needs_gui("import unittest\nfrom qgis.core import QgsVectorLayer\n"))
+        self.assertTrue(self.module_needs_gui("from qgis.utils import iface\n"))
+        self.assertTrue(self.module_needs_gui("from qgis.utils import plugins, QGis\n"))
+        self.assertTrue(self.module_needs_gui("import qgis.utils\nqgis.utils.iface.mapCanvas()\n"))
+        self.assertTrue(self.module_needs_gui("# scriptassistant: in-process\nimport unittest\n"))
+        self.assertTrue(self.module_needs_gui("def broken(:\n"))
+
+    def test_results_survive_the_round_trip(self):
+        suite = unittest.TestLoader().loadTestsFromTestCase(self.ExampleTest)
+        result = CollectingResult()
+        suite.run(result)
+        data = result_to_json(iterate_tests(suite), result)
+        self.assertEqual(
+            [record["status"] for record in data["records"]], ["passed", "failed", "skipped"])
+        tests, remote_result = result_from_json(data)
+
+        self.assertEqual(remote_result.testsRun, 3)
+        self.assertEqual(
+            [str(test) for test, _ in remote_result.failures],
+            [str(test) for test, _ in result.failures])
+        self.assertEqual(remote_result.failures[0][1], result.failures[0][1])
+        self.assertEqual(
+            [(test.id(), reason) for test, reason in remote_result.skipped],
+            [(test.id(), reason) for test, reason in result.skipped])
+        self.assertFalse(remote_result.wasSuccessful())
+
+        local = OutcomeStore()
+        local.record(iterate_tests(suite), result)
+        remote = OutcomeStore()
+        remote.record(tests, remote_result)
+        self.assertEqual(remote.data, local.data)
+
+    def test_crashed_module_is_recorded_as_failed(self):
+        tests, result = result_from_json(crashed_result({"module": "test_x"}, "exited"))
+        outcomes = OutcomeStore()
+        outcomes.record(tests, result)
+        self.assertEqual(outcomes.failed("$ALL"), ["test_x"])
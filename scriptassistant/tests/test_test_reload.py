@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""Tests reloading only changed modules and the modules which use them."""
+
+import os
+import sys
+from importlib import import_module
+
+from scriptassistant.testing.reloader import ModuleReloader, dependency_order
+
+from folders import FolderTestCase
+
+MODULES = {
+    "reload_helper.py": "VALUE = 1\n",
+    "reload_base.py": "from reload_helper import VALUE\n\n\nclass Base(object):\n    value = VALUE\n",
+    "test_reload_a.py": "from reload_base import Base\n\n\nclass A(Base):\n    pass\n",
+    "test_reload_b.py": "import os\n",
+}
+
+
+class TestReloadTest(FolderTestCase):
+    """Test finding and reloading stale modules in dependency order."""
+
+    file_mtime = 1000
+
+    def setUp(self):
+        """Runs before each test."""
+        super(TestReloadTest, self).setUp()
+        for filename, text in MODULES.items():
+            self.write_module(filename, text)
+        sys.path.insert(0, self.folder)
+        for filename in MODULES:
+            import_module(filename[:-3])
+        self.reloader = ModuleReloader()
+        self.reloader.update([self.folder])
+
+    def tearDown(self):
+        """Runs after each test."""
+        sys.path.remove(self.folder)
+        for filename in MODULES:
+            sys.modules.pop(filename[:-3], None)
+        super(TestReloadTest, self).tearDown()
+
+    def write_module(self, filename, text, mtime=None):
+        path = self.write_file(filename, text, mtime)
+        # Python 2 only checks the whole second of the mtime in a .pyc.
+        for compiled in (path + "c", path + "o"):
+            if os.path.exists(compiled):
+                os.remove(compiled)
+
+    def test_unchanged_modules_are_not_reloaded(self):
+        self.assertEqual(self.reloader.reload([self.folder]), [])
+
+    def test_changed_modules_and_dependents_are_reloaded_in_order(self):
+        self.write_module("reload_helper.py", "VALUE = 2\n", 2000)
+        self.assertEqual(
+            self.reloader.reload([self.folder]),
+            ["reload_helper", "reload_base", "test_reload_a"])
+        self.assertEqual(sys.modules["test_reload_a"].A.value, 2)
+        self.assertEqual(self.reloader.reload([self.folder]), [])
+
+    def test_forced_modules_are_reloaded(self):
+        self.assertEqual(
+            self.reloader.reload([self.folder], ["test_reload_b", "not_loaded"]),
+            ["test_reload_b"])
+
+    def test_modules_outside_folders_are_not_tracked(self):
+        self.assertNotIn("os", self.reloader.loaded)
+        self.assertEqual(sorted(self.reloader.loaded), sorted(name[:-3] for name in MODULES))
+
+    def test_import_cycles_are_ordered_by_name(self):
+        self.assertEqual(
+            dependency_order(["c", "b", "a"], {"a": set(["b"]), "b": set(["a"]), "c": set(["a"])}),
+            ["a", "b", "c"])
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""Tests collecting a record of each test for the Test Results panel."""
+
+import unittest
+
+from scriptassistant.testing.results import CollectingResult
+
+
+class TestResultsTest(unittest.TestCase):
+    """Test the records made as each test finishes."""
+
+    # Not collected with the tests in this module, as they fail on purpose.
+    class ExampleTest(unittest.TestCase):
+
+        def test_a(self):
+            pass
+
+        def test_b(self):
+            self.fail("b failed")
+
+        def test_c(self):
+            raise ValueError("c errored")
+
+        @unittest.skip("not today")
+        def test_d(self):
+            pass
+
+        @unittest.expectedFailure
+        def test_e(self):
+            self.fail("e failed")
+
+    class FixtureTest(unittest.TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            raise ValueError("fixture errored")
+
+        def test_f(self):
+            pass
+
+    def run_suite(self, test_case):
+        records = []
+        result = CollectingResult(records.append)
+        unittest.TestLoader().loadTestsFromTestCase(test_case).run(result)
+        self.assertEqual(result.records, records)
+        return result
+
+    def test_each_test_is_recorded(self):
+        result = self.run_suite(self.ExampleTest)
+        self.assertEqual(
+            [(record["id"].rpartition(".")[2], record["status"]) for record in result.records],
+            [("test_a", "passed"), ("test_b", "failed"), ("test_c", "error"),
+             ("test_d", "skipped"), ("test_e", "expected failure")])
+        self.assertIsNone(result.records[0]["detail"])
+        self.assertIn("b failed", result.records[1]["detail"])
+        self.assertIn("ValueError", result.records[2]["detail"])
+        self.assertEqual(result.records[3]["detail"], "not today")
+        self.assertTrue(all(record["duration"] >= 0 for record in result.records))
+        self.assertEqual(len(result.failures), 1)
+        self.assertEqual(len(result.errors), 1)
+
+    def test_fixture_errors_are_recorded(self):
+        result = self.run_suite(self.FixtureTest)
+        self.assertEqual(len(result.records), 1)
+        self.assertEqual(result.records[0]["status"], "error")
+        self.assertIsNone(result.records[0]["duration"])
+        self.assertIn("setUpClass", result.records[0]["description"])
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""Tests running the tests of a suite one at a time."""
+
+import unittest
+
+from scriptassistant.testing.steps import suite_steps
+
+
+class TestStepsTest(unittest.TestCase):
+    """Test stepping through a suite with its class fixtures."""
+
+    # Not collected with the tests in this module, as they fail on purpose.
+    class ExampleTest(unittest.TestCase):
+
+        calls = []
+
+        @classmethod
+        def setUpClass(cls):
+            cls.calls.append("setUpClass")
+
+        @classmethod
+        def tearDownClass(cls):
+            cls.calls.append("tearDownClass")
+
+        def test_a(self):
+            self.calls.append("test_a")
+
+        def test_b(self):
+            self.calls.append("test_b")
+            self.fail("b failed")
+
+        def test_c(self):
+            self.calls.append("test_c")
+
+    class FixtureTest(unittest.TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            raise ValueError("fixture errored")
+
+        def test_d(self):
+            pass
+
+    def setUp(self):
+        """Runs before each test."""
+        del self.ExampleTest.calls[:]
+        self.result = unittest.TestResult()
+
+    def load(self, test_case):
+        return unittest.TestLoader().loadTestsFromTestCase(test_case)
+
+    def test_tests_are_run_one_at_a_time(self):
+        steps = suite_steps(self.load(self.ExampleTest), self.result)
+        self.assertEqual(next(steps).id().rpartition(".")[2], "test_a")
+        self.assertEqual(self.ExampleTest.calls, ["setUpClass", "test_a"])
+        self.assertEqual(self.result.testsRun, 1)
+        self.assertEqual(len(list(steps)), 2)
+        self.assertEqual(self.ExampleTest.calls[-1], "tearDownClass")
+        self.assertEqual(len(self.result.failures), 1)
+
+    def test_cancelled_runs_tear_down_their_fixtures(self):
+        steps = suite_steps(self.load(self.ExampleTest), self.result)
+        next(steps)
+        steps.close()
+        self.assertEqual(self.ExampleTest.calls, ["setUpClass", "test_a", "tearDownClass"])
+        self.assertEqual(self.result.testsRun, 1)
+        self.assertTrue(self.result.wasSuccessful())
+
+    def test_fixture_errors_skip_their_tests(self):
+        steps = list(suite_steps(self.load(self.FixtureTest), self.result))
+        self.assertEqual(len(steps), 1)
+        self.assertEqual(self.result.testsRun, 0)
+        self.assertEqual(len(self.result.errors), 1)
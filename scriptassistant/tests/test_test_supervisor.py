@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+"""Tests timing out tests run in a supervised worker process."""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+from scriptassistant.testing.headless import run_job
+from scriptassistant.testing.parallel import result_from_json
+from scriptassistant.testing.results import make_record
+from scriptassistant.testing.supervisor import (SupervisedJob, Watchdog, records_to_json,
+                                                timeout_setting)
+
+
+class FakeWorker(object):
+    """Stands in for a SupervisedWorker, writing a list of lines for each
+    job it is sent, or None for a worker process which exits.
+    """
+
+    def __init__(self, attempts):
+        self.attempts = attempts
+        self.lines = []
+        self.jobs = []
+        self.process = None
+        self.kills = 0
+        self.log_path = "test_worker.log"
+
+    def start(self):
+        self.process = object()
+
+    def send(self, job):
+        self.jobs.append(job)
+        self.lines = list(self.attempts.pop(0))
+
+    def next_line(self, timeout):
+        if not self.lines:
+            return ""
+        line = self.lines.pop(0)
+        return None if line is None else json.dumps(line) + "\n"
+
+    def exit_message(self):
+        return "The worker process exited, see {}.".format(self.log_path)
+
+    def kill(self):
+        self.kills += 1
+        self.process = None
+
+
+def tests_event(*test_ids):
+    return {"event": "tests", "tests": list(test_ids)}
+
+
+def record_event(test_id, status="passed"):
+    return {"event": "record", "record": make_record(test_id, test_id, status, 0.1, None, 0.1)}
+
+
+def timeout_event(limit):
+    return {"event": "timeout", "limit": limit, "stack": "File \"test_x.py\", line 9, in test_b\n"}
+
+
+def job_result():
+    return {"timings": [["test_x (import)", 0.5, 0.5]], "accessed": ["/data/x.shp"]}
+
+
+JOB = {"module": "test_x", "name": None, "tests": None, "failed": None}
+
+SLOW_MODULE = """
+import time
+import unittest
+
+
+class SlowTest(unittest.TestCase):
+
+    def test_a(self):
+        pass
+
+    def test_b(self):
+        time.sleep(1.5)
+
+    def test_c(self):
+        pass
+"""
+
+
+class TestSupervisorTest(unittest.TestCase):
+    """Test the watchdog and the handling of timed out tests."""
+
+    def poll(self, job):
+        records = []
+        while not job.finished:
+            records.extend(job.poll(0))
+        return records
+
+    def test_watchdog_reports_the_stack_of_a_stuck_test(self):
+        stuck = threading.Event()
+
+        def stuck_test():
+            stuck.wait(10)
+
+        thread = threading.Thread(target=stuck_test)
+        thread.start()
+        timeouts = []
+        watchdog = Watchdog(0.1, None, lambda limit, stack: timeouts.append((limit, stack)), thread.ident)
+        watchdog.start()
+        watchdog.join(5)
+        stuck.set()
+        thread.join()
+        self.assertEqual(len(timeouts), 1)
+        self.assertEqual(timeouts[0][0], "test")
+        self.assertIn("in stuck_test", timeouts[0][1])
+
+    def test_watchdog_limits(self):
+        watchdog = Watchdog(10, 60, None)
+        now = time.time()
+        self.assertIsNone(watchdog.expired(now))
+        self.assertEqual(watchdog.expired(now + 11), "test")
+        self.assertEqual(watchdog.expired(now + 61), "module")
+        watchdog.test_started = now + 55
+        self.assertIsNone(watchdog.expired(now + 59))
+        self.assertIsNone(Watchdog(None, None, None).expired(now + 1000))
+
+    def test_worker_sends_records_and_timeouts(self):
+        folder = tempfile.mkdtemp()
+        sys.path.append(folder)
+        try:
+            with open(os.path.join(folder, "test_supervised_slow.py"), "w") as module_file:
+                module_file.write(SLOW_MODULE)
+            sent = []
+            job = dict(JOB, module="test_supervised_slow", skip=["test_supervised_slow.SlowTest.test_c"],
+                       test_timeout=0.2, module_timeout=None)
+            data = run_job(job, {"test_folder": folder, "record_folders": []}, sent.append)
+        finally:
+            sys.path.remove(folder)
+            sys.modules.pop("test_supervised_slow", None)
+            shutil.rmtree(folder)
+
+        self.assertEqual([message["event"] for message in sent], ["tests", "record", "timeout", "record"])
+        self.assertEqual(sent[0]["tests"], ["test_supervised_slow.SlowTest.test_a",
+                                            "test_supervised_slow.SlowTest.test_b"])
+        self.assertIn("in test_b", sent[2]["stack"])
+        self.assertEqual(data["testsRun"], 2)
+
+    def test_timed_out_test_is_an_error_and_the_rest_run(self):
+        worker = FakeWorker([
+            [tests_event("test_x.A.test_a", "test_x.A.test_b", "test_x.A.test_c"),
+             record_event("test_x.A.test_a"), timeout_event("test")],
+            [tests_event("test_x.A.test_c"), record_event("test_x.A.test_c"), job_result()],
+        ])
+        job = SupervisedJob(worker, JOB, 60, 600)
+        records = self.poll(job)
+
+        self.assertEqual(
+            [(record["id"], record["status"]) for record in records],
+            [("test_x.A.test_a", "passed"), ("test_x.A.test_b", "error"), ("test_x.A.test_c", "passed")])
+        self.assertIn("Timed out after 60 seconds (test timeout)", records[1]["detail"])
+        self.assertIn("in test_b", records[1]["detail"])
+        self.assertEqual(worker.kills, 1)
+        self.assertEqual(worker.jobs[0]["test_timeout"], 60)
+        self.assertEqual(worker.jobs[1]["skip"], ["test_x.A.test_a", "test_x.A.test_b"])
+        self.assertLessEqual(worker.jobs[1]["module_timeout"], 600)
+
+        tests, result = result_from_json(job.result())
+        self.assertEqual([test.id() for test in tests],
+                         ["test_x.A.test_a", "test_x.A.test_b", "test_x.A.test_c"])
+        self.assertEqual(result.testsRun, 3)
+        self.assertEqual([test.id() for test, _ in result.errors], ["test_x.A.test_b"])
+        self.assertEqual(job.result()["accessed"], ["/data/x.shp"])
+        self.assertEqual(
+            [timing[0] for timing in job.result()["timings"]], ["test_x.A.test_a", "test_x (import)"])
+
+    def test_module_timeout_stops_the_module(self):
+        worker = FakeWorker([
+            [tests_event("test_x.A.test_a", "test_x.A.test_b", "test_x.A.test_c"),
+             timeout_event("module")],
+        ])
+        job = SupervisedJob(worker, JOB, 60, 600)
+        records = self.poll(job)
+        self.assertEqual([record["id"] for record in records], ["test_x.A.test_a", "test_x"])
+        self.assertIn("module timeout", records[0]["detail"])
+        self.assertIn("2 tests were not run", records[1]["detail"])
+        self.assertEqual(len(worker.jobs), 1)
+
+    def test_crashed_worker_is_restarted(self):
+        worker = FakeWorker([
+            [tests_event("test_x.A.test_a", "test_x.A.test_b"), None],
+            [tests_event("test_x.A.test_b"), record_event("test_x.A.test_b", "failed"), job_result()],
+        ])
+        job = SupervisedJob(worker, JOB)
+        records = self.poll(job)
+        self.assertEqual(
+            [(record["id"], record["status"]) for record in records],
+            [("test_x.A.test_a", "error"), ("test_x.A.test_b", "failed")])
+        self.assertIn("The worker process exited", records[0]["detail"])
+
+    def test_hang_while_importing_is_a_module_error(self):
+        worker = FakeWorker([[timeout_event("test")]])
+        job = SupervisedJob(worker, JOB, 60, None)
+        records = self.poll(job)
+        self.assertEqual([(record["id"], record["status"]) for record in records], [("test_x", "error")])
+        tests, result = result_from_json(job.result())
+        self.assertEqual([test.id() for test in tests], ["test_x"])
+        self.assertEqual(result.testsRun, 1)
+
+    def test_unresponsive_worker_is_killed(self):
+        worker = FakeWorker([[tests_event("test_x.A.test_a")]])
+        job = SupervisedJob(worker, JOB, 0.01, None)
+        job.poll(0)
+        job.check_responding(time.time() + 20)
+        self.assertTrue(job.finished)
+        self.assertIn("did not respond", job.records[0]["detail"])
+        self.assertEqual(worker.kills, 1)
+
+    def test_records_to_json_skips_fixture_errors(self):
+        records = [
+            make_record("test_x.A.test_a", "test_a (test_x.A)", "passed", 0.1),
+            make_record("setUpClass (test_x.B)", "setUpClass (test_x.B)", "error", None, "Traceback"),
+            make_record("test_x.C.test_c", "test_c (test_x.C)", "skipped", 0.0, "not today"),
+        ]
+        data = records_to_json(["test_x.A.test_a", "test_x.C.test_c"], records, [], set())
+        self.assertEqual(data["testsRun"], 2)
+        self.assertEqual(data["errors"], [["setUpClass (test_x.B)", "setUpClass (test_x.B)", "Traceback"]])
+        self.assertEqual(data["skipped"], [["test_x.C.test_c", "test_c (test_x.C)", "not today"]])
+
+    def test_timeout_setting(self):
+        self.assertEqual(timeout_setting("30.0", 60), 30.0)
+        self.assertEqual(timeout_setting(None, 60), 60)
+        self.assertIsNone(timeout_setting("0.0", 60))
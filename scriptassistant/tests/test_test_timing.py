@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""Tests timing test runs and flagging the tests which have become slower."""
+
+import unittest
+
+from scriptassistant.testing.results import CollectingResult
+from scriptassistant.testing.steps import suite_steps
+from scriptassistant.testing.timing import (TimingHistory, HISTORY_LENGTH,
+                                            fixture_timing_id, regression_ratio,
+                                            timing_report)
+
+
+class TestTimingTest(unittest.TestCase):
+    """Test the timing history and the report printed after a run."""
+
+    # Not collected with the tests in this module.
+    class ExampleTest(unittest.TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            pass
+
+        def test_a(self):
+            pass
+
+        def test_b(self):
+            pass
+
+    def test_tests_and_fixtures_are_timed(self):
+        suite = unittest.TestLoader().loadTestsFromTestCase(self.ExampleTest)
+        result = CollectingResult()
+        list(suite_steps(suite, result))
+        self.assertEqual(
+            [timing[0] for timing in result.timings],
+            [fixture_timing_id(self.ExampleTest)] + [test.id() for test in suite])
+        for _, wall, cpu in result.timings:
+            self.assertGreaterEqual(wall, 0)
+            self.assertGreaterEqual(cpu, 0)
+        self.assertIsNotNone(result.records[0]["cpu"])
+
+    def test_history_is_limited(self):
+        history = TimingHistory()
+        for wall in range(HISTORY_LENGTH + 2):
+            history.record([["test_a", wall, 0.0]])
+        self.assertEqual(len(history.data["test_a"]), HISTORY_LENGTH)
+        self.assertEqual(history.data["test_a"][0], [2, 0.0])
+
+    def test_regressions_are_compared_with_earlier_runs(self):
+        history = TimingHistory()
+        self.assertIsNone(history.usual("test_a"))
+        for wall in (1.0, 3.0, 1.2, 10.0):
+            history.record([["test_a", wall, wall]])
+        self.assertEqual(history.usual("test_a"), 1.2)
+        self.assertTrue(history.is_regression("test_a", 10.0, 2.0))
+        self.assertFalse(history.is_regression("test_a", 10.0, 10.0))
+        self.assertFalse(history.is_regression("test_a", 10.0, None))
+        # Too quick to tell.
+        history.record([["test_b", 0.001, 0.0], ["test_b", 0.01, 0.0]])
+        self.assertFalse(history.is_regression("test_b", 0.01, 2.0))
+
+    def test_regression_ratio_setting(self):
+        self.assertEqual(regression_ratio("3.5"), 3.5)
+        self.assertEqual(regression_ratio(None), 2.0)
+        self.assertIsNone(regression_ratio("1.0"))
+
+    def test_report_lists_the_slowest_and_the_regressions(self):
+        history = TimingHistory()
+        history.record([["test_a", 1.0, 0.9], ["test_b", 0.5, 0.1]])
+        timings = [["test_a", 1.1, 1.0], ["test_b", 2.0, 0.2], ["test_c", 0.1, 0.1]]
+        history.record(timings)
+        lines = timing_report(timings, history, 2.0, count=2)
+        self.assertEqual(lines[0], "SLOWEST:\n")
+        self.assertIn("test_b", lines[2])
+        self.assertIn("History: 0.50 2.00", lines[3])
+        self.assertIn("test_a", lines[4])
+        self.assertNotIn("test_c", "\n".join(lines[:7]))
+        self.assertEqual(lines[7:], [
+            "SLOWER THAN USUAL (more than 2 times):\n",
+            "test_b took 2.000s, usually 0.500s",
+            "",
+        ])
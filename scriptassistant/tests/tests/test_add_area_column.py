@@ -4,18 +4,23 @@
 testing Script Assistant plugin functionality.
 """
 
+# The script is loaded into the processing toolbox of the running QGIS.
+# scriptassistant: in-process
+
 import os
 import unittest
 from shutil import copy
 
 from qgis.core import QgsVectorLayer
-from qgis.utils import plugins, QGis
+from qgis.utils import QGis
 
 import processing
 from processing.core.Processing import Processing
-from processing import runalg
 from processing.script.ScriptUtils import ScriptUtils
 
+from scriptassistant.sync.provider import refresh_script_algorithms
+from scriptassistant.testing.fixtures import runalg
+
 # set global variables
 __location__ = os.path.realpath(
     os.path.join(os.getcwd(), os.path.dirname(__file__)))
@@ -31,24 +36,24 @@ test_layer = QgsVectorLayer(
 if not test_layer.isValid():
     raise ImportError("Reference Layer failed to load!")
 
+Processing.initialize()
+
 # QGIS 2.14 has ScriptUtils.scriptsFolder()
 if QGis.QGIS_VERSION_INT < 21800:
-    copy(file_path, ScriptUtils.scriptsFolder())
+    scripts_folder = ScriptUtils.scriptsFolder()
 # QGIS 2.18 has ScriptUtils.scriptsFolders()
-elif QGis.QGIS_VERSION_INT >= 21800:
-    copy(file_path, ScriptUtils.scriptsFolders()[0])
-plugins["processing"].toolbox.updateProvider("script")
-
-Processing.initialize()
+else:
+    scripts_folder = ScriptUtils.scriptsFolders()[0]
+copy(file_path, scripts_folder)
 
+# Only the copied script's algorithm is loaded again, rather than every
+# script. QGIS 2.14 falls back to refreshing the whole provider.
+refresh_script_algorithms(scripts_folder, [], [os.path.basename(file_path)], [])
 # QGIS 2.14 has Processing.updateAlgsList()
 if QGis.QGIS_VERSION_INT < 21800:
     Processing.updateAlgsList()
-# QGIS 2.18 has algList.reloadProvider(("script")
-elif QGis.QGIS_VERSION_INT >= 21800:
-    from processing.core.alglist import algList
-    algList.reloadProvider("script")
 
+# The output is cached until the script or the test layer changes.
 result = runalg(
     "script:addareacolumn",
     test_layer,